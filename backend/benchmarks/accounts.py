@@ -0,0 +1,4 @@
+"""Учётные записи, которые создаёт benchmarks.seed и использует benchmarks.load_test."""
+
+BENCH_PASSWORD = "bench-password"
+BENCH_DOMAIN = "bench.example.com"
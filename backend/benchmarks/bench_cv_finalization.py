@@ -0,0 +1,146 @@
+"""
+Финализация оценки резюме (evaluate_resume_background) на настоящем Postgres.
+
+Для каждого исхода оценки — проход на интервью, отказ, ошибка парсинга, исключение
+модели — запускает оценку с заглушкой evaluate_cv на свежем отклике и считает
+внешние вызовы и работу с БД. Ожидается: сама оценка не создаёт комнат VideoSDK,
+делает ровно один commit и один INSERT оценок, а при проходе пишет одно сообщение
+outbox; после обработки outbox (core.outbox.dispatch_pending) у отклика ровно один
+митинг, и повторная обработка ничего не добавляет.
+
+Запуск из каталога backend (нужны DB_* и засеянная БД, см. benchmarks.seed):
+    python -m benchmarks.bench_cv_finalization --criteria 3
+Код выхода 1 — комнаты внутри оценки, лишние коммиты, INSERT'ы или митинги.
+"""
+import argparse
+import uuid
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from src.core.profiling import profile_queries
+
+
+def _outcomes(criteria: int) -> dict:
+    names = [f"criterion {i}" for i in range(criteria)]
+
+    def scored(score):
+        def fake(**kwargs):
+            return {
+                "criteria": [{"name": n, "score": score, "strengths": ["x"], "weaknesses": ["y"]} for n in names],
+                "raw_model_output": "{}",
+                "parse_error": False,
+            }
+        return fake
+
+    def parse_error(**kwargs):
+        return {"criteria": [], "raw_model_output": "not json", "parse_error": True}
+
+    def failure(**kwargs):
+        raise RuntimeError("429 Too Many Requests")
+
+    return {
+        "interview": (scored(80), "interview", 1, criteria),
+        "rejected": (scored(20), "rejected", 0, criteria),
+        "parse_error": (parse_error, "cvReview", 0, 1),
+        "llm_error": (failure, "waitResult", 0, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--criteria", type=int, default=3)
+    args = parser.parse_args()
+
+    from src.api.applicant import utils as applicant_utils
+    from src.api.applicant.queries import insert_application
+    from src.api.interview import service as interview_service
+    from src.core.database import SessionLocal, engine
+    from src.core.outbox import dispatch_pending
+    from src.core.profiling import instrument_engine
+    from src.ml import cv_estimator
+
+    instrument_engine(engine)
+
+    rooms = []
+
+    def fake_room():
+        room_id = f"bench-{uuid.uuid4().hex[:12]}"
+        rooms.append(room_id)
+        return room_id, f"https://playground.videosdk.live/?meetingId={room_id}"
+
+    commits = []
+    event.listen(Session, "after_commit", lambda session: commits.append(session))
+    interview_service.create_videosdk_room = fake_room
+    applicant_utils._extract_text_from_file = lambda path: "Python, SQL, FastAPI"
+
+    with SessionLocal() as db:
+        applicant_id, resume_id = db.execute(text(
+            "SELECT applicant_id, id FROM applicant_resume_versions WHERE is_current LIMIT 1"
+        )).one()
+        vacancy_ids = db.execute(text(
+            "SELECT id FROM vacancies v WHERE NOT EXISTS ("
+            " SELECT 1 FROM job_applications ja WHERE ja.vacancy_id = v.id AND ja.applicant_id = :a"
+            ") ORDER BY id LIMIT 4"
+        ), {"a": applicant_id}).scalars().all()
+
+    failed = False
+    print(f"{'outcome':<12} {'status':<11} {'rooms':>5} {'commits':>7} {'queries':>7} {'inserts':>7} {'rows':>4} {'outbox':>6} {'meetings':>8}")
+    for (name, (fake, expected_status, expected_rooms, expected_rows)), vacancy_id in zip(
+        _outcomes(args.criteria).items(), vacancy_ids
+    ):
+        with SessionLocal() as db:
+            application_id = insert_application(db, applicant_id, vacancy_id, resume_id)
+            db.commit()
+
+        cv_estimator.evaluate_cv = fake
+        rooms.clear()
+        commits.clear()
+        with profile_queries() as profile:
+            applicant_utils.evaluate_resume_background(application_id, vacancy_id, resume_id)
+        commit_count, room_count = len(commits), len(rooms)
+
+        with SessionLocal() as db:
+            outbox = db.execute(text(
+                "SELECT count(*) FROM outbox WHERE payload->>'jobApplicationId' = :i"
+            ), {"i": str(application_id)}).scalar()
+        # две пачки подряд: вторая не должна создать ни комнаты, ни митинга
+        while dispatch_pending():
+            pass
+        dispatch_pending()
+
+        with SessionLocal() as db:
+            status = db.execute(text("SELECT status FROM job_applications WHERE id = :i"), {"i": application_id}).scalar()
+            rows = db.execute(text(
+                "SELECT count(*) FROM job_application_cv_evaluations WHERE job_application_id = :i"
+            ), {"i": application_id}).scalar()
+            meetings = db.execute(text("SELECT count(*) FROM meetings WHERE application_id = :i"), {"i": application_id}).scalar()
+            db.execute(text("DELETE FROM outbox WHERE payload->>'jobApplicationId' = :i"), {"i": str(application_id)})
+            for table in ("job_application_events", "meetings"):
+                db.execute(text(f"DELETE FROM {table} WHERE application_id = :i"), {"i": application_id})
+            db.execute(text("DELETE FROM job_applications WHERE id = :i"), {"i": application_id})
+            db.commit()
+
+        inserts = sum(n for shape, n in profile.shapes.items() if shape.startswith("INSERT INTO job_application_cv_evaluations"))
+        print(
+            f"{name:<12} {status:<11} {room_count:>5} {commit_count:>7} {profile.queries:>7} {inserts:>7} {rows:>4}"
+            f" {outbox:>6} {meetings:>8}"
+        )
+        if (
+            status != expected_status
+            or room_count != 0
+            or outbox != expected_rooms
+            or meetings != expected_rooms
+            or len(rooms) != expected_rooms
+            or commit_count != 1
+            or inserts != 1
+            or rows != expected_rows
+        ):
+            print(f"FAIL: {name}")
+            failed = True
+
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Порядок очереди оценок резюме (src/api/applicant/scheduler.py): приоритеты, дедлайны и
+справедливое распределение между вакансиями.
+
+Создаёт временные вакансии и отклики и ставит в очередь, в таком порядке:
+    - массовую переоценку большой вакансии (--big откликов, LOW);
+    - срочные задачи той же вакансии с дедлайном в пределах EVAL_DEADLINE_HORIZON (LOW);
+    - новые отклики на --small маленьких вакансий по --per-small на каждую (NORMAL);
+    - ручные переоценки HR (--high, HIGH).
+Затем забирает задачи по одной (claim_jobs + complete_job, без вызова модели) и печатает,
+на каком по счёту захвате пришла каждая группа. Для сравнения — позиции при FIFO.
+
+Проверки: срочные идут первыми; ручные HR — в первом «раунде», а не после массовой
+переоценки; новые отклики маленьких вакансий не ждут всю большую вакансию — до последнего
+из них большая получает не больше своей доли (вес LOW / вес NORMAL).
+
+Запуск из каталога backend (нужны DB_* и применённые миграции; очередь должна быть пуста):
+    python -m benchmarks.bench_eval_scheduler --big 2000 --small 10 --per-small 20
+Код выхода 1 — нарушен порядок. Временные данные удаляются в конце.
+"""
+import argparse
+import math
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+
+_SETUP_SQL = """
+    WITH profiles AS (
+        INSERT INTO applicant_profiles (name, surname, contacts)
+        SELECT 'Соискатель ' || g, 'Очередин', '+7 900 ' || g FROM generate_series(1, :rows) g
+        RETURNING id
+    ),
+    resumes AS (
+        INSERT INTO applicant_resume_versions (applicant_id, storage_path, text_hash, is_current)
+        SELECT id, '/tmp/bench-scheduler.txt', 'bench', true FROM profiles
+        RETURNING id, applicant_id
+    )
+    INSERT INTO job_applications (vacancy_id, applicant_id, resume_version_id, status, contacts)
+    SELECT :vacancy_id, applicant_id, id, 'cvReview', '' FROM resumes
+    RETURNING id, vacancy_id, resume_version_id
+"""
+
+_CLEANUP_SQL = [
+    "DELETE FROM cv_evaluation_jobs WHERE vacancy_id = ANY(:vacancy_ids)",
+    "DELETE FROM cv_evaluation_flows WHERE flow_key LIKE ANY(:flow_patterns)",
+    """
+    CREATE TEMP TABLE bench_scheduler_applicants AS
+    SELECT applicant_id AS id FROM job_applications WHERE vacancy_id = ANY(:vacancy_ids)
+    """,
+    "DELETE FROM job_applications WHERE vacancy_id = ANY(:vacancy_ids)",
+    "DELETE FROM applicant_resume_versions WHERE applicant_id IN (SELECT id FROM bench_scheduler_applicants)",
+    "DELETE FROM applicant_profiles WHERE id IN (SELECT id FROM bench_scheduler_applicants)",
+    "DELETE FROM vacancies WHERE id = ANY(:vacancy_ids)",
+]
+
+URGENT = 5
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--big", type=int, default=2000, help="откликов на большой вакансии")
+    parser.add_argument("--small", type=int, default=10, help="маленьких вакансий")
+    parser.add_argument("--per-small", type=int, default=20, help="откликов на маленькую вакансию")
+    parser.add_argument("--high", type=int, default=5, help="ручных переоценок HR")
+    args = parser.parse_args()
+
+    from src.api.applicant.scheduler import (
+        EVAL_PRIORITY_WEIGHTS,
+        HIGH,
+        LOW,
+        NORMAL,
+        claim_jobs,
+        complete_job,
+        enqueue_evaluations,
+        hr_flow,
+    )
+    from src.core.database import SessionLocal
+
+    with SessionLocal() as db:
+        if db.execute(text("SELECT count(*) FROM cv_evaluation_jobs")).scalar_one():
+            print("FAIL: cv_evaluation_jobs is not empty — run on an idle database")
+            raise SystemExit(1)
+
+        def vacancy(name: str) -> int:
+            return db.execute(text(
+                "INSERT INTO vacancies (name, status, date) VALUES (:name, 'active', now()) RETURNING id"
+            ), {"name": name}).scalar_one()
+
+        def applications(vacancy_id: int, rows: int) -> list[tuple[int, int, int]]:
+            return [tuple(row) for row in db.execute(text(_SETUP_SQL), {"rows": rows, "vacancy_id": vacancy_id}).all()]
+
+        big_id = vacancy("Массовая переоценка (bench)")
+        small_ids = [vacancy(f"Маленькая вакансия {i} (bench)") for i in range(args.small)]
+        big_apps = applications(big_id, args.big + URGENT + args.high)
+        small_apps = [applications(vacancy_id, args.per_small) for vacancy_id in small_ids]
+        db.commit()
+
+    vacancy_ids = [big_id, *small_ids]
+    hr_user = 10**9
+    groups: dict[int, str] = {}
+    try:
+        started = time.perf_counter()
+        with SessionLocal() as db:
+            rescore, urgent, manual = big_apps[:args.big], big_apps[args.big:args.big + URGENT], big_apps[args.big + URGENT:]
+            enqueue_evaluations(db, rescore, LOW, replace=True)
+            deadline = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(seconds=5)
+            enqueue_evaluations(db, urgent, LOW, deadline=deadline, replace=True)
+            for apps in small_apps:
+                enqueue_evaluations(db, apps, NORMAL)
+            enqueue_evaluations(db, manual, HIGH, flow=hr_flow(hr_user), replace=True)
+            db.commit()
+        groups.update({app[0]: "rescore" for app in rescore})
+        groups.update({app[0]: "deadline" for app in urgent})
+        groups.update({app[0]: "normal" for apps in small_apps for app in apps})
+        groups.update({app[0]: "high" for app in manual})
+        total = len(groups)
+        print(f"enqueued {total} jobs in {time.perf_counter() - started:.2f}s")
+
+        # FIFO для сравнения: порядок постановки
+        fifo = {application_id: position for position, application_id in enumerate(groups)}
+
+        order: list[int] = []
+        started = time.perf_counter()
+        while jobs := claim_jobs(1):
+            for job in jobs:
+                order.append(job.application_id)
+                complete_job(job)
+        elapsed = time.perf_counter() - started
+        print(f"claimed {len(order)} jobs one by one: {elapsed / max(1, len(order)) * 1000:.2f} ms per claim")
+
+        positions: dict[str, list[int]] = {}
+        fifo_positions: dict[str, list[int]] = {}
+        for position, application_id in enumerate(order):
+            positions.setdefault(groups[application_id], []).append(position)
+            fifo_positions.setdefault(groups[application_id], []).append(fifo[application_id])
+        print(f"{'group':<9} {'jobs':>5} {'first':>6} {'median':>7} {'last':>6}   FIFO median/last")
+        for name in ("deadline", "high", "normal", "rescore"):
+            p, f = positions.get(name, [0]), fifo_positions.get(name, [0])
+            print(f"{name:<9} {len(p):>5} {min(p):>6} {statistics.median(p):>7.0f} {max(p):>6}   "
+                  f"{statistics.median(f):.0f}/{max(f)}")
+
+        failed = []
+        if len(order) != total:
+            failed.append(f"claimed {len(order)} of {total}")
+        if sorted(positions.get("deadline", [])) != list(range(URGENT)):
+            failed.append("deadline jobs were not claimed first")
+        # ручные HR: пока идут их задачи, каждый другой поток получает не больше своей доли по весу (+1 на округление)
+        def others_share(priority: int) -> int:
+            return math.ceil(args.high * EVAL_PRIORITY_WEIGHTS[priority] / EVAL_PRIORITY_WEIGHTS[HIGH]) + 1
+
+        high_bound = URGENT + args.high + args.small * others_share(NORMAL) + others_share(LOW)
+        if max(positions.get("high", [0])) >= high_bound:
+            failed.append(f"high-priority jobs claimed as late as {max(positions['high'])} (bound {high_bound})")
+        # доля большой вакансии до последнего нового отклика — не больше веса LOW к NORMAL
+        last_normal = max(positions.get("normal", [0]))
+        big_before = sum(1 for position in positions.get("rescore", []) if position < last_normal)
+        share = math.ceil(args.per_small * EVAL_PRIORITY_WEIGHTS[LOW] / EVAL_PRIORITY_WEIGHTS[NORMAL]) + 2
+        print(f"rescore jobs claimed before the last new application: {big_before} (fair share ≤ {share})")
+        if big_before > share:
+            failed.append(f"big vacancy took {big_before} slots before small vacancies finished (fair share {share})")
+    finally:
+        with SessionLocal() as db:
+            params = {
+                "vacancy_ids": vacancy_ids,
+                "flow_patterns": [f"%:vacancy:{vacancy_id}" for vacancy_id in vacancy_ids] + [f"%:{hr_flow(hr_user)}"],
+            }
+            for sql in _CLEANUP_SQL:
+                db.execute(text(sql), params)
+            db.commit()
+
+    print("FAIL: " + "; ".join(failed) if failed else "OK")
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
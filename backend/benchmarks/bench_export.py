@@ -0,0 +1,114 @@
+"""
+Потоковая выгрузка откликов (src/api/hr/export.py) на большой вакансии.
+
+Создаёт временную вакансию с --rows откликами (у каждого свой соискатель, резюме и
+три оценки CV), прогоняет выгрузку CSV и XLSX до конца и меряет время, размер файла
+и прирост пикового RSS процесса (ru_maxrss). С server-side курсором прирост не зависит
+от числа строк; если курсор клиентский, psycopg2 буферизует весь результат и RSS
+растёт на сотни мегабайт. Временные данные удаляются в конце.
+
+Запуск из каталога backend (нужны DB_* и применённые миграции):
+    python -m benchmarks.bench_export --rows 100000
+Код выхода 1 — прирост пика памяти больше --max-peak-mb или нет заголовка CSV.
+"""
+import argparse
+import resource
+import time
+
+from sqlalchemy import text
+
+_SETUP_SQL = [
+    """
+    CREATE TEMP TABLE bench_export_applicants AS
+    WITH profiles AS (
+        INSERT INTO applicant_profiles (name, surname, contacts)
+        SELECT 'Соискатель ' || g, 'Выгрузкин', '+7 900 ' || g FROM generate_series(1, :rows) g
+        RETURNING id
+    )
+    SELECT id FROM profiles
+    """,
+    """
+    CREATE TEMP TABLE bench_export_resumes AS
+    WITH resumes AS (
+        INSERT INTO applicant_resume_versions (applicant_id, storage_path, text_hash, is_current)
+        SELECT id, '/tmp/bench-export.txt', 'bench', true FROM bench_export_applicants
+        RETURNING id, applicant_id
+    )
+    SELECT * FROM resumes
+    """,
+    """
+    WITH apps AS (
+        INSERT INTO job_applications (vacancy_id, applicant_id, resume_version_id, status, contacts)
+        SELECT :vacancy_id, applicant_id, id, 'cvReview', '' FROM bench_export_resumes
+        RETURNING id, resume_version_id
+    )
+    INSERT INTO job_application_cv_evaluations (job_application_id, resume_version_id, model, name, score, strengths, weaknesses)
+    SELECT apps.id, apps.resume_version_id, 'bench', c.name, (apps.id * 7 + c.n) % 100,
+           ARRAY['Python', 'FastAPI, PostgreSQL'], ARRAY['нет данных']
+    FROM apps CROSS JOIN (VALUES (1, 'hard skills'), (2, 'soft skills'), (3, 'опыт')) AS c(n, name)
+    """,
+]
+
+_CLEANUP_SQL = [
+    "DELETE FROM job_application_cv_evaluations WHERE job_application_id IN (SELECT id FROM job_applications WHERE vacancy_id = :vacancy_id)",
+    "DELETE FROM job_applications WHERE vacancy_id = :vacancy_id",
+    "DELETE FROM applicant_resume_versions WHERE applicant_id IN (SELECT id FROM bench_export_applicants)",
+    "DELETE FROM applicant_profiles WHERE id IN (SELECT id FROM bench_export_applicants)",
+    "DELETE FROM vacancies WHERE id = :vacancy_id",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--max-peak-mb", type=float, default=64.0)
+    args = parser.parse_args()
+
+    from src.api.hr.export import EXPORT_FORMATS
+    from src.core.database import engine
+
+    with engine.connect() as conn:
+        started = time.perf_counter()
+        vacancy_id = conn.execute(text(
+            "INSERT INTO vacancies (name, status, date) VALUES ('Выгрузка (bench)', 'active', now()) RETURNING id"
+        )).scalar_one()
+        params = {"rows": args.rows, "vacancy_id": vacancy_id}
+        for sql in _SETUP_SQL:
+            conn.execute(text(sql), params)
+        conn.commit()
+        print(f"seeded {args.rows} applications in {time.perf_counter() - started:.1f}s")
+
+        failed = False
+        try:
+            for name, (iter_file, _) in EXPORT_FORMATS.items():
+                rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                started = time.perf_counter()
+                size = chunks = 0
+                first = b""
+                for chunk in iter_file(vacancy_id):
+                    if not first:
+                        first = chunk
+                    size += len(chunk)
+                    chunks += 1
+                elapsed = time.perf_counter() - started
+                # ru_maxrss в Linux — килобайты; максимум только растёт, поэтому разница — прирост пика
+                peak_mb = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024
+                print(f"{name:<5} {size / 1024 / 1024:8.1f} MB in {chunks:>5} chunks, {elapsed:6.2f}s, "
+                      f"{args.rows / elapsed:9.0f} rows/s, peak RSS +{peak_mb:.1f} MB")
+                if peak_mb > args.max_peak_mb:
+                    print(f"FAIL: {name} peak RSS grew by {peak_mb:.1f} MB > {args.max_peak_mb} MB")
+                    failed = True
+                if name == "csv" and size and first.decode("utf-8", "ignore").count("\n") == 0:
+                    print("FAIL: csv header missing")
+                    failed = True
+        finally:
+            for sql in _CLEANUP_SQL:
+                conn.execute(text(sql), {"vacancy_id": vacancy_id})
+            conn.commit()
+
+    print("FAIL" if failed else "OK")
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Проверка глобального лимитера LLM (src/core/llm_limiter.py) на настоящем Postgres.
+
+N процессов одновременно резервируют по M слотов в одном бакете. Лимитер корректен,
+если выданные задержки образуют равномерное расписание: первые `capacity` вызовов
+идут сразу, дальше каждый следующий ровно на 1/rate секунд позже — без дублей и
+провалов, независимо от того, из какого процесса пришёл вызов. Спать не нужно:
+проверяются сами задержки, которые вернул reserve().
+
+Запуск из каталога backend (нужны DB_* и применённые миграции):
+    python -m benchmarks.bench_llm_limiter --procs 8 --calls 50 --per-minute 60
+"""
+import argparse
+import multiprocessing
+import statistics
+import time
+
+BUCKET_NAME = "bench:limiter"
+
+
+def _worker(args) -> list[tuple[float, float]]:
+    calls, per_minute = args
+    from src.core.llm_limiter import Bucket, reserve
+
+    bucket = Bucket(BUCKET_NAME, per_minute)
+    result = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        wait = reserve({bucket: 1})
+        # момент слота относительно общего времени, чтобы сравнивать процессы между собой
+        result.append((time.time() + wait, time.perf_counter() - started))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--procs", type=int, default=8)
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--per-minute", type=float, default=60.0)
+    args = parser.parse_args()
+
+    from sqlalchemy import text
+    from src.core.database import engine
+
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM llm_rate_limits WHERE name = :name"), {"name": BUCKET_NAME})
+
+    started = time.time()
+    with multiprocessing.get_context("spawn").Pool(args.procs) as pool:
+        results = pool.map(_worker, [(args.calls, args.per_minute)] * args.procs)
+    elapsed = time.time() - started
+
+    slots = sorted(slot - started for rows in results for slot, _ in rows)
+    latencies = sorted(latency for rows in results for _, latency in rows)
+    total = len(slots)
+    capacity = int(args.per_minute)
+    interval = 60.0 / args.per_minute
+
+    immediate = sum(1 for s in slots if s <= elapsed)
+    gaps = [b - a for a, b in zip(slots[capacity:], slots[capacity + 1:])]
+    expected_last = (total - capacity) * interval
+
+    print(f"{total} reservations from {args.procs} processes in {elapsed:.2f}s")
+    print(f"reserve() latency: p50 {statistics.median(latencies) * 1000:.1f} ms, "
+          f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} ms")
+    print(f"slots within the burst: {immediate} (capacity {capacity})")
+    print(f"last slot at +{slots[-1]:.1f}s, expected ~{expected_last:.1f}s")
+    if gaps:
+        print(f"gap between queued slots: min {min(gaps):.3f}s, max {max(gaps):.3f}s, expected {interval:.3f}s")
+
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM llm_rate_limits WHERE name = :name"), {"name": BUCKET_NAME})
+
+    ok = abs(slots[-1] - expected_last) <= elapsed + interval and (not gaps or min(gaps) > interval * 0.5)
+    print("OK" if ok else "FAIL: schedule does not match the bucket rate")
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Таймауты, повторы, circuit breaker и запасные модели оценки резюме против заглушки Groq
+(benchmarks.groq_stub) с инъекцией сбоев. Сценарии:
+
+1. healthy     — основная модель отвечает с первого раза;
+2. primary-503 — основная отвечает 503: повторы с jitter, затем запасная модель;
+3. primary-hang — основная висит: каждый вызов обрывается по --timeout, затем запасная;
+4. outage      — обе модели лежат: breaker'ы открываются, следующий вызов падает сразу,
+                 не доходя до заглушки (ProvidersUnavailable);
+5. requeue     — задача очереди оценок во время сбоя не пишет error-оценку, а
+                 откладывается на retry_after (отклик остаётся cvReview);
+6. recovery    — после cooldown заглушка здорова: повтор задачи оценивает отклик,
+                 пробный вызов закрывает breaker.
+
+Запуск из каталога backend (нужны DB_* и засеянная БД, см. benchmarks.seed):
+    python -m benchmarks.bench_llm_resilience
+Код выхода 1 — какой-то сценарий повёл себя не так.
+"""
+import argparse
+import os
+import time
+
+PRIMARY = "stub-primary"
+FALLBACK = "stub-fallback"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=18081)
+    parser.add_argument("--timeout", type=float, default=0.5)
+    parser.add_argument("--retries", type=int, default=2)
+    parser.add_argument("--failures", type=int, default=3, help="порог breaker'а")
+    parser.add_argument("--cooldown", type=float, default=2.0)
+    args = parser.parse_args()
+
+    from benchmarks.groq_stub import StubServer
+
+    stub = StubServer(args.port, score=40)
+    os.environ.update({
+        "GROQ_API_KEY": "stub",
+        "CV_EVAL_MODELS": f"{PRIMARY}@{stub.base_url},{FALLBACK}@{stub.base_url}",
+        "LLM_CALL_TIMEOUT": str(args.timeout),
+        "LLM_CALL_RETRIES": str(args.retries),
+        "LLM_RETRY_BACKOFF": "0.05",
+        "LLM_RETRY_BACKOFF_MAX": "0.2",
+        "LLM_BREAKER_FAILURES": str(args.failures),
+        "LLM_BREAKER_COOLDOWN": str(args.cooldown),
+        # лимитер и пре-скоринг проверяются своими бенчмарками
+        "LLM_REQUESTS_PER_MINUTE": "0",
+        "LLM_TOKENS_PER_MINUTE": "0",
+        "CV_PRESCORE_CONFIDENCE": "0",
+    })
+
+    from sqlalchemy import text
+    from src.api.applicant import utils as applicant_utils
+    from src.api.applicant.scheduler import NORMAL, enqueue_evaluations, run_pending
+    from src.api.applicant.queries import insert_application
+    from src.core import llm_resilience
+    from src.core.database import SessionLocal
+    from src.ml.cv_estimator import evaluate_cv
+
+    providers = applicant_utils.CV_EVAL_PROVIDERS
+
+    def evaluate():
+        return llm_resilience.call_with_fallback(
+            providers,
+            lambda provider, timeout: evaluate_cv(
+                job_description="Python backend",
+                resume_text="Python, FastAPI",
+                criteria=["hard skills"],
+                model=provider.model,
+                base_url=provider.base_url,
+                timeout=timeout,
+                max_retries=0,
+            ),
+            "bench",
+        )
+
+    failed = []
+
+    def check(name: str, condition: bool, details: str):
+        print(f"{'ok  ' if condition else 'FAIL'} {name:<13} {details}")
+        if not condition:
+            failed.append(name)
+
+    def run(name: str, primary: dict, fallback: dict):
+        llm_resilience._breakers.clear()
+        stub.calls.clear()
+        stub.set_fault(PRIMARY, **primary)
+        stub.set_fault(FALLBACK, **fallback)
+        started = time.perf_counter()
+        try:
+            _, provider = evaluate()
+            outcome = provider.model
+        except llm_resilience.ProvidersUnavailable as e:
+            outcome = f"unavailable (retry in {e.retry_after:.1f}s)"
+        return outcome, time.perf_counter() - started, dict(stub.calls)
+
+    with stub:
+        outcome, elapsed, calls = run("healthy", {"mode": "ok"}, {"mode": "ok"})
+        check("healthy", outcome == PRIMARY and calls == {PRIMARY: 1}, f"{outcome}, {elapsed:.2f}s, calls {calls}")
+
+        outcome, elapsed, calls = run("primary-503", {"mode": "error", "status": 503}, {"mode": "ok"})
+        check("primary-503", outcome == FALLBACK and calls == {PRIMARY: args.retries + 1, FALLBACK: 1},
+              f"{outcome}, {elapsed:.2f}s, calls {calls}")
+
+        outcome, elapsed, calls = run("primary-hang", {"mode": "hang", "hang": 30}, {"mode": "ok"})
+        limit = (args.retries + 1) * (args.timeout + 0.2) + 1.0
+        check("primary-hang", outcome == FALLBACK and elapsed < limit, f"{outcome}, {elapsed:.2f}s (< {limit:.1f}s), calls {calls}")
+
+        outcome, elapsed, calls = run("outage", {"mode": "error", "status": 503}, {"mode": "error", "status": 502})
+        check("outage", outcome.startswith("unavailable"), f"{outcome}, {elapsed:.2f}s, calls {calls}")
+        stub.calls.clear()
+        started = time.perf_counter()
+        try:
+            evaluate()
+            short_circuited = False
+        except llm_resilience.ProvidersUnavailable:
+            short_circuited = True
+        elapsed = time.perf_counter() - started
+        check("open-breaker", short_circuited and not stub.calls and elapsed < 0.05,
+              f"failed fast in {elapsed * 1000:.1f} ms, calls {dict(stub.calls)}")
+
+        # отклик во время сбоя: задача откладывается, а не получает error-оценку
+        applicant_utils._extract_text_from_file = lambda path: "Python, FastAPI, PostgreSQL, 5 лет опыта"
+        with SessionLocal() as db:
+            applicant_id, resume_id, vacancy_id = db.execute(text(
+                "SELECT r.applicant_id, r.id, v.id FROM applicant_resume_versions r CROSS JOIN vacancies v"
+                " WHERE r.is_current AND v.status = 'active' AND NOT EXISTS ("
+                "   SELECT 1 FROM job_applications ja WHERE ja.vacancy_id = v.id AND ja.applicant_id = r.applicant_id)"
+                " LIMIT 1"
+            )).one()
+            application_id = insert_application(db, applicant_id, vacancy_id, resume_id)
+            enqueue_evaluations(db, [(application_id, vacancy_id, resume_id)], NORMAL)
+            db.commit()
+
+        def state():
+            with SessionLocal() as db:
+                return db.execute(text(
+                    "SELECT ja.status::text,"
+                    " (SELECT count(*) FROM job_application_cv_evaluations e WHERE e.job_application_id = ja.id),"
+                    " (SELECT max(j.requeues) FROM cv_evaluation_jobs j WHERE j.job_application_id = ja.id)"
+                    " FROM job_applications ja WHERE ja.id = :id"
+                ), {"id": application_id}).one()
+
+        try:
+            run_pending()
+            status, evaluations, requeues = state()
+            check("requeue", status == "cvReview" and evaluations == 0 and requeues == 1,
+                  f"status {status}, {evaluations} evaluations, job requeued {requeues} time(s)")
+
+            stub.set_fault(PRIMARY, "ok")
+            stub.set_fault(FALLBACK, "ok")
+            time.sleep(args.cooldown)
+            with SessionLocal() as db:
+                db.execute(text("UPDATE cv_evaluation_jobs SET available_at = now() WHERE job_application_id = :id"), {"id": application_id})
+                db.commit()
+            run_pending()
+            status, evaluations, requeues = state()
+            breaker = llm_resilience.get_breaker(providers[0].name).state
+            check("recovery", status == "rejected" and evaluations == 3 and requeues is None and breaker == "closed",
+                  f"status {status}, {evaluations} evaluations, job {'done' if requeues is None else 'still queued'}, breaker {breaker}")
+        finally:
+            with SessionLocal() as db:
+                db.execute(text("DELETE FROM outbox WHERE (payload->>'jobApplicationId')::bigint = :i"), {"i": application_id})
+                db.execute(text("DELETE FROM cv_evaluation_jobs WHERE job_application_id = :i"), {"i": application_id})
+                db.execute(text("DELETE FROM job_application_cv_evaluations WHERE job_application_id = :i"), {"i": application_id})
+                db.execute(text("DELETE FROM job_application_events WHERE application_id = :i"), {"i": application_id})
+                db.execute(text("DELETE FROM job_applications WHERE id = :i"), {"i": application_id})
+                db.commit()
+
+    print("FAIL: " + ", ".join(failed) if failed else "OK")
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
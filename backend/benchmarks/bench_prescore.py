@@ -0,0 +1,147 @@
+"""
+Пре-скоринг резюме (src/ml/prescorer.py) до вызова LLM.
+
+1. Для каждой активной вакансии из БД собирает три синтетических резюме — полное
+   совпадение (все навыки, опыт, образование, языки), явное несовпадение (другая
+   профессия, без опыта) и частичное (половина навыков) — и меряет время prescore()
+   и распределение решений при пороге --threshold. Несовпадение прогоняется ещё и без
+   требований к образованию и языкам (mismatch-bare): неуказанные требования не должны
+   засчитываться резюме, и на вакансии с достаточным числом навыков это — отказ.
+2. Прогоняет evaluate_resume_throttled на свежих откликах с заглушкой evaluate_cv
+   и считает реальные вызовы модели: при совпадении и несовпадении их быть не должно,
+   частичное совпадение уходит в модель.
+
+Запуск из каталога backend (нужны DB_* и засеянная БД, см. benchmarks.seed):
+    python -m benchmarks.bench_prescore --threshold 0.8
+Код выхода 1 — совпадение/несовпадение ушло в LLM, частичное решено без модели
+или mismatch-bare не отклонён.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from collections import Counter
+
+MISMATCH = "Бухгалтер, ведение первичной документации, 1С: Бухгалтерия, Excel. Без опыта, выпускник колледжа."
+
+
+def _resumes(vacancy) -> dict[str, str]:
+    from src.ml.prescorer import parse_skills
+
+    skills = [s.label for s in parse_skills(vacancy.computerSkills, vacancy.specialSoftware)]
+    return {
+        "match": (
+            f"Разработчик, опыт {(vacancy.exp or 0) + 1} лет. Навыки: {', '.join(skills)}. "
+            f"Высшее образование (МГУ). Языки: {vacancy.foreignLanguages or ''}."
+        ),
+        "mismatch": MISMATCH,
+        "partial": f"Разработчик, навыки: {', '.join(skills[: max(1, len(skills) // 2)])}.",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threshold", type=float, default=0.8)
+    args = parser.parse_args()
+
+    # лимитер LLM не нужен: вызовы модели заглушены
+    os.environ["LLM_REQUESTS_PER_MINUTE"] = "0"
+    os.environ["LLM_TOKENS_PER_MINUTE"] = "0"
+    os.environ["CV_PRESCORE_CONFIDENCE"] = str(args.threshold)
+
+    from sqlalchemy import select, text
+    from src.api.applicant import utils as applicant_utils
+    from src.api.applicant.queries import insert_application
+    from src.core.database import SessionLocal
+    from src.ml import cv_estimator
+    from src.ml.prescorer import parse_skills, prescore
+    from src.models.models import Vacancy
+
+    with SessionLocal() as db:
+        vacancies = db.execute(select(Vacancy).where(Vacancy.status == "active").order_by(Vacancy.id)).scalars().all()
+        db.expunge_all()
+
+    min_skills = int(os.getenv("CV_PRESCORE_MIN_SKILLS", "3"))
+    decisions = {kind: Counter() for kind in ("match", "mismatch", "partial", "mismatch-bare")}
+    timings = []
+    failed = False
+    for vacancy in vacancies:
+        # то же несовпадение, но вакансия без образования и языков: веса только на навыки и опыт
+        bare = prescore(MISMATCH, computer_skills=vacancy.computerSkills, special_software=vacancy.specialSoftware, exp=vacancy.exp)
+        decisions["mismatch-bare"][bare.decision(args.threshold) or "llm"] += 1
+        if len(parse_skills(vacancy.computerSkills, vacancy.specialSoftware)) >= min_skills and bare.decision(args.threshold) != "rejected":
+            print(f"  vacancy {vacancy.id}: mismatch-bare score {bare.score}, confidence {bare.confidence} — not rejected")
+            failed = True
+        for kind, resume in _resumes(vacancy).items():
+            started = time.perf_counter()
+            result = prescore(
+                resume,
+                computer_skills=vacancy.computerSkills,
+                special_software=vacancy.specialSoftware,
+                foreign_languages=vacancy.foreignLanguages,
+                exp=vacancy.exp,
+                degree=vacancy.degree,
+            )
+            timings.append(time.perf_counter() - started)
+            decisions[kind][result.decision(args.threshold) or "llm"] += 1
+
+    print(f"prescore(): {len(timings)} calls, median {statistics.median(timings) * 1e6:.0f} us, max {max(timings) * 1e6:.0f} us")
+    for kind, counts in decisions.items():
+        print(f"  {kind:<13} " + ", ".join(f"{decision} {n}" for decision, n in sorted(counts.items())))
+
+    # сквозной прогон: сколько раз реально вызвана модель
+    llm_calls = []
+
+    def fake_evaluate_cv(**kwargs):
+        llm_calls.append(kwargs["resume_text"])
+        return {"criteria": [{"name": "hard skills", "score": 60, "strengths": [], "weaknesses": []}], "raw_model_output": "{}", "parse_error": False}
+
+    cv_estimator.evaluate_cv = fake_evaluate_cv
+    current = {}
+    applicant_utils._extract_text_from_file = lambda path: current["text"]
+
+    with SessionLocal() as db:
+        applicant_id, resume_id = db.execute(text(
+            "SELECT applicant_id, id FROM applicant_resume_versions WHERE is_current LIMIT 1"
+        )).one()
+        vacancy = db.execute(
+            select(Vacancy).where(
+                Vacancy.status == "active",
+                Vacancy.exp > 0,
+                text("NOT EXISTS (SELECT 1 FROM job_applications ja WHERE ja.vacancy_id = vacancies.id AND ja.applicant_id = :a)"),
+            ).order_by(Vacancy.id).limit(1),
+            {"a": applicant_id},
+        ).scalar_one()
+        db.expunge_all()
+
+    print(f"end-to-end on vacancy {vacancy.id}:")
+    for kind, resume in _resumes(vacancy).items():
+        with SessionLocal() as db:
+            application_id = insert_application(db, applicant_id, vacancy.id, resume_id)
+            db.commit()
+        current["text"] = resume
+        llm_calls.clear()
+        asyncio.run(applicant_utils.evaluate_resume_throttled(application_id, vacancy.id, resume_id))
+        with SessionLocal() as db:
+            status, model = db.execute(text(
+                "SELECT ja.status, e.model FROM job_applications ja"
+                " JOIN job_application_cv_evaluations e ON e.job_application_id = ja.id WHERE ja.id = :i LIMIT 1"
+            ), {"i": application_id}).one()
+            db.execute(text("DELETE FROM outbox WHERE payload->>'jobApplicationId' = :i"), {"i": str(application_id)})
+            for table in ("job_application_cv_evaluations", "job_application_events", "meetings"):
+                column = "job_application_id" if table == "job_application_cv_evaluations" else "application_id"
+                db.execute(text(f"DELETE FROM {table} WHERE {column} = :i"), {"i": application_id})
+            db.execute(text("DELETE FROM job_applications WHERE id = :i"), {"i": application_id})
+            db.commit()
+        print(f"  {kind:<9} status {status:<10} model {model:<16} llm calls {len(llm_calls)}")
+        expected_calls = 1 if kind == "partial" else 0
+        if len(llm_calls) != expected_calls:
+            failed = True
+
+    print("FAIL: unexpected prescore decisions or LLM calls" if failed else "OK")
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
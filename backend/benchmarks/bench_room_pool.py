@@ -0,0 +1,93 @@
+"""
+Выдача комнаты VideoSDK отклику: старый путь (новый httpx.Client на вызов)
+против пула заранее созданных комнат на общем AsyncClient.
+
+Поднимает локальную заглушку VideoSDK (benchmarks.videosdk_stub) с задержкой
+--latency и выдаёт --rooms комнат с интервалом --interval (поток откликов).
+Проверяет, что все комнаты уникальны и созданы заглушкой, а пул ходит в неё
+через переиспользуемые соединения.
+
+Запуск из каталога backend:
+    python -m benchmarks.bench_room_pool --rooms 50 --latency 0.2 --interval 0.05
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import threading
+import time
+
+import httpx
+
+from .videosdk_stub import StubServer
+
+
+def old_create_room(base_url: str) -> str:
+    """Поведение до пула: отдельный клиент (и соединение) на каждую комнату."""
+    with httpx.Client(timeout=30) as client:
+        resp = client.post(f"{base_url}/rooms", headers={"Authorization": "stub"}, json={})
+        resp.raise_for_status()
+        return resp.json()["roomId"]
+
+
+def measure(fn, rooms: int, interval: float) -> tuple[list[str], list[float]]:
+    ids, latencies = [], []
+    for _ in range(rooms):
+        started = time.perf_counter()
+        ids.append(fn())
+        latencies.append((time.perf_counter() - started) * 1000)
+        time.sleep(interval)
+    return ids, latencies
+
+
+def summary(name: str, latencies: list[float]) -> str:
+    ordered = sorted(latencies)
+    p95 = ordered[max(0, int(len(ordered) * 0.95) - 1)]
+    return f"{name:>6}: mean {statistics.fmean(latencies):7.1f} ms, p50 {statistics.median(latencies):7.1f} ms, p95 {p95:7.1f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rooms", type=int, default=50)
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--interval", type=float, default=0.05)
+    parser.add_argument("--port", type=int, default=18080)
+    args = parser.parse_args()
+
+    with StubServer(args.port, args.latency) as stub:
+        os.environ.update({
+            "VIDEOSDK_BASE_URL": stub.base_url,
+            "VIDEOSDK_AUTH_TOKEN": "stub",
+            "ROOM_POOL_SIZE": str(args.pool_size),
+        })
+        from src.api.interview import videosdk
+
+        old_ids, old_latencies = measure(lambda: old_create_room(stub.base_url), args.rooms, args.interval)
+        old_connections = len(stub.app.state.connections)
+
+        # event loop приложения в отдельном потоке, выдача — из «threadpool» (основной поток)
+        loop = asyncio.new_event_loop()
+        threading.Thread(target=loop.run_forever, daemon=True).start()
+        asyncio.run_coroutine_threadsafe(videosdk.start_room_pool(), loop).result()
+        pool = videosdk.get_room_pool()
+        while len(pool) < args.pool_size:
+            time.sleep(0.01)
+        stub.app.state.connections.clear()
+
+        pool_ids, pool_latencies = measure(videosdk.acquire_room_id, args.rooms, args.interval)
+        pool_connections = len(stub.app.state.connections)
+        asyncio.run_coroutine_threadsafe(videosdk.stop_room_pool(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+
+        issued = set(stub.app.state.rooms)
+        assert len(set(pool_ids)) == len(pool_ids), "пул выдал одну комнату дважды"
+        assert issued.issuperset(old_ids + pool_ids), "комнаты не из заглушки"
+
+    print(summary("old", old_latencies) + f", connections {old_connections}")
+    print(summary("pool", pool_latencies) + f", connections {pool_connections}")
+    print(f"speedup (mean): {statistics.fmean(old_latencies) / statistics.fmean(pool_latencies):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Семантический поиск (src/api/matching/service.py) на засеянной БД.
+
+Кодирует все активные вакансии и текущие резюме (sync_embeddings), затем повторяет
+синхронизацию — второй проход не должен кодировать ничего (кэш по версии резюме и
+ревизии текста вакансии). После этого для --queries вакансий ищет похожих кандидатов
+и меряет задержку поиска: вектор запроса из кэша + перебор индекса.
+
+Без --model-dir вместо ONNX-модели используется детерминированный хэширующий
+кодировщик (мешок слов в --dim измерениях): задержки индекса и кэша от модели не зависят.
+Векторы пишутся под отдельным именем модели и удаляются в конце.
+
+Запуск из каталога backend (нужны DB_* и засеянная БД, см. benchmarks.seed):
+    python -m benchmarks.bench_semantic_search --queries 200
+Код выхода 1 — повторная синхронизация что-то перекодировала.
+"""
+import argparse
+import hashlib
+import statistics
+import time
+
+import numpy as np
+
+BENCH_MODEL = "bench-hashing"
+
+
+class HashingEncoder:
+    name = BENCH_MODEL
+
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    def encode(self, texts):
+        result = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, body in enumerate(texts):
+            for word in body.lower().split():
+                result[row, int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dim] += 1.0
+        norms = np.linalg.norm(result, axis=1, keepdims=True)
+        return result / np.clip(norms, 1e-12, None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--model-dir", help="каталог ONNX-модели вместо хэширующего кодировщика")
+    args = parser.parse_args()
+
+    from sqlalchemy import text
+    from src.api.matching import service as matching
+    from src.core.database import SessionLocal, engine
+
+    if args.model_dir:
+        from src.ml.embeddings import SentenceEncoder
+        encoder = SentenceEncoder(args.model_dir, BENCH_MODEL)
+    else:
+        encoder = HashingEncoder(args.dim)
+
+    def cleanup():
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM embeddings WHERE model = :m"), {"m": BENCH_MODEL})
+
+    cleanup()
+    failed = False
+    try:
+        for kind in (matching.VACANCY, matching.RESUME):
+            started, total = time.perf_counter(), 0
+            while processed := matching.sync_embeddings(kind, 256, encoder):
+                total += processed
+            print(f"{kind:<8} encoded {total:>6} in {time.perf_counter() - started:.2f}s")
+            again = matching.sync_embeddings(kind, 256, encoder)
+            print(f"{kind:<8} second sync: {again} re-encoded")
+            failed |= again != 0
+
+        with SessionLocal() as db:
+            vacancy_ids = db.execute(text(
+                "SELECT id FROM vacancies WHERE status = 'active' ORDER BY id LIMIT :n"
+            ), {"n": args.queries}).scalars().all()
+            latencies, hits = [], 0
+            for vacancy_id in vacancy_ids:
+                started = time.perf_counter()
+                vector = matching.query_vector(db, matching.VACANCY, vacancy_id, encoder)
+                hits += len(matching.search_similar(db, matching.RESUME, vector, args.limit, encoder))
+                latencies.append(time.perf_counter() - started)
+            backend = "pgvector" if matching._use_pgvector(db) else "numpy"
+
+        latencies.sort()
+        index = matching._indexes[matching.RESUME]
+        size = 0 if index.matrix is None else index.matrix.shape[0]
+        print(f"{len(latencies)} searches over {size} resumes ({backend}), {hits} hits")
+        print(f"latency: p50 {statistics.median(latencies) * 1000:.2f} ms, "
+              f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.2f} ms, "
+              f"first {max(latencies) * 1000:.1f} ms (index load)")
+    finally:
+        cleanup()
+
+    print("FAIL: cached vectors were re-encoded" if failed else "OK")
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Бюджет на старт воркера: `python -X importtime -c "import src.main"` в чистом процессе.
+
+Проверяет, что:
+  - суммарное время импорта src.main укладывается в --budget-ms;
+  - при импорте не подтягиваются тяжёлые модули (LangChain, Groq, PDF/DOCX, NumPy/ONNX);
+  - импорт не ходит в БД (DB_HOST указывает на несуществующий хост).
+
+Запуск из каталога backend:
+    python -m benchmarks.bench_startup --budget-ms 2000 --repeat 3
+Код выхода 1 — бюджет превышен или найден запрещённый модуль.
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+FORBIDDEN_MODULES = ("langchain", "langchain_core", "langchain_groq", "groq", "PyPDF2", "docx", "numpy", "onnxruntime")
+
+_LINE_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+_ENV = {
+    "DB_HOST": "db.invalid",
+    "DB_PORT": "5432",
+    "DB_NAME": "startup",
+    "DB_USER": "startup",
+    "DB_PASS": "startup",
+    "ORIGINS": "http://localhost:3000",
+}
+
+
+def import_profile() -> list[tuple[str, int, int]]:
+    """(модуль, self_us, cumulative_us) для каждого импорта в src.main."""
+    env = {**os.environ, **_ENV}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import src.main"],
+        env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f"import src.main завершился с ошибкой:\n{proc.stderr[-2000:]}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            self_us, cumulative_us, _, module = match.groups()
+            rows.append((module, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=2000.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    totals = []
+    rows = []
+    for _ in range(args.repeat):
+        rows = import_profile()
+        totals.append(next(cum for module, _, cum in rows if module == "src.main") / 1000)
+    total_ms = statistics.median(totals)
+
+    print(f"import src.main: {total_ms:.0f} ms (median of {args.repeat}), budget {args.budget_ms:.0f} ms")
+    print(f"{'self ms':>9} {'cum ms':>9}  module")
+    for module, self_us, cumulative_us in sorted(rows, key=lambda r: r[1], reverse=True)[:args.top]:
+        print(f"{self_us / 1000:9.1f} {cumulative_us / 1000:9.1f}  {module}")
+
+    imported = {module for module, _, _ in rows}
+    forbidden = sorted(
+        m for m in imported if m.split(".")[0] in FORBIDDEN_MODULES
+    )
+    failed = False
+    if forbidden:
+        roots = sorted({m.split(".")[0] for m in forbidden})
+        print(f"FAIL: при старте импортируются тяжёлые модули: {', '.join(roots)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"FAIL: импорт дольше бюджета ({total_ms:.0f} > {args.budget_ms:.0f} ms)")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
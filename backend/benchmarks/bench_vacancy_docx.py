@@ -0,0 +1,124 @@
+"""
+Бенчмарк разбора DOCX вакансии: потоковый парсер из hr/utils против python-docx.
+
+Запуск из каталога backend:
+    python -m benchmarks.bench_vacancy_docx --paragraphs 20000 --rows 40 --repeat 5
+"""
+import argparse
+import io
+import statistics
+import time
+import tracemalloc
+
+from docx import Document
+
+from src.api.hr.utils import _clean_text, _read_docx_fields
+
+
+FIELDS = {
+    "Название": "Python backend разработчик",
+    "Регион": "Москва",
+    "Город": "Москва",
+    "Тип трудового": "Постоянно",
+    "Тип занятости": "Полная занятость",
+    "Текст график работы": "5/2, 09:00 - 18:00",
+    "Оклад мин. (руб/мес)": "120 000",
+    "Оклад макс. (руб/мес)": "250 000",
+    "Годовая премия (%)": "15,5",
+    "Требуемый опыт работы": "от 3 лет",
+    "Уровень образования": "Высшее",
+    "Наличие командировок": "Нет",
+}
+
+
+def parse_with_python_docx(fileobj) -> dict:
+    """Прежняя реализация parse_vacancy_docx на python-docx (эталон)."""
+    doc = Document(fileobj)
+    data: dict[str, str] = {}
+
+    for table in doc.tables:
+        for row in table.rows:
+            if len(row.cells) < 2:
+                continue
+            key = _clean_text(row.cells[0].text)
+            val = _clean_text(row.cells[1].text)
+            if key:
+                data[key] = val
+        if data:
+            break
+
+    if not data:
+        paras = [_clean_text(p.text) for p in doc.paragraphs if _clean_text(p.text)]
+        for i in range(0, len(paras) - 1, 2):
+            key = paras[i]
+            val = paras[i + 1]
+            if key and val:
+                data[key] = val
+    return data
+
+
+def build_document(paragraphs: int, rows: int, trailing_tables: int) -> bytes:
+    """Большой документ: шапка из абзацев, таблица полей, затем «хвост» из таблиц и текста."""
+    doc = Document()
+    for i in range(paragraphs):
+        doc.add_paragraph(f"Вводный абзац {i}: описание компании, условий и процесса отбора.")
+
+    table = doc.add_table(rows=0, cols=2)
+    items = list(FIELDS.items())
+    for i in range(rows):
+        key, val = items[i] if i < len(items) else (f"Доп. поле {i}", "значение " * 20)
+        cells = table.add_row().cells
+        cells[0].text = key
+        cells[1].text = val
+
+    for t in range(trailing_tables):
+        tail = doc.add_table(rows=50, cols=4)
+        for row in tail.rows:
+            for cell in row.cells:
+                cell.text = f"хвост {t}"
+        doc.add_paragraph("Примечание к таблице " * 10)
+
+    buf = io.BytesIO()
+    doc.save(buf)
+    return buf.getvalue()
+
+
+def _measure(fn, payload: bytes, repeat: int) -> tuple[float, float, dict]:
+    timings = []
+    result = {}
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(io.BytesIO(payload))
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    fn(io.BytesIO(payload))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(timings), peak / (1024 * 1024), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paragraphs", type=int, default=20000)
+    parser.add_argument("--rows", type=int, default=40)
+    parser.add_argument("--trailing-tables", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    payload = build_document(args.paragraphs, args.rows, args.trailing_tables)
+    print(f"document: {len(payload) / 1024:.0f} KiB, paragraphs={args.paragraphs}, rows={args.rows}")
+
+    legacy_t, legacy_mem, legacy = _measure(parse_with_python_docx, payload, args.repeat)
+    stream_t, stream_mem, streamed = _measure(_read_docx_fields, payload, args.repeat)
+
+    if legacy != streamed:
+        raise SystemExit("Результаты парсеров расходятся")
+
+    print(f"python-docx: {legacy_t * 1000:8.1f} ms, peak {legacy_mem:6.1f} MiB")
+    print(f"streaming:   {stream_t * 1000:8.1f} ms, peak {stream_mem:6.1f} MiB")
+    print(f"speedup:     {legacy_t / stream_t:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+Нагрузочный тест основных эндпоинтов.
+
+Сценарии (каждый — N запросов при фиксированной конкурентности):
+    vacancy_list        GET  /applicant/vacancies?offset=..&limit=20
+    hr_vacancy_detail   GET  /hr/vacancies/{id}
+    applicant_apps      GET  /applicant/job_applications
+    apply               POST /applicant/job_applications/{id} (fresh-соискатели из seed)
+
+Результат — JSON с p50/p95/p99, средним временем и пропускной способностью по
+каждому сценарию. С --baseline сравнивает с прошлым прогоном и завершается с
+кодом 1, если p95 какого-то сценария вырос больше чем на --max-regression.
+
+Запуск из каталога backend (данные из benchmarks.seed, сервер benchmarks.server):
+    python -m benchmarks.load_test --base-url http://127.0.0.1:8000 --concurrency 32 \
+        --requests 2000 --output bench-results.json [--baseline previous.json]
+"""
+import argparse
+import asyncio
+import json
+import math
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+from .accounts import BENCH_DOMAIN, BENCH_PASSWORD
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Перцентиль методом ближайшего ранга."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(q / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+async def login(client: httpx.AsyncClient, email: str) -> str:
+    resp = await client.post("/auth/login", json={"email": email, "password": BENCH_PASSWORD})
+    resp.raise_for_status()
+    return resp.json()["access_token"]
+
+
+async def run_scenario(client: httpx.AsyncClient, make_request, total: int, concurrency: int) -> dict:
+    """Запускает total запросов, не больше concurrency одновременно."""
+    latencies: list[float] = []
+    statuses: dict[str, int] = {}
+    counter = iter(range(total))
+
+    async def worker():
+        for i in counter:
+            method, url, headers = make_request(i)
+            started = time.perf_counter()
+            try:
+                resp = await client.request(method, url, headers=headers)
+                code = str(resp.status_code)
+            except httpx.HTTPError as e:
+                code = type(e).__name__
+            latencies.append(time.perf_counter() - started)
+            statuses[code] = statuses.get(code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    ok = sum(n for code, n in statuses.items() if code.startswith("2"))
+    ms = [x * 1000 for x in latencies]
+    return {
+        "requests": len(latencies),
+        "ok": ok,
+        "errors": len(latencies) - ok,
+        "statuses": statuses,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(ok / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(statistics.fmean(ms), 2) if ms else 0.0,
+        "p50_ms": round(percentile(ms, 50), 2),
+        "p95_ms": round(percentile(ms, 95), 2),
+        "p99_ms": round(percentile(ms, 99), 2),
+    }
+
+
+async def run(args) -> dict:
+    rng = random.Random(args.seed)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        hr_tokens = await asyncio.gather(*(login(client, f"hr{i}@{BENCH_DOMAIN}") for i in range(args.users)))
+        applicant_tokens = await asyncio.gather(
+            *(login(client, f"applicant{i}@{BENCH_DOMAIN}") for i in range(args.users))
+        )
+
+        vacancies = (await client.get(
+            "/applicant/vacancies", params={"limit": 200},
+            headers={"Authorization": f"Bearer {applicant_tokens[0]}"},
+        )).json()
+        vacancy_ids = [v["vacancyId"] for v in vacancies]
+        active_ids = [v["vacancyId"] for v in vacancies if v["status"] == "active"]
+        if not vacancy_ids:
+            raise SystemExit("Нет вакансий — сначала запустите python -m benchmarks.seed")
+
+        def auth(token: str) -> dict:
+            return {"Authorization": f"Bearer {token}"}
+
+        scenarios = {
+            "vacancy_list": lambda i: (
+                "GET", f"/applicant/vacancies?offset={rng.randrange(0, 200, 20)}&limit=20",
+                auth(applicant_tokens[i % len(applicant_tokens)]),
+            ),
+            "hr_vacancy_detail": lambda i: (
+                "GET", f"/hr/vacancies/{rng.choice(vacancy_ids)}", auth(hr_tokens[i % len(hr_tokens)]),
+            ),
+            "applicant_apps": lambda i: (
+                "GET", "/applicant/job_applications", auth(applicant_tokens[i % len(applicant_tokens)]),
+            ),
+        }
+
+        results = {}
+        for name, make_request in scenarios.items():
+            if args.scenarios and name not in args.scenarios:
+                continue
+            await run_scenario(client, make_request, min(args.warmup, args.requests), args.concurrency)
+            results[name] = await run_scenario(client, make_request, args.requests, args.concurrency)
+            print(f"{name:>18}: {json.dumps(results[name], ensure_ascii=False)}")
+
+        if (not args.scenarios or "apply" in args.scenarios) and active_ids and args.apply_requests:
+            # каждая пара (fresh-соискатель, вакансия) используется один раз
+            fresh_tokens = await asyncio.gather(
+                *(login(client, f"fresh{i}@{BENCH_DOMAIN}") for i in range(args.fresh_users))
+            )
+            pairs = [(t, v) for v in active_ids for t in fresh_tokens][:args.apply_requests]
+            rng.shuffle(pairs)
+            results["apply"] = await run_scenario(
+                client,
+                lambda i: ("POST", f"/applicant/job_applications/{pairs[i][1]}", auth(pairs[i][0])),
+                len(pairs),
+                args.concurrency,
+            )
+            print(f"{'apply':>18}: {json.dumps(results['apply'], ensure_ascii=False)}")
+
+    return results
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: dict, baseline: dict, max_regression: float) -> list[str]:
+    """Сценарии, у которых p95 вырос больше допустимого относительно baseline."""
+    regressions = []
+    for name, result in current["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base or not base.get("p95_ms"):
+            continue
+        ratio = result["p95_ms"] / base["p95_ms"]
+        print(f"{name:>18}: p95 {base['p95_ms']} -> {result['p95_ms']} ms ({ratio:.2f}x)")
+        if ratio > 1 + max_regression:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--apply-requests", type=int, default=500)
+    parser.add_argument("--users", type=int, default=20, help="Сколько hr/applicant аккаунтов использовать")
+    parser.add_argument("--fresh-users", type=int, default=100)
+    parser.add_argument("--scenarios", nargs="*", default=None)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="bench-results.json")
+    parser.add_argument("--baseline", default=None)
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args()
+
+    scenarios = asyncio.run(run(args))
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "base_url": args.base_url,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "seed": args.seed,
+        },
+        "scenarios": scenarios,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"saved {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.max_regression)
+        if regressions:
+            print(f"p95 regression: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
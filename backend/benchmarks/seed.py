@@ -0,0 +1,224 @@
+"""
+Генератор синтетических данных для нагрузочных тестов.
+
+Наполняет Postgres из DB_* (схема уже накатана `alembic upgrade head`) пользователями,
+HR-профилями, вакансиями, соискателями с резюме, откликами, оценками CV,
+событиями и митингами. Данные детерминированы (--seed), так что прогоны на
+разных коммитах сравнимы.
+
+Запуск из каталога backend:
+    docker compose -f benchmarks/docker-compose.bench.yml up -d
+    alembic upgrade head
+    python -m benchmarks.seed --hr 20 --vacancies 500 --applicants 5000 --applications-per-applicant 4
+
+Учётные записи: hr{i}, applicant{i}, fresh{i} в домене BENCH_DOMAIN
+(fresh — соискатели с резюме без откликов, для сценария apply), пароль BENCH_PASSWORD.
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import insert, text
+from sqlalchemy.orm import Session
+
+from src.core.database import engine
+from src.core.security import get_password_hash
+from src.models.models import (
+    ApplicantProfile,
+    ApplicantResumeVersion,
+    HRProfile,
+    JobApplication,
+    JobApplicationCVEvaluation,
+    JobApplicationEvent,
+    Meeting,
+    User,
+    Vacancy,
+)
+
+from .accounts import BENCH_DOMAIN, BENCH_PASSWORD
+
+CRITERIA = ["hard skills", "soft skills", "scalability mindset"]
+SKILLS = ["Python", "FastAPI", "PostgreSQL", "Docker", "Kafka", "Redis", "asyncio", "Kubernetes", "Git", "Linux"]
+REGIONS = ["Москва", "Санкт-Петербург", "Казань", "Новосибирск", "Екатеринбург"]
+
+TABLES = [
+    "meetings",
+    "job_application_events",
+    "job_application_cv_evaluations",
+    "interviews",
+    "job_applications",
+    "applicant_resume_versions",
+    "applicant_profiles",
+    "vacancies",
+    "hr_profiles",
+    "users",
+]
+
+
+def _insert_returning_ids(db: Session, model, rows: list[dict], batch: int) -> list[int]:
+    ids: list[int] = []
+    for start in range(0, len(rows), batch):
+        chunk = rows[start:start + batch]
+        result = db.execute(insert(model).returning(model.id, sort_by_parameter_order=True), chunk)
+        ids.extend(result.scalars().all())
+    return ids
+
+
+def _insert(db: Session, model, rows: list[dict], batch: int) -> None:
+    for start in range(0, len(rows), batch):
+        db.execute(insert(model), rows[start:start + batch])
+
+
+def _users(role: str, prefix: str, count: int, password_hash: str) -> list[dict]:
+    return [
+        {"email": f"{prefix}{i}@{BENCH_DOMAIN}", "password_hash": password_hash, "role": role}
+        for i in range(count)
+    ]
+
+
+def seed(db: Session, args, rng: random.Random) -> dict[str, int]:
+    password_hash = get_password_hash(BENCH_PASSWORD)
+    now = datetime.now()
+
+    resume_dir = Path(args.resume_dir).resolve()
+    resume_dir.mkdir(parents=True, exist_ok=True)
+    resume_path = resume_dir / "bench_resume.txt"
+    resume_path.write_text(
+        "Python backend разработчик, 4 года опыта: " + ", ".join(SKILLS) + ".", encoding="utf-8"
+    )
+
+    hr_user_ids = _insert_returning_ids(db, User, _users("hr", "hr", args.hr, password_hash), args.batch)
+    hr_ids = _insert_returning_ids(db, HRProfile, [
+        {"user_id": uid, "name": f"HR {i}", "surname": "Бенчмарков", "department": f"Отдел {i % 7}", "contacts": f"hr{i}@{BENCH_DOMAIN}"}
+        for i, uid in enumerate(hr_user_ids)
+    ], args.batch)
+
+    vacancy_rows = []
+    for i in range(args.vacancies):
+        skills = rng.sample(SKILLS, 4)
+        vacancy_rows.append({
+            "hr_id": hr_ids[i % len(hr_ids)],
+            "name": f"Backend разработчик #{i}",
+            "department": f"Отдел {i % 7}",
+            "status": "active" if rng.random() < args.active_share else rng.choice(["closed", "stopped"]),
+            "date": now - timedelta(minutes=i),
+            "region": rng.choice(REGIONS),
+            "city": rng.choice(REGIONS),
+            "address": "ул. Тестовая, 1",
+            "offerType": "TK",
+            "busyType": rng.choice(["allTime", "projectTime"]),
+            "graph": "5/2",
+            "salaryMin": 100000 + 1000 * (i % 50),
+            "salaryMax": 200000 + 1000 * (i % 50),
+            "annualBonus": 10,
+            "bonusType": "",
+            "description": "Обязанности: " + "; ".join(f"разработка на {s}" for s in skills) + ". " * 20,
+            "prompt": "Требования: " + ", ".join(skills),
+            "exp": rng.randint(0, 5),
+            "degree": rng.random() < 0.5,
+            "specialSoftware": ", ".join(skills[:2]),
+            "computerSkills": ", ".join(skills[2:]),
+            "foreignLanguages": "Английский",
+            "languageLevel": "B1",
+            "businessTrips": False,
+        })
+    vacancy_ids = _insert_returning_ids(db, Vacancy, vacancy_rows, args.batch)
+    active_vacancy_ids = [vid for vid, row in zip(vacancy_ids, vacancy_rows) if row["status"] == "active"]
+
+    applicant_user_ids = _insert_returning_ids(
+        db, User,
+        _users("applicant", "applicant", args.applicants, password_hash)
+        + _users("applicant", "fresh", args.fresh_applicants, password_hash),
+        args.batch,
+    )
+    applicant_ids = _insert_returning_ids(db, ApplicantProfile, [
+        {"user_id": uid, "name": f"Соискатель {i}", "surname": "Тестов", "contacts": "+7 900 000-00-00", "cv": str(resume_path)}
+        for i, uid in enumerate(applicant_user_ids)
+    ], args.batch)
+    resume_ids = _insert_returning_ids(db, ApplicantResumeVersion, [
+        {"applicant_id": aid, "storage_path": str(resume_path), "text_hash": "bench", "is_current": True}
+        for aid in applicant_ids
+    ], args.batch)
+
+    application_rows = []
+    for applicant_id, resume_id in zip(applicant_ids[:args.applicants], resume_ids[:args.applicants]):
+        picks = rng.sample(vacancy_ids, min(args.applications_per_applicant, len(vacancy_ids)))
+        for vacancy_id in picks:
+            application_rows.append({
+                "vacancy_id": vacancy_id,
+                "applicant_id": applicant_id,
+                "resume_version_id": resume_id,
+                "status": rng.choice(["cvReview", "interview", "waitResult", "rejected", "approved"]),
+                "contacts": "",
+            })
+    application_ids = _insert_returning_ids(db, JobApplication, application_rows, args.batch)
+
+    evaluation_rows, event_rows, meeting_rows = [], [], []
+    for app_id, row in zip(application_ids, application_rows):
+        for name in CRITERIA:
+            evaluation_rows.append({
+                "job_application_id": app_id,
+                "resume_version_id": row["resume_version_id"],
+                "model": "bench",
+                "name": name,
+                "score": rng.randint(0, 100),
+                "strengths": ["Python", "FastAPI"],
+                "weaknesses": ["нет данных"],
+            })
+        event_rows.append({"application_id": app_id, "reqType": "wait", "status": "cvReview"})
+        if row["status"] != "cvReview":
+            event_rows.append({"application_id": app_id, "reqType": "next", "status": row["status"]})
+        if row["status"] in ("interview", "waitResult", "approved"):
+            meeting_rows.append({
+                "application_id": app_id,
+                "vacancy_id": row["vacancy_id"],
+                "status": "waitMeeting",
+                "hrContact": "",
+                "meetLink": f"https://playground.videosdk.live/?meetingId=bench-{app_id}",
+                "roomId": f"bench-{app_id}",
+                "calendarLink": "",
+            })
+    _insert(db, JobApplicationCVEvaluation, evaluation_rows, args.batch)
+    _insert(db, JobApplicationEvent, event_rows, args.batch)
+    _insert(db, Meeting, meeting_rows, args.batch)
+
+    return {
+        "users": len(hr_user_ids) + len(applicant_user_ids),
+        "hr_profiles": len(hr_ids),
+        "vacancies": len(vacancy_ids),
+        "active_vacancies": len(active_vacancy_ids),
+        "applicant_profiles": len(applicant_ids),
+        "job_applications": len(application_ids),
+        "cv_evaluations": len(evaluation_rows),
+        "events": len(event_rows),
+        "meetings": len(meeting_rows),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hr", type=int, default=20)
+    parser.add_argument("--vacancies", type=int, default=500)
+    parser.add_argument("--active-share", type=float, default=0.8)
+    parser.add_argument("--applicants", type=int, default=5000)
+    parser.add_argument("--fresh-applicants", type=int, default=500)
+    parser.add_argument("--applications-per-applicant", type=int, default=4)
+    parser.add_argument("--resume-dir", default="uploads")
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--truncate", action="store_true", help="Очистить таблицы перед наполнением")
+    args = parser.parse_args()
+
+    with Session(engine) as db:
+        if args.truncate:
+            db.execute(text(f"TRUNCATE {', '.join(TABLES)} RESTART IDENTITY CASCADE"))
+        counts = seed(db, args, random.Random(args.seed))
+        db.commit()
+
+    for name, count in counts.items():
+        print(f"{name:>20}: {count}")
+
+
+if __name__ == "__main__":
+    main()
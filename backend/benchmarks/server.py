@@ -0,0 +1,74 @@
+"""
+Backend для нагрузочных тестов: обычное приложение src.main:app, но вызовы
+внешних сервисов заменены детерминированными заглушками — evaluate_cv (Groq)
+отвечает фиксированной оценкой через BENCH_LLM_LATENCY секунд, а комната
+VideoSDK создаётся локально без HTTP.
+
+Запуск из каталога backend:
+    python -m benchmarks.server --port 8000 --workers 1
+"""
+import argparse
+import os
+import time
+import uuid
+
+import uvicorn
+
+BENCH_LLM_LATENCY = float(os.getenv("BENCH_LLM_LATENCY", "0.5"))
+
+
+def fake_evaluate_cv(job_description: str, resume_text: str, criteria: list[str], **kwargs) -> dict:
+    time.sleep(BENCH_LLM_LATENCY)
+    score = 40 + (len(resume_text) + len(job_description)) % 50
+    return {
+        "criteria": [
+            {"name": name, "score": score, "strengths": ["Python"], "weaknesses": ["нет данных"]}
+            for name in criteria
+        ],
+        "raw_model_output": "{}",
+        "parse_error": False,
+    }
+
+
+def fake_create_videosdk_room() -> tuple[str, str]:
+    room_id = f"bench-{uuid.uuid4().hex[:12]}"
+    return room_id, f"https://playground.videosdk.live/?meetingId={room_id}"
+
+
+def install_stubs() -> None:
+    os.environ.setdefault("VIDEOSDK_API_KEY", "bench-key")
+    os.environ.setdefault("VIDEOSDK_API_SECRET", "bench-secret")
+
+    from src.api.interview import service as interview_service
+    from src.ml import cv_estimator
+
+    cv_estimator.evaluate_cv = fake_evaluate_cv
+    interview_service.create_videosdk_room = fake_create_videosdk_room
+
+
+def create_app():
+    install_stubs()
+    from src.main import app
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    uvicorn.run(
+        "benchmarks.server:create_app",
+        factory=True,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        log_level="warning",
+    )
+
+
+if __name__ == "__main__":
+    main()
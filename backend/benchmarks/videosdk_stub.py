@@ -0,0 +1,69 @@
+"""
+Локальная заглушка VideoSDK REST API: POST /v2/rooms с задержкой STUB_LATENCY.
+
+Запоминает выданные roomId и клиентские соединения (host:port), чтобы бенчмарки
+могли проверить переиспользование keep-alive соединений.
+
+Запуск из каталога backend:
+    python -m benchmarks.videosdk_stub --port 18080 --latency 0.2
+    VIDEOSDK_BASE_URL=http://127.0.0.1:18080/v2 VIDEOSDK_AUTH_TOKEN=stub python -m benchmarks.server
+"""
+import argparse
+import asyncio
+import threading
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Header, HTTPException, Request
+
+
+def create_stub_app(latency: float = 0.2) -> FastAPI:
+    app = FastAPI()
+    app.state.rooms = []
+    app.state.connections = set()
+
+    @app.post("/v2/rooms")
+    async def create_room(request: Request, authorization: str | None = Header(default=None)):
+        if not authorization:
+            raise HTTPException(status_code=401, detail="missing token")
+        app.state.connections.add(request.client)
+        await asyncio.sleep(latency)
+        room_id = f"stub-{uuid.uuid4().hex[:12]}"
+        app.state.rooms.append(room_id)
+        return {"roomId": room_id, "disabled": False}
+
+    return app
+
+
+class StubServer:
+    """uvicorn с заглушкой в фоновом потоке (для бенчмарков в одном процессе)."""
+
+    def __init__(self, port: int, latency: float):
+        self.app = create_stub_app(latency)
+        config = uvicorn.Config(self.app, host="127.0.0.1", port=port, log_level="warning")
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+        self.base_url = f"http://127.0.0.1:{port}/v2"
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+    uvicorn.run(create_stub_app(args.latency), host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,5 @@
 from pathlib import Path
 
-import PyPDF2
-from docx import Document
 from fastapi import HTTPException, status
 from ...models.models import Vacancy
 
@@ -39,6 +37,8 @@ def _extract_text_from_file(file_path: str) -> str:
     ext = Path(file_path).suffix.lower()
     try:
         if ext == ".pdf":
+            import PyPDF2
+
             with open(file_path, "rb") as file:
                 reader = PyPDF2.PdfReader(file)
                 text = ""
@@ -46,6 +46,8 @@ def _extract_text_from_file(file_path: str) -> str:
                     text += page.extract_text() or ""
                 return text.strip()
         elif ext == ".docx" or ext == '.doc':
+            from docx import Document
+
             doc = Document(file_path)
             return " ".join([para.text for para in doc.paragraphs]).strip()
         elif ext == ".txt":
@@ -0,0 +1,113 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import and_, desc, func, insert, literal, select, true
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, aliased
+
+from ...models.models import (
+    ApplicantProfile,
+    ApplicantResumeVersion,
+    HRProfile,
+    JobApplication,
+    JobApplicationEvent,
+    Meeting,
+    Vacancy,
+)
+
+
+@dataclass
+class ApplicationContext:
+    """Цепочка профиль -> отклик -> вакансия -> HR -> последний митинг для (user, vacancy)."""
+    applicant_id: Optional[int]
+    vacancy: Optional[Vacancy]
+    hr: Optional[HRProfile]
+    application: Optional[JobApplication]
+    meeting: Optional[Meeting]
+    resume_id: Optional[int] = None
+
+
+def load_application_context(db: Session, user_id: int, vacancy_id: int, with_resume: bool = False) -> ApplicationContext:
+    """
+    Всё, что нужно отклику соискателя на вакансию, одним запросом: профиль
+    соискателя LEFT JOIN вакансия, HR, отклик, последний митинг (LATERAL ...
+    ORDER BY created_at DESC LIMIT 1) и, для отклика, актуальное резюме.
+    Отсутствующие звенья приходят как None — проверки остаются в сервисах.
+    """
+    latest_meeting = (
+        select(Meeting)
+        .where(Meeting.application_id == JobApplication.id)
+        .order_by(desc(Meeting.created_at))
+        .limit(1)
+        .lateral("latest_meeting")
+    )
+    meeting = aliased(Meeting, latest_meeting)
+    columns = [ApplicantProfile.id, Vacancy, HRProfile, JobApplication, meeting]
+
+    stmt = (
+        select(*columns)
+        .select_from(ApplicantProfile)
+        .outerjoin(Vacancy, Vacancy.id == vacancy_id)
+        .outerjoin(HRProfile, HRProfile.id == Vacancy.hr_id)
+        .outerjoin(
+            JobApplication,
+            and_(JobApplication.applicant_id == ApplicantProfile.id, JobApplication.vacancy_id == vacancy_id),
+        )
+        .outerjoin(latest_meeting, true())
+        .where(ApplicantProfile.user_id == user_id)
+        .limit(1)
+    )
+    if with_resume:
+        current_resume = (
+            select(ApplicantResumeVersion.id)
+            .where(ApplicantResumeVersion.applicant_id == ApplicantProfile.id, ApplicantResumeVersion.is_current.is_(True))
+            .limit(1)
+            .lateral("current_resume")
+        )
+        stmt = stmt.add_columns(current_resume.c.id).outerjoin(current_resume, true())
+
+    row = db.execute(stmt).first()
+    if row is None:
+        return ApplicationContext(applicant_id=None, vacancy=None, hr=None, application=None, meeting=None)
+    return ApplicationContext(
+        applicant_id=row[0],
+        vacancy=row[1],
+        hr=row[2],
+        application=row[3],
+        meeting=row[4],
+        resume_id=row[5] if with_resume else None,
+    )
+
+
+def insert_application(db: Session, applicant_id: int, vacancy_id: int, resume_id: int) -> Optional[int]:
+    """
+    Отклик и его первое событие (cvReview / wait) одним запросом:
+
+        WITH ins AS (INSERT INTO job_applications ... ON CONFLICT DO NOTHING RETURNING id),
+             ev AS (INSERT INTO job_application_events ... SELECT FROM ins)
+        SELECT id FROM ins
+
+    Возвращает id нового отклика или None, если отклик на вакансию уже есть
+    (уникальность (applicant_id, vacancy_id)) — например, параллельный двойной клик.
+    """
+    inserted = (
+        pg_insert(JobApplication)
+        .values(
+            vacancy_id=vacancy_id,
+            applicant_id=applicant_id,
+            resume_version_id=resume_id,
+            status='cvReview',
+        )
+        .on_conflict_do_nothing(index_elements=[JobApplication.applicant_id, JobApplication.vacancy_id])
+        .returning(JobApplication.id)
+        .cte("ins")
+    )
+    first_event = (
+        insert(JobApplicationEvent)
+        .from_select(
+            ["application_id", "reqType", "status", "created_at"],
+            select(inserted.c.id, literal('wait'), literal('cvReview'), func.now()),
+        )
+        .cte("ev")
+    )
+    return db.execute(select(inserted.c.id).add_cte(first_event)).scalar()
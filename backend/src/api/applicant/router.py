@@ -1,11 +1,11 @@
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
 from ...models.models import User
 from ...core.security import get_current_applicant_user
-from ...core.database import get_session
-from .schemas import InterviewLinkResponse, JobApplicationDetail, JobApplicationListItem, VacancyResponse
-from .service import apply_for_job, get_interview_link, get_job_application, get_vacancies, list_job_applications
+from ...core.database import get_read_session, get_session
+from .schemas import InterviewLinkResponse, JobApplicationDetail, JobApplicationListItem, SimilarVacancyResponse, VacancyResponse
+from .service import apply_for_job, get_interview_link, get_job_application, get_similar_vacancies, get_vacancies, list_job_applications
 
 router = APIRouter(tags=["applicant"])
 
@@ -13,22 +13,36 @@ router = APIRouter(tags=["applicant"])
 def get_vacancies_endpoint(
     offset: int = Query(0, ge=0, description="Смещение (0, 20, 40, ...)"),
     limit: int = Query(20, ge=1, le=200, description="Размер страницы (1..200)"),
-    db: Session = Depends(get_session),
+    db: Session = Depends(get_read_session),
 ):
     """Постраничный список вакансий"""
     return get_vacancies(db, offset, limit)
 
+@router.get('/vacancies/similar', response_model=list[SimilarVacancyResponse])
+def get_similar_vacancies_endpoint(
+    limit: int = Query(20, ge=1, le=100, description="Сколько вакансий вернуть (1..100)"),
+    current_user: User = Depends(get_current_applicant_user),
+    db: Session = Depends(get_read_session),
+):
+    """Похожие вакансии: активные вакансии, семантически близкие к текущему резюме"""
+    try:
+        return get_similar_vacancies(db, current_user.id, limit)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
 @router.get('/vacancies/{vacancy_id}', response_model=list[VacancyResponse], dependencies=[Depends(get_current_applicant_user)])
 def get_detail_vacancy_endpoint(
     vacancy_id: int,
-    db: Session = Depends(get_session),
+    db: Session = Depends(get_read_session),
 ):
     """Получить детальную информацию о вакансии"""
     return get_vacancies(db, vacancy_id=vacancy_id)
 
 @router.get("/job_applications", response_model=list[JobApplicationListItem])
 def list_job_applications_endpoint(
-    db: Session = Depends(get_session),
+    db: Session = Depends(get_read_session),
     current_user: User = Depends(get_current_applicant_user),
 ):
     """Получить список всех откликов для соискателя"""
@@ -39,7 +53,7 @@ def list_job_applications_endpoint(
 def get_job_application_endpoint(
     vacancy_id: int,
     current_user: User = Depends(get_current_applicant_user),
-    db: Session = Depends(get_session),
+    db: Session = Depends(get_read_session),
 ):
     """Получить детальную информацию об отклике для соискателя"""
     try:
@@ -66,12 +80,13 @@ def get_interview_link_endpoint(
 @router.post("/job_applications/{vacancy_id}", response_model=JobApplicationListItem)
 def apply_for_job_endpoint(
     vacancy_id: int,
-    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_applicant_user),
     db: Session = Depends(get_session),
 ):
     """Откликнуться на вакансию"""
     try:
-        return apply_for_job(db, current_user.id, vacancy_id, background_tasks)
+        return apply_for_job(db, current_user.id, vacancy_id)
+    except HTTPException as e:
+        raise e
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
\ No newline at end of file
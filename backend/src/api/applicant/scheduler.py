@@ -0,0 +1,422 @@
+"""
+Очередь оценок резюме с приоритетами, дедлайнами и справедливым планированием.
+
+Оценки ставятся в очередь (таблица cv_evaluation_jobs) из трёх источников:
+    HIGH   — HR вручную перезапустил оценку отклика;
+    NORMAL — новый отклик (apply_for_job, в одной транзакции с откликом);
+    LOW    — массовая переоценка откликов вакансии.
+Задача может нести дедлайн: за EVAL_DEADLINE_HORIZON секунд до него она берётся раньше
+остальных, по возрастанию дедлайна.
+
+Остальные выбираются по weighted fair queueing (self-clocked): у каждого потока —
+приоритет + вакансия (для ручных — приоритет + HR) — своё виртуальное время, и задача
+получает virtual_finish = max(V, last_finish потока) + 1 / вес приоритета, где V —
+наименьший virtual_finish в очереди. Воркер берёт задачи по возрастанию virtual_finish:
+вакансия с тысячами откликов продвигается на одну задачу за «раунд» наравне с маленькими,
+а поток с весом 4 получает вчетверо больше раундов, чем с весом 1, не забирая у массовой
+переоценки всю ёмкость.
+
+EvaluationScheduler на event loop приложения держит не больше EVAL_WORKER_CONCURRENCY
+оценок одновременно и забирает задачу, только когда освободилось место, — порядок очереди
+и решает, кто следующим займёт слот лимитера LLM. Задача захватывается арендой
+(available_at = now() + EVAL_LEASE_SECONDS, FOR UPDATE SKIP LOCKED), как в outbox, и
+удаляется по завершении; если провайдеры LLM недоступны — откладывается на retry_after
+с сохранением места в очереди.
+"""
+import asyncio
+import logging
+import os
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, Optional
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+from sqlalchemy.types import DateTime, Integer, String
+
+from .schemas import JobApplicationStatus
+from .utils import CV_EVAL_COSTS, _error_evaluation, evaluate_resume_throttled, finalize_evaluation
+from ...core.database import engine
+from ...core.metrics import CV_EVAL_DEADLINE_MISSED, CV_EVAL_QUEUE_DEPTH, CV_EVAL_QUEUE_LATENCY, CV_EVALUATIONS_REQUEUED
+
+logger = logging.getLogger(__name__)
+
+EVAL_WORKER_CONCURRENCY = int(os.getenv("EVAL_WORKER_CONCURRENCY", "4"))
+EVAL_POLL_SECONDS = float(os.getenv("EVAL_POLL_SECONDS", "1"))
+EVAL_LEASE_SECONDS = float(os.getenv("EVAL_LEASE_SECONDS", "900"))
+EVAL_DEADLINE_HORIZON = float(os.getenv("EVAL_DEADLINE_HORIZON", "60"))
+EVAL_MAX_ATTEMPTS = int(os.getenv("EVAL_MAX_ATTEMPTS", "5"))
+
+LOW, NORMAL, HIGH = 0, 1, 2
+PRIORITY_NAMES = {LOW: "low", NORMAL: "normal", HIGH: "high"}
+
+
+def _parse_weights(spec: str) -> dict[int, float]:
+    """'high=4,normal=2,low=1' -> {HIGH: 4.0, NORMAL: 2.0, LOW: 1.0}"""
+    by_name = {name: priority for priority, name in PRIORITY_NAMES.items()}
+    weights = {HIGH: 4.0, NORMAL: 2.0, LOW: 1.0}
+    for item in spec.split(","):
+        name, _, value = item.strip().partition("=")
+        if name in by_name and value:
+            weights[by_name[name]] = float(value)
+    return weights
+
+
+EVAL_PRIORITY_WEIGHTS = _parse_weights(os.getenv("EVAL_PRIORITY_WEIGHTS", "high=4,normal=2,low=1"))
+
+
+def vacancy_flow(vacancy_id: int) -> str:
+    return f"vacancy:{vacancy_id}"
+
+
+def hr_flow(user_id: int) -> str:
+    return f"hr:{user_id}"
+
+
+# V — наименьший virtual_finish в очереди; в пустой очереди — последний выданный,
+# чтобы поток, много получивший раньше, не оказался позади новых навсегда
+_ENQUEUE_SQL = text(
+    """
+    WITH v AS (
+        SELECT coalesce(
+            (SELECT min(virtual_finish) FROM cv_evaluation_jobs),
+            (SELECT max(last_finish) FROM cv_evaluation_flows),
+            0
+        ) AS now_v
+    ),
+    items AS (
+        SELECT t.application_id, t.vacancy_id, t.resume_id, t.flow,
+               row_number() OVER (PARTITION BY t.flow ORDER BY t.application_id) AS k,
+               count(*) OVER (PARTITION BY t.flow) AS n
+        FROM unnest(:application_ids, :vacancy_ids, :resume_ids, :flows) AS t(application_id, vacancy_id, resume_id, flow)
+    ),
+    flows AS (
+        INSERT INTO cv_evaluation_flows AS f (flow_key, last_finish)
+        SELECT DISTINCT items.flow, v.now_v + items.n * :cost FROM items, v
+        ON CONFLICT (flow_key) DO UPDATE
+            SET last_finish = greatest(f.last_finish, (SELECT now_v FROM v)) + (excluded.last_finish - (SELECT now_v FROM v))
+        RETURNING flow_key, last_finish
+    )
+    INSERT INTO cv_evaluation_jobs AS j
+        (job_application_id, vacancy_id, resume_version_id, priority, deadline, flow_key, virtual_finish, replace_evaluations)
+    SELECT i.application_id, i.vacancy_id, i.resume_id, :priority, :deadline, i.flow,
+           flows.last_finish - (i.n - i.k) * :cost, :replace
+    FROM items i JOIN flows ON flows.flow_key = i.flow
+    ON CONFLICT (job_application_id) DO UPDATE SET
+        priority = greatest(j.priority, excluded.priority),
+        deadline = least(j.deadline, excluded.deadline),
+        flow_key = CASE WHEN excluded.virtual_finish < j.virtual_finish THEN excluded.flow_key ELSE j.flow_key END,
+        virtual_finish = least(j.virtual_finish, excluded.virtual_finish),
+        replace_evaluations = j.replace_evaluations OR excluded.replace_evaluations,
+        revision = j.revision + 1
+    """
+).bindparams(
+    bindparam("application_ids", type_=ARRAY(Integer)),
+    bindparam("vacancy_ids", type_=ARRAY(Integer)),
+    bindparam("resume_ids", type_=ARRAY(Integer)),
+    bindparam("flows", type_=ARRAY(String)),
+    bindparam("deadline", type_=DateTime),
+)
+
+# срочные (дедлайн ближе горизонта) — первыми по дедлайну, остальные — по virtual_finish
+_CLAIM_SQL = text(
+    """
+    WITH candidates AS (
+        (SELECT id, 0 AS tier, deadline, virtual_finish FROM cv_evaluation_jobs
+         WHERE available_at <= now() AND deadline <= now() + make_interval(secs => :horizon)
+         ORDER BY deadline LIMIT :batch)
+        UNION ALL
+        (SELECT id, 1, NULL, virtual_finish FROM cv_evaluation_jobs
+         WHERE available_at <= now() AND (deadline IS NULL OR deadline > now() + make_interval(secs => :horizon))
+         ORDER BY virtual_finish, id LIMIT :batch)
+    ),
+    picked AS (
+        SELECT j.id FROM cv_evaluation_jobs j JOIN candidates c ON c.id = j.id
+        WHERE j.available_at <= now()
+        ORDER BY c.tier, c.deadline, c.virtual_finish, j.id
+        LIMIT :batch
+        FOR UPDATE OF j SKIP LOCKED
+    )
+    UPDATE cv_evaluation_jobs j SET
+        attempts = j.attempts + 1,
+        available_at = now() + make_interval(secs => :lease)
+    FROM picked WHERE j.id = picked.id
+    RETURNING j.id, j.job_application_id, j.vacancy_id, j.resume_version_id, j.priority, j.deadline,
+              j.replace_evaluations, j.requeues, j.attempts, j.revision,
+              extract(epoch FROM now() - j.enqueued_at)::float8, j.deadline < now(),
+              (SELECT ja.status FROM job_applications ja WHERE ja.id = j.job_application_id)
+    """
+)
+
+# revision меняется при повторной постановке во время обработки — тогда задачу нужно выполнить ещё раз
+_COMPLETE_SQL = text("DELETE FROM cv_evaluation_jobs WHERE id = :id AND revision = :revision")
+_RERUN_SQL = text("UPDATE cv_evaluation_jobs SET available_at = now(), attempts = 0 WHERE id = :id")
+_REQUEUE_SQL = text(
+    """
+    UPDATE cv_evaluation_jobs SET
+        available_at = now() + make_interval(secs => :delay),
+        requeues = requeues + :requeued,
+        attempts = CASE WHEN :requeued = 1 THEN 0 ELSE attempts END
+    WHERE id = :id
+    """
+)
+_DEPTH_SQL = text("SELECT priority, count(*) FROM cv_evaluation_jobs GROUP BY priority")
+_PURGE_FLOWS_SQL = text(
+    """
+    DELETE FROM cv_evaluation_flows WHERE last_finish < coalesce(
+        (SELECT min(virtual_finish) FROM cv_evaluation_jobs),
+        (SELECT max(last_finish) FROM cv_evaluation_flows)
+    )
+    """
+)
+
+
+def enqueue_evaluations(
+    db: Session,
+    applications: Iterable[tuple[int, int, int]],
+    priority: int,
+    flow: Optional[str] = None,
+    deadline: Optional[datetime] = None,
+    replace: bool = False,
+) -> int:
+    """
+    Поставить оценки в очередь в транзакции db; запишутся вместе с её commit.
+    applications — (job_application_id, vacancy_id, resume_version_id); flow None — поток
+    на вакансию. replace — переоценка: прежние оценки отклика заменяются новыми.
+    Отклик, уже стоящий в очереди, не дублируется: приоритет и дедлайн берутся строже.
+    """
+    unique = {application_id: (application_id, vacancy_id, resume_id) for application_id, vacancy_id, resume_id in applications}
+    if not unique:
+        return 0
+    rows = list(unique.values())
+    prefix = PRIORITY_NAMES[priority]
+    return db.execute(
+        _ENQUEUE_SQL,
+        {
+            "application_ids": [r[0] for r in rows],
+            "vacancy_ids": [r[1] for r in rows],
+            "resume_ids": [r[2] for r in rows],
+            "flows": [f"{prefix}:{flow or vacancy_flow(r[1])}" for r in rows],
+            "cost": 1.0 / EVAL_PRIORITY_WEIGHTS[priority],
+            "priority": priority,
+            "deadline": deadline,
+            "replace": replace,
+        },
+    ).rowcount
+
+
+def queue_backlog(db: Session) -> float:
+    """
+    Сколько секунд займут уже стоящие новые и ручные оценки. Темп оценок задаёт самый
+    строгий бакет лимитера с учётом цены оценки (как в admission_backlog): при 6000 токенов
+    в минуту и 3000 на оценку — две в минуту, хотя запросов можно 30.
+    """
+    seconds_per_evaluation = max(
+        (cost / bucket.rate for bucket, cost in CV_EVAL_COSTS.items() if bucket.per_minute > 0),
+        default=0.0,
+    )
+    if seconds_per_evaluation <= 0:
+        return 0.0
+    queued = db.execute(text("SELECT count(*) FROM cv_evaluation_jobs WHERE priority >= :p"), {"p": NORMAL}).scalar_one()
+    return queued * seconds_per_evaluation
+
+
+@dataclass
+class ClaimedJob:
+    id: int
+    application_id: int
+    vacancy_id: int
+    resume_id: int
+    priority: int
+    deadline: Optional[datetime]
+    replace: bool
+    requeues: int
+    attempts: int
+    revision: int
+    waited: float
+    late: bool
+    # статус отклика при захвате: результат оценки пишется, только если он не сменился
+    status: Optional[str]
+
+
+def claim_jobs(batch_size: int) -> list[ClaimedJob]:
+    with engine.begin() as conn:
+        rows = conn.execute(
+            _CLAIM_SQL,
+            {"batch": batch_size, "lease": EVAL_LEASE_SECONDS, "horizon": EVAL_DEADLINE_HORIZON},
+        ).all()
+    jobs = [ClaimedJob(*row) for row in rows]
+    for job in jobs:
+        # задержка очереди — только при первом захвате, без повторов после сбоев
+        if job.attempts == 1 and job.requeues == 0:
+            name = PRIORITY_NAMES[job.priority]
+            CV_EVAL_QUEUE_LATENCY.labels(name).observe(job.waited)
+            if job.late:
+                CV_EVAL_DEADLINE_MISSED.labels(name).inc()
+    return jobs
+
+
+def complete_job(job: ClaimedJob) -> None:
+    with engine.begin() as conn:
+        if conn.execute(_COMPLETE_SQL, {"id": job.id, "revision": job.revision}).rowcount == 0:
+            conn.execute(_RERUN_SQL, {"id": job.id})
+
+
+def requeue_job(job: ClaimedJob, delay: float, requeued: bool = True) -> None:
+    """Отложить задачу, сохранив её место (virtual_finish); jitter — чтобы отложенные не пришли разом."""
+    with engine.begin() as conn:
+        conn.execute(_REQUEUE_SQL, {"id": job.id, "delay": delay * random.uniform(1.0, 1.5), "requeued": int(requeued)})
+    if requeued:
+        CV_EVALUATIONS_REQUEUED.inc()
+
+
+def fail_job(job: ClaimedJob, message: str) -> None:
+    finalize_evaluation(
+        job.application_id,
+        [_error_evaluation(job.application_id, job.resume_id, "scheduler", message)],
+        JobApplicationStatus.waitResult,
+        "wait",
+        replace=job.replace,
+        expected_status=job.status,
+    )
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM cv_evaluation_jobs WHERE id = :id"), {"id": job.id})
+
+
+def _already_evaluated(application_id: int) -> bool:
+    with engine.connect() as conn:
+        return conn.execute(
+            text("SELECT EXISTS (SELECT 1 FROM job_application_cv_evaluations WHERE job_application_id = :id)"),
+            {"id": application_id},
+        ).scalar_one()
+
+
+async def run_job(job: ClaimedJob) -> None:
+    if job.attempts > EVAL_MAX_ATTEMPTS:
+        logger.warning(f"CV evaluation job {job.id} gave up after {job.attempts - 1} attempts")
+        await asyncio.to_thread(fail_job, job, f"Ошибка оценки: не завершилась за {job.attempts - 1} попыток")
+        return
+    # повторный захват после падения воркера: результат мог успеть зафиксироваться
+    if job.attempts > 1 and not job.replace and await asyncio.to_thread(_already_evaluated, job.application_id):
+        await asyncio.to_thread(complete_job, job)
+        return
+    try:
+        retry_after = await evaluate_resume_throttled(
+            job.application_id,
+            job.vacancy_id,
+            job.resume_id,
+            requeues=job.requeues,
+            replace=job.replace,
+            # ручную переоценку HR ждёт от модели, а не от пре-скорера
+            prescore=job.priority != HIGH,
+            expected_status=job.status,
+        )
+    except Exception as e:
+        logger.warning(f"CV evaluation job {job.id} failed, attempt {job.attempts}: {e}")
+        await asyncio.to_thread(requeue_job, job, min(2.0 ** job.attempts, 300.0), False)
+        return
+    if retry_after is None:
+        await asyncio.to_thread(complete_job, job)
+    else:
+        await asyncio.to_thread(requeue_job, job, retry_after)
+
+
+def run_pending(batch_size: int = EVAL_WORKER_CONCURRENCY) -> int:
+    """Синхронно выполнить одну пачку задач (скрипты, отладка). Возвращает размер пачки."""
+    jobs = claim_jobs(batch_size)
+    for job in jobs:
+        asyncio.run(run_job(job))
+    return len(jobs)
+
+
+def refresh_queue_stats() -> None:
+    with engine.begin() as conn:
+        depth = dict(conn.execute(_DEPTH_SQL).all())
+        conn.execute(_PURGE_FLOWS_SQL)
+    for priority, name in PRIORITY_NAMES.items():
+        CV_EVAL_QUEUE_DEPTH.labels(name).set(depth.get(priority, 0))
+
+
+class EvaluationScheduler:
+    def __init__(self, concurrency: int = EVAL_WORKER_CONCURRENCY, poll_interval: float = EVAL_POLL_SECONDS):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self._task: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._running: dict[asyncio.Task, ClaimedJob] = {}
+
+    async def start(self) -> None:
+        if self._task is None and self.concurrency > 0:
+            self._loop = asyncio.get_running_loop()
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._schedule_forever(), name="cv-evaluation-scheduler")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._loop = None
+        # прерванные оценки — сразу обратно в очередь, не дожидаясь конца аренды
+        interrupted = list(self._running.values())
+        for task in list(self._running):
+            task.cancel()
+        await asyncio.gather(*self._running, return_exceptions=True)
+        self._running.clear()
+        for job in interrupted:
+            try:
+                await asyncio.to_thread(requeue_job, job, 0.0, False)
+            except Exception as e:
+                logger.warning(f"Failed to release CV evaluation job {job.id}: {e}")
+
+    def wake(self) -> None:
+        """Разбудить планировщик сразу после commit с новой задачей (можно из любого потока)."""
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def _finished(self, task: asyncio.Task) -> None:
+        self._running.pop(task, None)
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def schedule_once(self) -> int:
+        free = self.concurrency - len(self._running)
+        if free <= 0:
+            return 0
+        jobs = await asyncio.to_thread(claim_jobs, free)
+        for job in jobs:
+            task = asyncio.create_task(run_job(job), name=f"cv-evaluation-{job.id}")
+            self._running[task] = job
+            task.add_done_callback(self._finished)
+        return len(jobs)
+
+    async def _schedule_forever(self) -> None:
+        stats_at = 0.0
+        while True:
+            claimed = 0
+            try:
+                claimed = await self.schedule_once()
+                if time.monotonic() - stats_at > 15:
+                    await asyncio.to_thread(refresh_queue_stats)
+                    stats_at = time.monotonic()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"CV evaluation scheduling failed: {e}")
+            # взяли сколько могли и место ещё есть — вероятно, очередь не пуста: сразу следующий захват
+            if claimed == 0 or len(self._running) >= self.concurrency:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+
+
+evaluation_scheduler = EvaluationScheduler()
@@ -87,4 +87,7 @@ class VacancyResponse(BaseModel):
     languageLevel: Optional[str] = None
     businessTrips: Optional[bool] = None
 
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class SimilarVacancyResponse(VacancyResponse):
+    similarity: float
@@ -1,21 +1,23 @@
-import os
 from typing import List, Optional
-from fastapi import BackgroundTasks, HTTPException, status
-from sqlalchemy import desc, func
+from fastapi import HTTPException, status
+from sqlalchemy import desc
 from sqlalchemy.orm import Session
 
 from ...models.models import (
     ApplicantProfile,
     ApplicantResumeVersion,
     JobApplication,
-    JobApplicationEvent,
     Vacancy,
     HRProfile,
-    Meeting,
 )
-from .schemas import JobApplicationListItem, JobApplicationDetail, HRBrief, InterviewLinkResponse, JobApplicationStatus
+from .schemas import JobApplicationListItem, JobApplicationDetail, HRBrief, InterviewLinkResponse, SimilarVacancyResponse
 from .helpers import _vacancy_to_response
-from .utils import _generate_join_token, evaluate_resume_background
+from .queries import ApplicationContext, insert_application, load_application_context
+from .scheduler import NORMAL, enqueue_evaluations, evaluation_scheduler, queue_backlog
+from ...core.llm_limiter import LLM_ADMISSION_MAX_WAIT, admission_backlog
+from ...core.metrics import LLM_ADMISSION_REJECTED
+from ..interview.videosdk import get_join_token
+from ..matching.service import RESUME, VACANCY, query_vector, require_encoder, search_similar
 
 def _hr_full_name(hr: HRProfile) -> str:
     parts = [hr.name, hr.patronymic, hr.surname]
@@ -39,6 +41,41 @@ def get_vacancies(db: Session, offset: int = 0, limit: int = 20, vacancy_id: Opt
 
     return [_vacancy_to_response(v) for v in vacancies]
 
+def get_similar_vacancies(db: Session, user_id: int, limit: int = 20) -> List[SimilarVacancyResponse]:
+    """
+    Активные вакансии, семантически близкие к текущему резюме соискателя
+    (см. matching/service.py). Вакансии, на которые он уже откликнулся, не предлагаются.
+    """
+    encoder = require_encoder()
+    row = (
+        db.query(ApplicantProfile.id, ApplicantResumeVersion.id)
+        .outerjoin(
+            ApplicantResumeVersion,
+            (ApplicantResumeVersion.applicant_id == ApplicantProfile.id) & ApplicantResumeVersion.is_current.is_(True),
+        )
+        .filter(ApplicantProfile.user_id == user_id)
+        .first()
+    )
+    if not row:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Профиль соискателя не найден")
+    applicant_id, resume_version_id = row
+    if resume_version_id is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Резюме не загружено")
+
+    vector = query_vector(db, RESUME, resume_version_id, encoder)
+    if vector is None:
+        return []
+    applied = [vid for (vid,) in db.query(JobApplication.vacancy_id).filter(JobApplication.applicant_id == applicant_id)]
+    hits = search_similar(db, VACANCY, vector, limit, encoder, exclude_owners=applied)
+    if not hits:
+        return []
+
+    vacancies = {v.id: v for v in db.query(Vacancy).filter(Vacancy.id.in_([vid for vid, _, _ in hits]))}
+    return [
+        SimilarVacancyResponse(**_vacancy_to_response(vacancies[vid]), similarity=round(similarity, 4))
+        for vid, _, similarity in hits if vid in vacancies
+    ]
+
 def list_job_applications(db: Session, user_id: int) -> List[JobApplicationListItem]:
     """
     Возвращает список заявок соискателя (по всем вакансиям) с нужными полями.
@@ -76,50 +113,53 @@ def list_job_applications(db: Session, user_id: int) -> List[JobApplicationListI
     
 
 
-def get_job_application(db: Session, user_id: int, vacancy_id: int) -> JobApplicationDetail:
-    """Получить детальную информацию об отклике соискателя на вакансию."""
-    applicant_profile = db.query(ApplicantProfile).filter_by(user_id=user_id).first()
-    if not applicant_profile:
+def _require_applicant(ctx: ApplicationContext) -> None:
+    if ctx.applicant_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Профиль соискателя не найден"
         )
 
-    # Находим отклик
-    application = (
-        db.query(JobApplication)
-        .filter_by(applicant_id=applicant_profile.id, vacancy_id=vacancy_id)
-        .first()
-    )
-    if not application:
+
+def _require_active_vacancy(ctx: ApplicationContext) -> Vacancy:
+    if ctx.vacancy is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Вакансия не найдена")
+    if ctx.vacancy.status != "active":
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Вакансия не активна")
+    return ctx.vacancy
+
+
+def _require_application(ctx: ApplicationContext) -> JobApplication:
+    if ctx.application is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Отклик на вакансию не найден"
         )
+    return ctx.application
+
 
-    # Находим вакансию
-    vacancy = db.query(Vacancy).filter_by(id=vacancy_id).first()
-    if not vacancy:
+def _require_hr(ctx: ApplicationContext) -> HRProfile:
+    if ctx.hr is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Вакансия не найдена"
+            detail="HR-профиль не найден"
         )
+    return ctx.hr
 
-    # Находим HR-профиль
-    hr = db.query(HRProfile).filter_by(id=vacancy.hr_id).first()
-    if not hr:
+
+def get_job_application(db: Session, user_id: int, vacancy_id: int) -> JobApplicationDetail:
+    """Получить детальную информацию об отклике соискателя на вакансию."""
+    ctx = load_application_context(db, user_id, vacancy_id)
+    _require_applicant(ctx)
+    application = _require_application(ctx)
+    vacancy = ctx.vacancy
+    if vacancy is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="HR-профиль не найден"
+            detail="Вакансия не найдена"
         )
-
-    # Находим последнее собрание
-    meeting = (
-        db.query(Meeting)
-        .filter_by(application_id=application.id)
-        .order_by(desc(Meeting.created_at))
-        .first()
-    )
+    hr = _require_hr(ctx)
+    meeting = ctx.meeting
 
     return JobApplicationDetail(
         applicationId=application.id,
@@ -134,38 +174,12 @@ def get_job_application(db: Session, user_id: int, vacancy_id: int) -> JobApplic
 
 
 def get_interview_link(db: Session, user_id: int, vacancy_id: int) -> InterviewLinkResponse:
-    applicant_profile = db.query(ApplicantProfile).filter_by(user_id=user_id).first()
-    if not applicant_profile:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Профиль соискателя не найден"
-        )
-
-    # Проверяем, существует ли вакансия и активна ли она
-    vacancy = db.query(Vacancy).filter_by(id=vacancy_id).first()
-    if not vacancy:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Вакансия не найдена")
-    if vacancy.status != "active":
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Вакансия не активна")
-
-    application = (
-        db.query(JobApplication)
-        .filter_by(applicant_id=applicant_profile.id, vacancy_id=vacancy_id)
-        .first()
-    )
-    if not application:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Отклик на вакансию не найден"
-        )
-
-    meeting = (
-        db.query(Meeting)
-        .filter_by(application_id=application.id)
-        .order_by(desc(Meeting.created_at))
-        .first()
-    )
+    ctx = load_application_context(db, user_id, vacancy_id)
+    _require_applicant(ctx)
+    _require_active_vacancy(ctx)
+    _require_application(ctx)
 
+    meeting = ctx.meeting
     if not meeting:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -174,12 +188,7 @@ def get_interview_link(db: Session, user_id: int, vacancy_id: int) -> InterviewL
 
     print(f"Meeting debug: roomId={meeting.roomId}, meetLink={meeting.meetLink}")
     
-    api_key = os.getenv("VIDEOSDK_API_KEY")
-    api_secret = os.getenv("VIDEOSDK_API_SECRET")
-    if not api_key or not api_secret:
-        raise RuntimeError("VIDEOSDK_API_KEY и VIDEOSDK_API_SECRET должны быть заданы")
-    
-    join_token = _generate_join_token(api_key, api_secret)
+    join_token = get_join_token()
 
     return InterviewLinkResponse(
         roomId=meeting.roomId, 
@@ -188,83 +197,62 @@ def get_interview_link(db: Session, user_id: int, vacancy_id: int) -> InterviewL
     )
 
 
-def apply_for_job(db: Session, user_id: int, vacancy_id: int, background_tasks: BackgroundTasks) -> JobApplicationListItem:
+def apply_for_job(db: Session, user_id: int, vacancy_id: int) -> JobApplicationListItem:
     """Отклик на вакансию"""
 
-    from ...ml.cv_estimator import evaluate_cv
-
-    applicant_profile = db.query(ApplicantProfile).filter_by(user_id=user_id).first()
-    if not applicant_profile:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Профиль соискателя не найден"
-        )
-    applicant_id = applicant_profile.id
-
-    # Проверяем, существует ли вакансия и активна ли она
-    vacancy = db.query(Vacancy).filter_by(id=vacancy_id).first()
-    if not vacancy:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Вакансия не найдена")
-    if vacancy.status != "active":
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Вакансия не активна")
+    ctx = load_application_context(db, user_id, vacancy_id, with_resume=True)
+    _require_applicant(ctx)
+    vacancy = _require_active_vacancy(ctx)
 
     # Проверяем, есть ли у соискателя актуальное резюме
-    resume = (
-        db.query(ApplicantResumeVersion)
-        .filter_by(applicant_id=applicant_id, is_current=True)
-        .first()
-    )
-    if not resume:
+    if ctx.resume_id is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="У соискателя нет актуального резюме"
         )
 
     # Проверяем, не откликался ли соискатель на эту вакансию ранее
-    existing_application = (
-        db.query(JobApplication)
-        .filter_by(applicant_id=applicant_id, vacancy_id=vacancy_id)
-        .first()
-    )
-    if existing_application:
+    if ctx.application is not None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Вы уже откликнулись на эту вакансию"
         )
-    
-    job_application = JobApplication(
-        vacancy_id=vacancy_id,
-        applicant_id=applicant_id,
-        resume_version_id=resume.id,
-        status=JobApplicationStatus.cvReview,
-    )
-
-    db.add(job_application)
-    db.flush()
-
-    application_event = JobApplicationEvent(
-        application_id=job_application.id,
-        reqType='wait',
-        status=JobApplicationStatus.cvReview,
-        created_at=func.now(),
-    )
-
-    db.add(application_event)
-    db.commit()
-
-    background_tasks.add_task(evaluate_resume_background, job_application.id, vacancy.id, resume.id)
+    hr = _require_hr(ctx)
+
+    # Admission control: при длинной очереди к LLM не принимаем отклик, а просим повторить позже —
+    # иначе оценка упрётся в rate limit провайдера и отклик уйдёт в waitResult с ошибкой.
+    # Очередь — это и зарезервированные слоты лимитера, и новые/ручные оценки, ждущие планировщика
+    backlog = admission_backlog(db) + queue_backlog(db)
+    if backlog > LLM_ADMISSION_MAX_WAIT:
+        LLM_ADMISSION_REJECTED.labels("cv_evaluation").inc()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Слишком много откликов, попробуйте позже",
+            headers={"Retry-After": str(int(backlog - LLM_ADMISSION_MAX_WAIT) + 1)},
+        )
 
-    hr = db.query(HRProfile).filter_by(id=vacancy.hr_id).first()
-    if not hr:
+    # Отклик и первое событие — один INSERT ... ON CONFLICT DO NOTHING: из параллельных
+    # запросов (двойной клик) вставляет только первый, и только он ставит оценку в очередь
+    application_id = insert_application(db, ctx.applicant_id, vacancy_id, ctx.resume_id)
+    if application_id is None:
+        db.rollback()
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="HR-профиль не найден"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Вы уже откликнулись на эту вакансию"
         )
-    
-    return JobApplicationListItem(
-        applicationId=job_application.id, 
+
+    # ответ собираем до commit: после него атрибуты истекают и перечитывались бы из БД
+    item = JobApplicationListItem(
+        applicationId=application_id,
         vacancyId=vacancy.id,
         name=vacancy.name or "",
         region=vacancy.region,
         busyType=vacancy.busyType,
         hr=HRBrief(name=_hr_full_name(hr), contact=hr.contacts),
-    )
\ No newline at end of file
+    )
+    # оценка ставится в очередь тем же commit: отклик без задачи оценки не сохранится
+    enqueue_evaluations(db, [(application_id, vacancy_id, ctx.resume_id)], NORMAL)
+    db.commit()
+
+    evaluation_scheduler.wake()
+    return item
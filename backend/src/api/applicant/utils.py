@@ -1,131 +1,313 @@
+from dataclasses import dataclass
 from datetime import datetime
 import os
 from statistics import mean
-import time
+from typing import Optional
 
-import jwt
-from sqlalchemy import func
+from sqlalchemy import delete, func, insert, select, update
+from starlette.concurrency import run_in_threadpool
 
 from .schemas import JobApplicationStatus
 from .helpers import _extract_text_from_file
 from ...core.database import SessionLocal
-from ...ml.cv_estimator import evaluate_cv
+from ...core.llm_limiter import REQUESTS, TOKENS, wait_for_slot
+from ...core.llm_resilience import ProvidersUnavailable, call_with_fallback, parse_providers
+from ...core.metrics import CV_PRESCORE_CONFIDENCE, CV_PRESCORE_DECISIONS
+from ...core.outbox import enqueue, outbox_dispatcher
 from ...models.models import JobApplication, JobApplicationCVEvaluation, JobApplicationEvent, Vacancy, ApplicantResumeVersion
-from ..interview.service import create_videosdk_room, persist_meeting_for_application
+from ..interview.service import INTERVIEW_ROOM_MESSAGE
 
 def format_datetime(dt: datetime) -> str:
     """Форматирует дату и время в ISO-формат."""
     return dt.isoformat() if dt else None
 
-def evaluate_resume_background(job_application_id: int, vacancy_id: int, resume_id: int):
-    """Фоновая задача для оценки резюме"""
+# Оценка одного резюме для лимитера LLM: один запрос и примерно столько токенов (вход + ответ)
+LLM_CV_EVAL_TOKENS = float(os.getenv("LLM_CV_EVAL_TOKENS", "3000"))
+CV_EVAL_COSTS = {REQUESTS: 1, TOKENS: LLM_CV_EVAL_TOKENS}
 
+# Пре-скоринг (ml/prescorer.py): при уверенности не ниже порога решение без LLM, 0 — всегда LLM
+CV_PRESCORE_CONFIDENCE_THRESHOLD = float(os.getenv("CV_PRESCORE_CONFIDENCE", "0.8"))
+CV_PRESCORE_MIN_SKILLS = int(os.getenv("CV_PRESCORE_MIN_SKILLS", "3"))
+
+# Цепочка моделей для оценки резюме (core/llm_resilience.py): основная и запасные, model[@base_url]
+CV_EVAL_PROVIDERS = parse_providers(os.getenv("CV_EVAL_MODELS", "qwen/qwen3-32b"))
+# Сколько раз оценку можно отложить при недоступности всех провайдеров, прежде чем записать ошибку
+CV_EVAL_MAX_REQUEUES = int(os.getenv("CV_EVAL_MAX_REQUEUES", "48"))
+
+@dataclass
+class EvaluationInputs:
+    description: str
+    resume_text: Optional[str]
+    # ошибка извлечения текста резюме: оценка завершится error-строкой, как при сбое модели
+    error: Optional[str]
+    exp: Optional[int]
+    degree: Optional[bool]
+    computer_skills: Optional[str]
+    special_software: Optional[str]
+    foreign_languages: Optional[str]
+
+def load_evaluation_inputs(job_application_id: int, vacancy_id: int, resume_id: int) -> Optional[EvaluationInputs]:
+    """Данные вакансии и текст резюме одним коротким чтением, без открытой транзакции на время разбора файла."""
     with SessionLocal() as db:
-        job_application = db.query(JobApplication).filter_by(id=job_application_id).first()
-        vacancy = db.query(Vacancy).filter_by(id=vacancy_id).first()
-        resume = db.query(ApplicantResumeVersion).filter_by(id=resume_id).first()
+        row = db.execute(
+            select(
+                Vacancy.description,
+                Vacancy.exp,
+                Vacancy.degree,
+                Vacancy.computerSkills,
+                Vacancy.specialSoftware,
+                Vacancy.foreignLanguages,
+                ApplicantResumeVersion.storage_path,
+            )
+            .select_from(JobApplication)
+            .join(Vacancy, Vacancy.id == vacancy_id)
+            .join(ApplicantResumeVersion, ApplicantResumeVersion.id == resume_id)
+            .where(JobApplication.id == job_application_id)
+        ).first()
 
-        if not (job_application and vacancy and resume):
-            return
-        
-        model = "qwen/qwen3-32b"
+    if row is None:
+        return None
+
+    resume_text, error = None, None
+    try:
+        resume_text = _extract_text_from_file(row.storage_path)
+    except Exception as e:
+        error = str(getattr(e, "detail", e))
+    return EvaluationInputs(
+        description=row.description or "",
+        resume_text=resume_text,
+        error=error,
+        exp=row.exp,
+        degree=row.degree,
+        computer_skills=row.computerSkills,
+        special_software=row.specialSoftware,
+        foreign_languages=row.foreignLanguages,
+    )
+
+def prescore_resume(
+    job_application_id: int,
+    resume_id: int,
+    inputs: EvaluationInputs,
+    replace: bool = False,
+    expected_status: Optional[str] = None,
+) -> bool:
+    """
+    Решить очевидный случай без LLM: записать оценку пре-скорера и статус.
+    False — случай неоднозначный (или пре-скоринг выключен), нужна модель.
+    """
+    from ...ml.prescorer import MODEL_NAME, prescore
+
+    if CV_PRESCORE_CONFIDENCE_THRESHOLD <= 0 or inputs.resume_text is None:
+        return False
 
-        try:
-            resume_text = _extract_text_from_file(resume.storage_path)
-            job_description = vacancy.description or ""
-            criteria = ["hard skills", "soft skills", "scalability mindset"]
-            evaluation = evaluate_cv(
+    result = prescore(
+        inputs.resume_text,
+        computer_skills=inputs.computer_skills,
+        special_software=inputs.special_software,
+        foreign_languages=inputs.foreign_languages,
+        exp=inputs.exp,
+        degree=inputs.degree,
+        min_skills=CV_PRESCORE_MIN_SKILLS,
+    )
+    CV_PRESCORE_CONFIDENCE.observe(result.confidence)
+    decision = result.decision(CV_PRESCORE_CONFIDENCE_THRESHOLD)
+    CV_PRESCORE_DECISIONS.labels(decision or "llm").inc()
+    if decision is None:
+        return False
+
+    rows = [{
+        "job_application_id": job_application_id,
+        "resume_version_id": resume_id,
+        "model": MODEL_NAME,
+        "name": "prescore",
+        "score": round(result.score),
+        "strengths": result.strengths,
+        "weaknesses": result.weaknesses,
+    }]
+    if decision == "interview":
+        finalize_evaluation(job_application_id, rows, JobApplicationStatus.interview, "next", replace, expected_status)
+    else:
+        finalize_evaluation(job_application_id, rows, JobApplicationStatus.rejected, "reject", replace, expected_status)
+    return True
+
+async def evaluate_resume_throttled(
+    job_application_id: int,
+    vacancy_id: int,
+    resume_id: int,
+    requeues: int = 0,
+    replace: bool = False,
+    prescore: bool = True,
+    expected_status: Optional[str] = None,
+) -> Optional[float]:
+    """
+    Оценка резюме: сначала пре-скоринг (очевидные случаи решаются без LLM и не тратят
+    квоту лимитера), остальное — в очереди глобального лимитера LLM: ждём слот
+    на event loop, затем оцениваем в threadpool. Задачи сюда выдаёт планировщик
+    (scheduler.EvaluationScheduler); результат — как у evaluate_resume_background.
+    """
+    inputs = await run_in_threadpool(load_evaluation_inputs, job_application_id, vacancy_id, resume_id)
+    if inputs is None:
+        return None
+    if prescore and await run_in_threadpool(prescore_resume, job_application_id, resume_id, inputs, replace, expected_status):
+        return None
+    await wait_for_slot("cv_evaluation", CV_EVAL_COSTS)
+    return await run_in_threadpool(
+        evaluate_resume_background, job_application_id, vacancy_id, resume_id, inputs, requeues, replace, expected_status
+    )
+
+def _error_evaluation(job_application_id: int, resume_id: int, model: str, message: str) -> dict:
+    return {
+        "job_application_id": job_application_id,
+        "resume_version_id": resume_id,
+        "model": model,
+        "name": "error",
+        "score": 0,
+        "strengths": [],
+        "weaknesses": [message],
+    }
+
+def evaluate_resume_background(
+    job_application_id: int,
+    vacancy_id: int,
+    resume_id: int,
+    inputs: Optional[EvaluationInputs] = None,
+    requeues: int = 0,
+    replace: bool = False,
+    expected_status: Optional[str] = None,
+) -> Optional[float]:
+    """
+    Фоновая задача для оценки резюме.
+
+    Вызов LLM идёт без открытой транзакции: входные данные читаются одним коротким
+    запросом (load_evaluation_inputs, если их не передали), а результат фиксируется
+    одним commit в finalize_evaluation. Модели вызываются по цепочке CV_EVAL_PROVIDERS
+    с таймаутами, повторами и circuit breaker. Если не ответила ни одна, ничего не
+    записывается и возвращается retry_after — через сколько секунд повторить (планировщик
+    откладывает задачу); иначе None. replace — прежние оценки отклика заменяются новыми,
+    expected_status — см. finalize_evaluation.
+    """
+
+    # LangChain + Groq импортируются при первой оценке, а не при старте воркера
+    from ...ml.cv_estimator import evaluate_cv
+
+    if inputs is None:
+        inputs = load_evaluation_inputs(job_application_id, vacancy_id, resume_id)
+    if inputs is None:
+        return None
+
+    model = CV_EVAL_PROVIDERS[0].model
+
+    try:
+        if inputs.error is not None:
+            raise RuntimeError(inputs.error)
+        resume_text = inputs.resume_text
+        job_description = inputs.description
+        criteria = ["hard skills", "soft skills", "scalability mindset"]
+        evaluation, provider = call_with_fallback(
+            CV_EVAL_PROVIDERS,
+            lambda provider, timeout: evaluate_cv(
                 job_description=job_description,
                 resume_text=resume_text,
                 criteria=criteria,
                 api_key=os.getenv("GROQ_API_KEY"),
-                model=model,
-            )
-            
-            if evaluation.get("parse_error", False):
-                cv_evaluation = JobApplicationCVEvaluation(
-                    job_application_id=job_application.id,
-                    resume_version_id=resume.id,
-                    model=model,
-                    name="error",
-                    score=0,
-                    strengths=[],
-                    weaknesses=[f"Ошибка парсинга ответа модели: {evaluation['raw_model_output']}"],
-                    created_at=func.now(),
-                    updated_at=func.now(),
-                )
-                db.add(cv_evaluation)
-                # Устанавливаем wait при ошибке парсинга
-                job_application.status = JobApplicationStatus.cvReview
-                req_type = "wait"
-            else: 
-                for crit in evaluation["criteria"]:
-                    cv_evaluation = JobApplicationCVEvaluation(
-                        job_application_id=job_application.id,
-                        resume_version_id=resume.id,
-                        model=model,
-                        name=crit["name"],
-                        score=crit["score"],
-                        strengths=crit["strengths"],
-                        weaknesses=crit["weaknesses"],
-                        created_at=func.now(),
-                        updated_at=func.now(),
-                    )
-                    db.add(cv_evaluation)
-
-                    scores = [crit["score"] for crit in evaluation["criteria"] if isinstance(crit["score"], (int, float))]
-                    average_score = mean(scores) if scores else 0
-
-                    if average_score < 50:
-                        job_application.status = JobApplicationStatus.rejected
-                        req_type = "reject"
-                    else:
-                        job_application.status = JobApplicationStatus.interview
-                        req_type = "next"
-
-                        try:
-                            room_id, join_link = create_videosdk_room()
-                            persist_meeting_for_application(db, job_application.id, room_id, join_link)
-                            print(f"[Interview] Created room {room_id} for application {job_application.id}")
-                        except Exception as e:
-                            print(f"[Interview] Failed to create room: {e}")
-
-        except Exception as e:
-            print(f"Ошибка при оценке резюме: {str(e)}")
-            cv_evaluation = JobApplicationCVEvaluation(
-                job_application_id=job_application.id,
-                resume_version_id=resume.id,
-                model=model,
-                name="error",
-                score=0,
-                strengths=[],
-                weaknesses=[f"Ошибка оценки: {str(e)}"],
-                created_at=func.now(),
-                updated_at=func.now(),
-            )
-            db.add(cv_evaluation)
-            job_application.status = JobApplicationStatus.waitResult
+                model=provider.model,
+                base_url=provider.base_url,
+                timeout=timeout,
+                max_retries=0,
+            ),
+            "cv_evaluation",
+        )
+        model = provider.model
+        
+        if evaluation.get("parse_error", False):
+            rows = [_error_evaluation(job_application_id, resume_id, model, f"Ошибка парсинга ответа модели: {evaluation['raw_model_output']}")]
+            # Устанавливаем wait при ошибке парсинга
+            new_status = JobApplicationStatus.cvReview
             req_type = "wait"
+        else: 
+            rows = [
+                {
+                    "job_application_id": job_application_id,
+                    "resume_version_id": resume_id,
+                    "model": model,
+                    "name": crit["name"],
+                    "score": crit["score"],
+                    "strengths": crit["strengths"],
+                    "weaknesses": crit["weaknesses"],
+                }
+                for crit in evaluation["criteria"]
+            ]
+
+            scores = [crit["score"] for crit in evaluation["criteria"] if isinstance(crit["score"], (int, float))]
+            average_score = mean(scores) if scores else 0
+
+            if average_score < 50:
+                new_status = JobApplicationStatus.rejected
+                req_type = "reject"
+            else:
+                new_status = JobApplicationStatus.interview
+                req_type = "next"
 
+    except ProvidersUnavailable as e:
+        if requeues < CV_EVAL_MAX_REQUEUES:
+            return e.retry_after
+        print(f"Ошибка при оценке резюме: {str(e)}")
+        rows = [_error_evaluation(job_application_id, resume_id, model, f"Ошибка оценки: {str(e)}")]
+        new_status = JobApplicationStatus.waitResult
+        req_type = "wait"
+
+    except Exception as e:
+        print(f"Ошибка при оценке резюме: {str(e)}")
+        rows = [_error_evaluation(job_application_id, resume_id, model, f"Ошибка оценки: {str(e)}")]
+        new_status = JobApplicationStatus.waitResult
+        req_type = "wait"
+
+    finalize_evaluation(job_application_id, rows, new_status, req_type, replace, expected_status)
+    return None
+
+def finalize_evaluation(
+    job_application_id: int,
+    rows: list[dict],
+    new_status: JobApplicationStatus,
+    req_type: str,
+    replace: bool = False,
+    expected_status: Optional[str] = None,
+) -> bool:
+    """
+    Зафиксировать результат оценки одним commit: оценки одним bulk INSERT (при replace —
+    вместо прежних оценок отклика), статус, событие.
+    Комната интервью в транзакции не создаётся — туда пишется только сообщение outbox,
+    которое выполнит OutboxDispatcher (interview.service.create_interview_room).
+    expected_status — статус отклика на момент захвата задачи: если HR успел его сменить,
+    пока шла оценка, результат отбрасывается целиком (False), а решение HR остаётся.
+    """
+    with SessionLocal() as db:
+        guard = [JobApplication.id == job_application_id]
+        if expected_status is not None:
+            guard.append(JobApplication.status == expected_status)
+        updated = db.execute(
+            update(JobApplication)
+            .where(*guard)
+            .values(status=new_status, updated_at=func.now())
+        ).rowcount
+        if not updated:
+            db.rollback()
+            return False
+        if replace:
+            db.execute(delete(JobApplicationCVEvaluation).where(JobApplicationCVEvaluation.job_application_id == job_application_id))
+        if rows:
+            db.execute(insert(JobApplicationCVEvaluation), rows)
         application_event = JobApplicationEvent(
-            application_id=job_application.id,
+            application_id=job_application_id,
             reqType=req_type,
-            status=job_application.status,
+            status=new_status,
             created_at=func.now(),  
         )
         db.add(application_event)
+        if new_status == JobApplicationStatus.interview:
+            enqueue(db, INTERVIEW_ROOM_MESSAGE, {"jobApplicationId": job_application_id})
         db.commit()
 
-def _generate_join_token(api_key: str, api_secret: str, ttl: int = 60 * 60) -> str:
-    """
-    Генерация join-token (JWT) для VideoSDK.
-    """
-    now = int(time.time())
-    payload = {
-        "apikey": api_key,
-        "permissions": ["allow_join", "allow_mod"],
-        "iat": now,
-        "exp": now + ttl,
-        "version": 2,
-    }
-    return jwt.encode(payload, api_secret, algorithm="HS256")
\ No newline at end of file
+    if new_status == JobApplicationStatus.interview:
+        outbox_dispatcher.wake()
+    return True
@@ -0,0 +1,146 @@
+import asyncio
+import json
+import os
+from collections import deque
+
+from fastapi import APIRouter, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import or_
+from sqlalchemy.orm import aliased
+
+from ...core.database import SessionLocal
+from ...core.events import broker
+from ...core.security import decode_access_token
+from ...models.models import ApplicantProfile, HRProfile, JobApplication, JobApplicationEvent, User, Vacancy
+
+router = APIRouter(tags=["events"])
+
+EVENTS_HEARTBEAT = float(os.getenv("EVENTS_HEARTBEAT", "15"))
+EVENTS_REPLAY_LIMIT = 500
+# id событий выдаются при вставке, а коммитятся транзакции в своём порядке: событие с меньшим id
+# может появиться позже большего. Поэтому при переподключении перечитывается хвост до Last-Event-ID,
+# а в потоке дубли отсекаются по множеству недавно отправленных id, а не по максимальному.
+EVENTS_REPLAY_WINDOW = int(os.getenv("EVENTS_REPLAY_WINDOW", "100"))
+EVENTS_SENT_IDS = 1000
+
+
+def _authenticate(request: Request, token: str | None) -> User:
+    """Bearer-токен из заголовка или ?token= (EventSource не умеет слать заголовки)."""
+    header = request.headers.get("authorization", "")
+    if header.lower().startswith("bearer "):
+        token = header[7:]
+    if not token:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+    try:
+        user_id = decode_access_token(token).get("id")
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(e))
+    # сессия закрывается до начала стрима, чтобы не держать соединение из пула
+    with SessionLocal() as db:
+        user = db.query(User).filter(User.id == user_id).first()
+        if not user:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        db.expunge(user)
+    return user
+
+
+class _RecentIds:
+    """Ограниченное множество последних отправленных id: старые вытесняются по мере отправки новых."""
+
+    def __init__(self, size: int):
+        self._order: deque[int] = deque()
+        self._ids: set[int] = set()
+        self._size = size
+
+    def __contains__(self, event_id: int) -> bool:
+        return event_id in self._ids
+
+    def add(self, event_id: int) -> None:
+        self._order.append(event_id)
+        self._ids.add(event_id)
+        if len(self._order) > self._size:
+            self._ids.discard(self._order.popleft())
+
+
+def _missed_events(user_id: int, last_event_id: int) -> list[dict]:
+    """
+    События пользователя после last_event_id — догоняем пропущенное при переподключении.
+    Захватывается и хвост из EVENTS_REPLAY_WINDOW id до него: там могут быть события,
+    закоммиченные позже last_event_id; уже полученные клиент отбрасывает по id.
+    """
+    applicant_user = aliased(ApplicantProfile)
+    with SessionLocal() as db:
+        rows = (
+            db.query(JobApplicationEvent, JobApplication.vacancy_id, applicant_user.user_id, HRProfile.user_id)
+            .join(JobApplication, JobApplication.id == JobApplicationEvent.application_id)
+            .join(applicant_user, applicant_user.id == JobApplication.applicant_id)
+            .outerjoin(Vacancy, Vacancy.id == JobApplication.vacancy_id)
+            .outerjoin(HRProfile, HRProfile.id == Vacancy.hr_id)
+            .filter(JobApplicationEvent.id > last_event_id - EVENTS_REPLAY_WINDOW)
+            .filter(or_(applicant_user.user_id == user_id, HRProfile.user_id == user_id))
+            .order_by(JobApplicationEvent.id)
+            .limit(EVENTS_REPLAY_LIMIT)
+            .all()
+        )
+    return [
+        {
+            "id": event.id,
+            "applicationId": event.application_id,
+            "vacancyId": vacancy_id,
+            "status": event.status,
+            "reqType": event.reqType,
+            "createdAt": event.created_at.isoformat() if event.created_at else None,
+            "applicantUserId": applicant_user_id,
+            "hrUserId": hr_user_id,
+        }
+        for event, vacancy_id, applicant_user_id, hr_user_id in rows
+    ]
+
+
+def _sse(event: dict) -> str:
+    return f"id: {event['id']}\nevent: application\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+
+@router.get("/events")
+async def stream_events(
+    request: Request,
+    token: str | None = Query(None, description="JWT для EventSource"),
+    last_event_id: int | None = Query(None, alias="lastEventId"),
+):
+    """
+    Server-Sent Events: изменения статусов откликов текущего пользователя
+    (соискателю — его отклики, HR — отклики на его вакансии).
+    """
+    user = _authenticate(request, token)
+    header_id = request.headers.get("last-event-id")
+    if header_id and header_id.isdigit():
+        last_event_id = int(header_id)
+
+    queue = broker.subscribe(user.id)
+
+    async def stream():
+        sent = _RecentIds(EVENTS_SENT_IDS)
+        try:
+            yield "retry: 3000\n\n"
+            if last_event_id is not None:
+                for event in await asyncio.to_thread(_missed_events, user.id, last_event_id):
+                    sent.add(event["id"])
+                    yield _sse(event)
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=EVENTS_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                if event["id"] in sent:
+                    continue
+                sent.add(event["id"])
+                yield _sse(event)
+        finally:
+            broker.unsubscribe(user.id, queue)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
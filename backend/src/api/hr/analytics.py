@@ -0,0 +1,79 @@
+"""
+Воронка найма для дашбордов HR.
+
+Агрегаты по вакансиям лежат в материализованном представлении hiring_funnel_stats
+(миграция 5a1e9d3c7b20), поэтому эндпоинт аналитики не сканирует отклики, события
+и оценки CV на каждый просмотр. FunnelRefresher раз в FUNNEL_REFRESH_SECONDS
+выполняет REFRESH ... CONCURRENTLY на primary; advisory lock не даёт нескольким
+воркерам бэкенда обновлять представление одновременно.
+"""
+import asyncio
+import logging
+import os
+import time
+
+from sqlalchemy import Float, Integer, String, DateTime, column, func, select, table, text
+
+from ...core.database import engine
+from ...core.metrics import HIRING_FUNNEL_REFRESH_LATENCY
+
+logger = logging.getLogger(__name__)
+
+# 0 — фоновое обновление выключено (например, если REFRESH запускается по cron)
+FUNNEL_REFRESH_SECONDS = float(os.getenv("FUNNEL_REFRESH_SECONDS", "60"))
+FUNNEL_REFRESH_LOCK_KEY = 0x66756E6E  # "funn"
+
+hiring_funnel_stats = table(
+    "hiring_funnel_stats",
+    column("vacancy_id", Integer),
+    column("vacancy_name", String),
+    column("status", String),
+    column("applications", Integer),
+    column("reached", Integer),
+    column("avg_score", Float),
+    column("avg_seconds_in_status", Float),
+    column("refreshed_at", DateTime),
+)
+
+
+def refresh_hiring_funnel() -> bool:
+    """Обновить hiring_funnel_stats. False — обновление уже идёт в другом процессе."""
+    with engine.connect() as conn:
+        if not conn.execute(select(func.pg_try_advisory_xact_lock(FUNNEL_REFRESH_LOCK_KEY))).scalar():
+            conn.rollback()
+            return False
+        started = time.perf_counter()
+        conn.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY hiring_funnel_stats"))
+        conn.commit()
+    HIRING_FUNNEL_REFRESH_LATENCY.observe(time.perf_counter() - started)
+    return True
+
+
+class FunnelRefresher:
+    def __init__(self, interval: float = FUNNEL_REFRESH_SECONDS):
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._refresh_forever(), name="funnel-refresher")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _refresh_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await asyncio.to_thread(refresh_hiring_funnel)
+            except Exception as e:
+                logger.warning(f"hiring_funnel_stats refresh failed: {e}")
+
+
+funnel_refresher = FunnelRefresher()
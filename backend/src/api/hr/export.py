@@ -0,0 +1,133 @@
+"""
+Выгрузка откликов на вакансию в CSV / XLSX.
+
+Карточка вакансии (get_vacancy_detail) собирает всё через joinedload в память —
+для выгрузки это не годится. Здесь строки читаются server-side курсором
+(yield_per -> stream_results) пачками по EXPORT_FETCH_SIZE и сразу уходят в
+StreamingResponse: оценки CV агрегируются в том же запросе (LATERAL), ORM-объекты
+не создаются, память не растёт с числом откликов.
+
+XLSX пишется openpyxl в write-only режиме: строки сбрасываются во временный
+файл на диске, после сохранения файл отдаётся кусками по EXPORT_CHUNK_BYTES.
+Генераторы синхронные — Starlette итерирует их в threadpool, не блокируя event loop.
+
+Имя, контакты и оценки модели задают соискатель и LLM: строка с = + - @ в начале
+открылась бы в Excel как формула. В CSV такие значения получают префикс ', в XLSX
+пишутся явно строковыми ячейками.
+"""
+import csv
+import io
+import os
+import tempfile
+from datetime import datetime
+
+from sqlalchemy import text
+
+from ...core.database import ReplicaSessionLocal, SessionLocal
+
+EXPORT_FETCH_SIZE = int(os.getenv("EXPORT_FETCH_SIZE", "1000"))
+EXPORT_CHUNK_BYTES = 64 * 1024
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+EXPORT_COLUMNS = (
+    "applicationId",
+    "applicantId",
+    "name",
+    "surname",
+    "patronymic",
+    "contacts",
+    "status",
+    "appliedAt",
+    "score",
+    "criteria",
+    "strengths",
+    "weaknesses",
+)
+
+_EXPORT_SQL = text(
+    """
+    SELECT ja.id, ja.applicant_id, ap.name, ap.surname, ap.patronymic,
+           coalesce(nullif(ja.contacts, ''), ap.contacts), ja.status::text, ja.created_at,
+           ev.score, ev.criteria, ev.strengths, ev.weaknesses
+    FROM job_applications ja
+    JOIN applicant_profiles ap ON ap.id = ja.applicant_id
+    LEFT JOIN LATERAL (
+        SELECT round(avg(e.score) FILTER (WHERE e.name <> 'error'), 1)::float8 AS score,
+               string_agg(e.name || ': ' || e.score, '; ' ORDER BY e.id) FILTER (WHERE e.name <> 'error') AS criteria,
+               string_agg(array_to_string(e.strengths, '; '), '; ' ORDER BY e.id) AS strengths,
+               string_agg(array_to_string(e.weaknesses, '; '), '; ' ORDER BY e.id) AS weaknesses
+        FROM job_application_cv_evaluations e
+        WHERE e.job_application_id = ja.id
+    ) ev ON true
+    WHERE ja.vacancy_id = :vacancy_id
+    ORDER BY ja.id
+    """
+)
+
+
+def _iter_rows(vacancy_id: int):
+    """Строки выгрузки с server-side курсора; сессия своя — живёт столько же, сколько ответ."""
+    session_factory = ReplicaSessionLocal or SessionLocal
+    with session_factory() as db:
+        result = db.execute(
+            _EXPORT_SQL.execution_options(yield_per=EXPORT_FETCH_SIZE),
+            {"vacancy_id": vacancy_id},
+        )
+        for row in result:
+            yield row
+
+
+def _is_formula_like(value) -> bool:
+    return isinstance(value, str) and value.startswith(_FORMULA_PREFIXES)
+
+
+def _cell(value):
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ", timespec="seconds")
+    if _is_formula_like(value):
+        return "'" + value
+    return value
+
+
+def iter_csv(vacancy_id: int):
+    """CSV (UTF-8 с BOM, чтобы Excel открыл кириллицу) кусками по EXPORT_FETCH_SIZE строк."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write("\ufeff")
+    writer.writerow(EXPORT_COLUMNS)
+    for i, row in enumerate(_iter_rows(vacancy_id), start=1):
+        writer.writerow([_cell(value) for value in row])
+        if i % EXPORT_FETCH_SIZE == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+
+def iter_xlsx(vacancy_id: int):
+    """XLSX из write-only книги: строки на диск по мере чтения курсора, затем файл кусками."""
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+
+    def text_cell(value):
+        cell = WriteOnlyCell(sheet, value)
+        cell.data_type = "s"
+        return cell
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("applicants")
+    sheet.append(EXPORT_COLUMNS)
+    for row in _iter_rows(vacancy_id):
+        sheet.append([text_cell(value) if _is_formula_like(value) else value for value in row])
+
+    with tempfile.TemporaryFile() as file:
+        workbook.save(file)
+        file.seek(0)
+        while chunk := file.read(EXPORT_CHUNK_BYTES):
+            yield chunk
+
+
+EXPORT_FORMATS = {
+    "csv": (iter_csv, "text/csv; charset=utf-8"),
+    "xlsx": (iter_xlsx, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
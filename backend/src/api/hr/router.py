@@ -1,23 +1,38 @@
+from datetime import datetime
+from typing import Literal
+
 from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from ...core.security import get_current_hr_user
-from ...core.database import get_session
-from ...models.models import User
+from ...core.database import get_read_session, get_session
+from ...models.models import User, Vacancy
+from .export import EXPORT_FORMATS
 from .schemas import ( 
     ApplicantDetailResponse,
+    BulkApplicationStatusRequest,
+    BulkApplicationStatusResponse,
+    EvaluationQueuedResponse,
+    SimilarCandidate,
     VacancyDetailResponse,
+    VacancyFunnel,
     VacancyResponse,
     VacancyStatusUpdateRequest,
     VacancyStatusUpdateResponse, 
 )
 from .service import (
+    bulk_change_application_status,
     change_vacancy_status,
     get_applicant_detail,
+    get_hiring_funnel,
+    get_similar_candidates,
     get_vacancies, 
     create_vacancy,
     change_vacancy,
     get_vacancy_detail,
+    reevaluate_application,
+    rescore_vacancy,
 )
 
 router = APIRouter(tags=["hr"])
@@ -28,7 +43,7 @@ router = APIRouter(tags=["hr"])
 def get_vacancies_endpoint(
     offset: int = Query(0, ge=0, description="Смещение (0, 20, 40, ...)"),
     limit: int = Query(20, ge=1, le=200, description="Размер страницы (1..200)"),
-    db: Session = Depends(get_session),
+    db: Session = Depends(get_read_session),
 ):
     """Постраничный список вакансий"""
     return get_vacancies(db, offset, limit)
@@ -90,7 +105,7 @@ def change_vacancy_status_endpoint(
 @router.get('/vacancies/{vacancy_id}', response_model=VacancyDetailResponse, dependencies=[Depends(get_current_hr_user)])
 def get_vacancy_detail_endpoint(
     vacancy_id: int, 
-    db: Session = Depends(get_session)
+    db: Session = Depends(get_read_session)
 ):
     """Детальная вакансия + список откликов."""
     try:
@@ -98,11 +113,55 @@ def get_vacancy_detail_endpoint(
     except FileNotFoundError:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Vacancy not found")
     
+@router.get('/vacancies/{vacancy_id}/export', dependencies=[Depends(get_current_hr_user)])
+def export_vacancy_applicants_endpoint(
+    vacancy_id: int,
+    file_format: Literal["csv", "xlsx"] = Query("csv", alias="format", description="Формат файла: csv или xlsx"),
+    db: Session = Depends(get_read_session),
+):
+    """Выгрузка всех откликов на вакансию с оценками CV, плюсами и минусами — потоком, без загрузки в память."""
+    if db.get(Vacancy, vacancy_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Vacancy not found")
+    iter_file, media_type = EXPORT_FORMATS[file_format]
+    return StreamingResponse(
+        iter_file(vacancy_id),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="vacancy-{vacancy_id}-applicants.{file_format}"'},
+    )
+
+@router.post('/vacancies/{vacancy_id}/rescore', response_model=EvaluationQueuedResponse, status_code=status.HTTP_202_ACCEPTED, dependencies=[Depends(get_current_hr_user)])
+def rescore_vacancy_endpoint(
+    vacancy_id: int,
+    deadline: datetime | None = Query(None, description="Оценить не позже (ISO 8601)"),
+    db: Session = Depends(get_session),
+):
+    """Переоценить отклики вакансии на этапе CV (и с ошибкой оценки) — в фоне, с низким приоритетом."""
+    try:
+        return rescore_vacancy(db=db, vacancy_id=vacancy_id, deadline=deadline)
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Vacancy not found")
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+@router.get('/vacancies/{vacancy_id}/similar-candidates', response_model=list[SimilarCandidate], dependencies=[Depends(get_current_hr_user)])
+def get_similar_candidates_endpoint(
+    vacancy_id: int,
+    limit: int = Query(20, ge=1, le=100, description="Сколько кандидатов вернуть (1..100)"),
+    db: Session = Depends(get_read_session),
+):
+    """Похожие кандидаты: текущие резюме, семантически близкие к тексту вакансии (локальные эмбеддинги)."""
+    try:
+        return get_similar_candidates(db=db, vacancy_id=vacancy_id, limit=limit)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
 @router.get("/applicants/{applicantId}", response_model=ApplicantDetailResponse, dependencies=[Depends(get_current_hr_user)])
 def get_applicant_detail_endpoint(
     applicant_id: int,
     vacancy_id: int = Query(..., ge=1, description="ID вакансии для отклика"),
-    db: Session = Depends(get_session),
+    db: Session = Depends(get_read_session),
 ):
     """Получить детальную информацию о соискателе и его отклике на вакансию."""
     try:
@@ -110,4 +169,52 @@ def get_applicant_detail_endpoint(
     except HTTPException as e:
         raise e
     except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+
+
+@router.post("/job_applications/status", response_model=BulkApplicationStatusResponse, dependencies=[Depends(get_current_hr_user)])
+def bulk_change_application_status_endpoint(
+    body: BulkApplicationStatusRequest,
+    db: Session = Depends(get_session),
+):
+    """Массово сменить статус откликов (отказ или перевод на следующий этап). Результат — по каждому ID."""
+    try:
+        return bulk_change_application_status(db=db, application_ids=body.applicationIds, new_status=body.status.value)
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to change application status: {str(e)}")
+
+
+
+@router.post("/job_applications/{application_id}/reevaluate", response_model=EvaluationQueuedResponse, status_code=status.HTTP_202_ACCEPTED)
+def reevaluate_application_endpoint(
+    application_id: int,
+    deadline: datetime | None = Query(None, description="Оценить не позже (ISO 8601)"),
+    db: Session = Depends(get_session),
+    current_user: User = Depends(get_current_hr_user),
+):
+    """Перезапустить оценку CV отклика — вне очереди массовых переоценок, с высоким приоритетом."""
+    try:
+        return reevaluate_application(db=db, application_id=application_id, hr_user_id=current_user.id, deadline=deadline)
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job application not found")
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+
+
+@router.get("/analytics/funnel", response_model=list[VacancyFunnel], dependencies=[Depends(get_current_hr_user)])
+def get_hiring_funnel_endpoint(
+    vacancy_id: int | None = Query(None, alias="vacancyId", ge=1, description="Только эта вакансия"),
+    offset: int = Query(0, ge=0, description="Смещение по вакансиям"),
+    limit: int = Query(20, ge=1, le=200, description="Размер страницы (1..200)"),
+    db: Session = Depends(get_read_session),
+):
+    """Воронка найма по вакансиям: отклики по статусам, конверсия, средний балл и время в статусе.
+    Данные из материализованного представления, обновляются раз в FUNNEL_REFRESH_SECONDS."""
+    try:
+        return get_hiring_funnel(db=db, vacancy_id=vacancy_id, offset=offset, limit=limit)
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
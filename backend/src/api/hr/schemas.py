@@ -30,6 +30,31 @@ class ApplicantStatusEnum(str, Enum):
     waitResult = "waitResult"
     approved = "approved"
 
+BULK_STATUS_MAX_IDS = 1000
+
+class ApplicationStatusOutcomeEnum(str, Enum):
+    updated = "updated"
+    unchanged = "unchanged"
+    invalid_transition = "invalid_transition"
+    not_found = "not_found"
+
+class BulkApplicationStatusRequest(BaseModel):
+    applicationIds: List[int] = Field(..., min_length=1, max_length=BULK_STATUS_MAX_IDS)
+    status: ApplicantStatusEnum
+
+class ApplicationStatusOutcome(BaseModel):
+    applicationId: int
+    outcome: ApplicationStatusOutcomeEnum
+    previousStatus: Optional[ApplicantStatusEnum] = None
+
+class BulkApplicationStatusResponse(BaseModel):
+    status: ApplicantStatusEnum
+    updated: int
+    results: List[ApplicationStatusOutcome]
+
+class EvaluationQueuedResponse(BaseModel):
+    queued: int
+
 class VacancyResponse(BaseModel):
     vacancyId: int
     name: str
@@ -72,6 +97,30 @@ class VacancyDetailApplicant(BaseModel):
 class VacancyDetailResponse(VacancyResponse):
     detailResponses: List[VacancyDetailApplicant]
 
+class SimilarCandidate(BaseModel):
+    applicantId: int
+    name: str
+    resumeVersionId: int
+    similarity: float
+    # отклик на эту вакансию, если кандидат уже откликался
+    applicationId: Optional[int] = None
+    status: Optional[ApplicantStatusEnum] = None
+
+class FunnelStage(BaseModel):
+    status: ApplicantStatusEnum
+    applications: int
+    reached: int
+    conversion: float
+    avgScore: Optional[float] = None
+    avgHoursInStatus: Optional[float] = None
+
+class VacancyFunnel(BaseModel):
+    vacancyId: int
+    name: str
+    total: int
+    stages: List[FunnelStage]
+    refreshedAt: datetime
+
 class InterviewVerdictEnum(str, Enum):
     strong_hire = "strong_hire"
     hire = "hire"
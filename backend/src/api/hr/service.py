@@ -1,13 +1,19 @@
 from datetime import datetime
 from statistics import mean
 from fastapi import HTTPException, status
-from sqlalchemy import desc
+from sqlalchemy import Integer, and_, any_, bindparam, delete, desc, exists, func, insert, or_, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import Session, joinedload
 
+from .analytics import hiring_funnel_stats
+from ...core.outbox import enqueue, outbox_dispatcher
 from .helpers import _apply_mapped_to_vacancy, _vacancy_to_response
-from ...models.models import HRProfile, User, Vacancy, JobApplication
+from ...models.models import ApplicantProfile, HRProfile, User, Vacancy, JobApplication, JobApplicationCVEvaluation, JobApplicationEvent, Meeting, CVEvaluationJob
+from ..matching.service import RESUME, VACANCY, query_vector, require_encoder, search_similar
+from ..interview.service import INTERVIEW_ROOM_MESSAGE, get_interview_summaries
+from ..applicant.scheduler import HIGH, LOW, enqueue_evaluations, evaluation_scheduler, hr_flow
 from .utils import parse_vacancy_docx, to_decimal, vacancy_to_txt
-from .schemas import ApplicantDetailResponse, CVEvaluation, InterviewDetail, InterviewVerdictEnum, VacancyDetailResponse, VacancyDetailApplicant
+from .schemas import ApplicantDetailResponse, ApplicationStatusOutcomeEnum, BulkApplicationStatusResponse, CVEvaluation, EvaluationQueuedResponse, FunnelStage, InterviewDetail, InterviewVerdictEnum, SimilarCandidate, VacancyDetailResponse, VacancyDetailApplicant, VacancyFunnel
 
 
 def get_vacancies(db: Session, offset: int = 0, limit: int = 20):
@@ -168,6 +174,22 @@ def get_applicant_detail(db: Session, applicant_id: int, vacancy_id: int):
         for eval in job_application.cv_evaluations
     ]
 
+    summary = get_interview_summaries(db, [job_application.id]).get(job_application.id)
+    if summary:
+        interview = InterviewDetail(
+            summary=summary["summary"] or "",
+            strengths=summary["strengths"] or [],
+            weaknesses=summary["weaknesses"] or [],
+            recommendations=summary["recommendations"] or "",
+            verdict=summary["verdict"] or InterviewVerdictEnum.no_hire,
+            risk_notes=[],
+        )
+        return ApplicantDetailResponse(
+            status=job_application.status,
+            cv=cv_evaluations,
+            interview=interview,
+        )
+
     interview = InterviewDetail(
         summary="Интервью ещё не проведено",
         strengths=["Не оценено"],
@@ -182,3 +204,214 @@ def get_applicant_detail(db: Session, applicant_id: int, vacancy_id: int):
         cv=cv_evaluations,
         interview=interview if job_application.status in ["interview", "waitResult", "approved"] else None
     )
+
+
+
+# Допустимые переходы статуса отклика: по воронке вперёд или отказ на любом открытом этапе
+APPLICATION_STATUS_TRANSITIONS = {
+    "cvReview": {"interview", "rejected"},
+    "interview": {"waitResult", "rejected"},
+    "waitResult": {"approved", "rejected"},
+    "rejected": set(),
+    "approved": set(),
+}
+
+
+def bulk_change_application_status(db: Session, application_ids: list[int], new_status: str) -> BulkApplicationStatusResponse:
+    """
+    Массовая смена статуса откликов одной транзакцией: строки блокируются
+    одним SELECT ... FOR UPDATE, допустимые переходы применяются одним
+    UPDATE ... WHERE id = ANY(...), события вставляются одним пакетом.
+    Переведённым в interview комната интервью создаётся через outbox, как после оценки CV.
+    Решение HR окончательно: стоящие в очереди оценки этих откликов снимаются в той же
+    транзакции, а уже идущая не запишет результат (finalize_evaluation сверяет статус).
+    """
+    ids = list(dict.fromkeys(application_ids))
+    ids_param = bindparam("ids", ids, type_=ARRAY(Integer))
+
+    current = dict(
+        db.execute(
+            select(JobApplication.id, JobApplication.status)
+            .where(JobApplication.id == any_(ids_param))
+            .with_for_update()
+        ).all()
+    )
+
+    results = []
+    to_update = []
+    for application_id in ids:
+        previous = current.get(application_id)
+        if application_id not in current:
+            outcome = ApplicationStatusOutcomeEnum.not_found
+        elif previous == new_status:
+            outcome = ApplicationStatusOutcomeEnum.unchanged
+        elif new_status not in APPLICATION_STATUS_TRANSITIONS.get(previous, set()):
+            outcome = ApplicationStatusOutcomeEnum.invalid_transition
+        else:
+            outcome = ApplicationStatusOutcomeEnum.updated
+            to_update.append(application_id)
+        results.append({"applicationId": application_id, "outcome": outcome, "previousStatus": previous})
+
+    if to_update:
+        update_ids = bindparam("update_ids", to_update, type_=ARRAY(Integer))
+        db.execute(
+            update(JobApplication)
+            .where(JobApplication.id == any_(update_ids))
+            .values(status=new_status, updated_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        db.execute(
+            delete(CVEvaluationJob)
+            .where(CVEvaluationJob.job_application_id == any_(update_ids))
+            .execution_options(synchronize_session=False)
+        )
+        req_type = "reject" if new_status == "rejected" else "next"
+        db.execute(
+            insert(JobApplicationEvent),
+            [{"application_id": application_id, "reqType": req_type, "status": new_status} for application_id in to_update],
+        )
+        if new_status == "interview":
+            for application_id in to_update:
+                enqueue(db, INTERVIEW_ROOM_MESSAGE, {"jobApplicationId": application_id})
+    db.commit()
+
+    if to_update and new_status == "interview":
+        outbox_dispatcher.wake()
+
+    return BulkApplicationStatusResponse(status=new_status, updated=len(to_update), results=results)
+
+
+
+def _reevaluable():
+    """
+    Отклики, которые можно переоценить: ещё на оценке CV, отклонённые на этапе CV и
+    waitResult после ошибки оценки. Отклик, дошедший до интервью (есть митинг или событие
+    interview), не трогается: отказ после интервью финальный, как и в APPLICATION_STATUS_TRANSITIONS.
+    """
+    failed = exists().where(
+        JobApplicationCVEvaluation.job_application_id == JobApplication.id,
+        JobApplicationCVEvaluation.name == "error",
+    )
+    reached_interview = or_(
+        exists().where(Meeting.application_id == JobApplication.id),
+        exists().where(JobApplicationEvent.application_id == JobApplication.id, JobApplicationEvent.status == "interview"),
+    )
+    return and_(
+        ~reached_interview,
+        or_(
+            JobApplication.status.in_(("cvReview", "rejected")),
+            and_(JobApplication.status == "waitResult", failed),
+        ),
+    )
+
+
+def rescore_vacancy(db: Session, vacancy_id: int, deadline: datetime | None = None) -> EvaluationQueuedResponse:
+    """Массовая переоценка откликов вакансии (например, после правки требований) — низкий приоритет, поток вакансии."""
+    if db.get(Vacancy, vacancy_id) is None:
+        raise FileNotFoundError("vacancy not found")
+    rows = db.execute(
+        select(JobApplication.id, JobApplication.vacancy_id, JobApplication.resume_version_id)
+        .where(JobApplication.vacancy_id == vacancy_id, _reevaluable())
+    ).all()
+    queued = enqueue_evaluations(db, rows, LOW, deadline=deadline, replace=True)
+    db.commit()
+    evaluation_scheduler.wake()
+    return EvaluationQueuedResponse(queued=queued)
+
+
+def reevaluate_application(db: Session, application_id: int, hr_user_id: int, deadline: datetime | None = None) -> EvaluationQueuedResponse:
+    """Ручная переоценка отклика HR — высокий приоритет, поток этого HR, без пре-скоринга."""
+    row = db.execute(
+        select(JobApplication.id, JobApplication.vacancy_id, JobApplication.resume_version_id, _reevaluable())
+        .where(JobApplication.id == application_id)
+    ).first()
+    if row is None or row.vacancy_id is None:
+        raise FileNotFoundError("job application not found")
+    if not row[3]:
+        raise ValueError("Отклик прошёл этап оценки CV — переоценка недоступна")
+    queued = enqueue_evaluations(db, [tuple(row[:3])], HIGH, flow=hr_flow(hr_user_id), deadline=deadline, replace=True)
+    db.commit()
+    evaluation_scheduler.wake()
+    return EvaluationQueuedResponse(queued=queued)
+
+
+
+FUNNEL_STAGE_ORDER = ("cvReview", "interview", "waitResult", "approved", "rejected")
+
+def get_hiring_funnel(db: Session, vacancy_id: int | None = None, offset: int = 0, limit: int = 20) -> list[VacancyFunnel]:
+    """Воронка найма по вакансиям; читает только hiring_funnel_stats (см. analytics.py)."""
+    f = hiring_funnel_stats.c
+    vacancy_ids = select(f.vacancy_id).distinct()
+    if vacancy_id is not None:
+        vacancy_ids = vacancy_ids.where(f.vacancy_id == vacancy_id)
+    vacancy_ids = vacancy_ids.order_by(desc(f.vacancy_id)).offset(offset).limit(limit)
+
+    rows = db.execute(
+        select(hiring_funnel_stats)
+        .where(f.vacancy_id.in_(vacancy_ids.scalar_subquery()))
+        .order_by(desc(f.vacancy_id))
+    ).all()
+
+    by_vacancy: dict[int, list] = {}
+    for row in rows:
+        by_vacancy.setdefault(row.vacancy_id, []).append(row)
+
+    funnels = []
+    for vid, stage_rows in by_vacancy.items():
+        stage_rows.sort(key=lambda r: FUNNEL_STAGE_ORDER.index(r.status))
+        total = sum(r.applications for r in stage_rows)
+        funnels.append(VacancyFunnel(
+            vacancyId=vid,
+            name=stage_rows[0].vacancy_name or "",
+            total=total,
+            stages=[
+                FunnelStage(
+                    status=r.status,
+                    applications=r.applications,
+                    reached=r.reached,
+                    conversion=round(r.reached / total, 4) if total else 0.0,
+                    avgScore=r.avg_score,
+                    avgHoursInStatus=round(r.avg_seconds_in_status / 3600, 2) if r.avg_seconds_in_status is not None else None,
+                )
+                for r in stage_rows
+            ],
+            refreshedAt=stage_rows[0].refreshed_at,
+        ))
+    return funnels
+
+
+def get_similar_candidates(db: Session, vacancy_id: int, limit: int = 20) -> list[SimilarCandidate]:
+    """Кандидаты, чьи текущие резюме семантически ближе всего к тексту вакансии (см. matching/service.py)."""
+    encoder = require_encoder()
+    if db.get(Vacancy, vacancy_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Vacancy not found")
+    vector = query_vector(db, VACANCY, vacancy_id, encoder)
+    if vector is None:
+        return []
+    hits = search_similar(db, RESUME, vector, limit, encoder)
+    if not hits:
+        return []
+
+    applicant_ids = [applicant_id for _, applicant_id, _ in hits]
+    rows = db.execute(
+        select(ApplicantProfile.id, ApplicantProfile.name, ApplicantProfile.surname, JobApplication.id, JobApplication.status)
+        .outerjoin(JobApplication, (JobApplication.applicant_id == ApplicantProfile.id) & (JobApplication.vacancy_id == vacancy_id))
+        .where(ApplicantProfile.id.in_(applicant_ids))
+    ).all()
+    by_applicant = {row[0]: row for row in rows}
+
+    result = []
+    for resume_version_id, applicant_id, similarity in hits:
+        row = by_applicant.get(applicant_id)
+        if row is None:
+            continue
+        _, name, surname, application_id, application_status = row
+        result.append(SimilarCandidate(
+            applicantId=applicant_id,
+            name=" ".join(filter(None, [name, surname])).strip() or "Кандидат",
+            resumeVersionId=resume_version_id,
+            similarity=round(similarity, 4),
+            applicationId=application_id,
+            status=application_status,
+        ))
+    return result
@@ -1,6 +1,8 @@
 from datetime import datetime
 from decimal import Decimal, InvalidOperation
 import re
+import zipfile
+from xml.etree import ElementTree
 
 from fastapi import UploadFile
 
@@ -58,42 +60,144 @@ def parse_bool_ru(val) -> bool:
     return s in {"да", "есть", "true", "1", "y", "yes"}
 
 
-def parse_vacancy_docx(upload: UploadFile) -> dict:
+_W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_W_BODY = f"{_W_NS}body"
+_W_TBL = f"{_W_NS}tbl"
+_W_TR = f"{_W_NS}tr"
+_W_TC = f"{_W_NS}tc"
+_W_P = f"{_W_NS}p"
+_W_R = f"{_W_NS}r"
+_W_T = f"{_W_NS}t"
+_W_TAB = f"{_W_NS}tab"
+_W_BREAKS = (f"{_W_NS}br", f"{_W_NS}cr")
+_W_VAL = f"{_W_NS}val"
+
+_RELS_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_OFFICE_DOCUMENT_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+_DEFAULT_DOCUMENT_PART = "word/document.xml"
+
+
+def _docx_main_part(archive: zipfile.ZipFile) -> str:
+    """Имя основной части документа по _rels/.rels (обычно word/document.xml)."""
     try:
-        from docx import Document
-    except ModuleNotFoundError:
-        raise ValueError("Зависимость python-docx не установлена. Установи пакет: pip install python-docx")
+        rels = ElementTree.fromstring(archive.read("_rels/.rels"))
+    except (KeyError, ElementTree.ParseError):
+        return _DEFAULT_DOCUMENT_PART
+    for rel in rels.iter(f"{_RELS_NS}Relationship"):
+        if rel.get("Type") == _OFFICE_DOCUMENT_REL and rel.get("Target"):
+            return rel.get("Target").lstrip("/")
+    return _DEFAULT_DOCUMENT_PART
+
+
+def _docx_paragraph_text(p) -> str:
+    """Текст абзаца так же, как его собирает python-docx: только прямые w:r."""
+    parts = []
+    for r in p.iterfind(_W_R):
+        for child in r:
+            if child.tag == _W_T:
+                parts.append(child.text or "")
+            elif child.tag == _W_TAB:
+                parts.append("\t")
+            elif child.tag in _W_BREAKS:
+                parts.append("\n")
+    return "".join(parts)
+
+
+def _docx_table_rows(tbl) -> list[list[str]]:
+    """
+    Строки таблицы в виде текстов ячеек по сетке таблицы.
+    Объединённые ячейки (gridSpan / vMerge) повторяются, как в python-docx.
+    """
+    col_count = len(tbl.findall(f"{_W_NS}tblGrid/{_W_NS}gridCol"))
+    if not col_count:
+        return []
+
+    cells: list[str] = []
+    for tr in tbl.iterfind(_W_TR):
+        for tc in tr.iterfind(_W_TC):
+            span_el = tc.find(f"{_W_NS}tcPr/{_W_NS}gridSpan")
+            grid_span = int(span_el.get(_W_VAL, 1)) if span_el is not None else 1
+            vmerge_el = tc.find(f"{_W_NS}tcPr/{_W_NS}vMerge")
+            is_continue = vmerge_el is not None and vmerge_el.get(_W_VAL, "continue") == "continue"
+            text = "\n".join(_docx_paragraph_text(p) for p in tc.iterfind(_W_P))
+            for span_idx in range(grid_span):
+                if is_continue and len(cells) >= col_count:
+                    cells.append(cells[-col_count])
+                elif span_idx > 0:
+                    cells.append(cells[-1])
+                else:
+                    cells.append(text)
+
+    return [cells[i:i + col_count] for i in range(0, len(cells), col_count)]
+
+
+def _iter_docx_body(stream):
+    """
+    Инкрементально читает document.xml и отдаёт элементы верхнего уровня w:body
+    (абзацы и таблицы) по мере их закрытия. Уже отданные элементы очищаются,
+    поэтому память не растёт вместе с размером документа.
+    """
+    depth = 0
+    body = None
+    body_depth = None
+    for event, elem in ElementTree.iterparse(stream, events=("start", "end")):
+        if event == "start":
+            depth += 1
+            if elem.tag == _W_BODY:
+                body, body_depth = elem, depth
+            continue
 
+        if body is not None and depth == body_depth + 1:
+            yield elem
+            body.remove(elem)
+        depth -= 1
+
+
+def _read_docx_fields(fileobj) -> dict[str, str]:
+    """
+    Потоковый разбор DOCX: пары «поле / значение» из первой таблицы с двумя
+    и более колонками, либо из чередующихся абзацев, если таблиц нет.
+    Чтение останавливается сразу после первой таблицы с данными.
+    """
+    data: dict[str, str] = {}
+    paras: list[str] = []
+
+    with zipfile.ZipFile(fileobj) as archive:
+        with archive.open(_docx_main_part(archive)) as stream:
+            for elem in _iter_docx_body(stream):
+                if elem.tag == _W_P:
+                    text = _clean_text(_docx_paragraph_text(elem))
+                    if text:
+                        paras.append(text)
+                elif elem.tag == _W_TBL:
+                    for cells in _docx_table_rows(elem):
+                        if len(cells) < 2:
+                            continue
+                        key = _clean_text(cells[0])
+                        val = _clean_text(cells[1])
+                        if key:
+                            data[key] = val
+                    if data:
+                        return data
+
+    for i in range(0, len(paras) - 1, 2):
+        key = paras[i]
+        val = paras[i + 1]
+        if key and val:
+            data[key] = val
+    return data
+
+
+def parse_vacancy_docx(upload: UploadFile) -> dict:
     if not upload or not upload.filename or not upload.filename.lower().endswith(".docx"):
         raise ValueError("Ожидается DOCX-файл.")
 
     try:
         upload.file.seek(0)
-        doc = Document(upload.file)
+        data = _read_docx_fields(upload.file)
     except Exception:
         raise ValueError("Не удалось прочитать DOCX. Проверь формат файла.")
 
-    data: dict[str, str] = {}
-
-    for table in doc.tables:
-        for row in table.rows:
-            if len(row.cells) < 2:
-                continue
-            key = _clean_text(row.cells[0].text)
-            val = _clean_text(row.cells[1].text)
-            if key:
-                data[key] = val
-        if data:
-            break
-
-    if not data:
-        paras = [_clean_text(p.text) for p in doc.paragraphs if _clean_text(p.text)]
-        for i in range(0, len(paras) - 1, 2):
-            key = paras[i]
-            val = paras[i + 1]
-            if key and val:
-                data[key] = val
-
     if not data:
         raise ValueError("В документе не найдены пары «Наименование поля / Значение».")
     return data
@@ -1,4 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import hmac
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
 from ...core.database import get_session
@@ -9,9 +11,18 @@ from .schemas import (
     StartAgentRequest,
     SubmitResultsRequest,
     SubmitResultsResponse,
+    TranscriptBatchRequest,
+    TranscriptBatchResponse,
+    TranscriptResponse,
 )
 from .service import (
+    AGENT_INGEST_TOKEN,
+    AGENT_WORKERS,
+    append_interview_turns,
     create_videosdk_room,
+    dispatch_agent_to_room,
+    get_agent_capacity,
+    get_interview_transcript,
     persist_meeting_for_application,
     start_agent_process,
     save_interview_results,
@@ -21,6 +32,14 @@ from .service import (
 router = APIRouter(tags=["interview"])
 
 
+def require_agent_token(x_agent_token: str | None = Header(None)):
+    """Агент авторизуется общим секретом AGENT_INGEST_TOKEN, а не JWT пользователя."""
+    if not AGENT_INGEST_TOKEN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Transcript ingestion is disabled")
+    if not x_agent_token or not hmac.compare_digest(x_agent_token, AGENT_INGEST_TOKEN):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid agent token")
+
+
 @router.post("/create_room", response_model=CreateRoomResponse, dependencies=[Depends(get_current_hr_user)])
 def create_room(
     payload: CreateRoomRequest,
@@ -38,6 +57,11 @@ def create_room(
 def start_agent(
     payload: StartAgentRequest,
 ):
+    if AGENT_WORKERS:
+        try:
+            return dispatch_agent_to_room(payload.roomId)
+        except RuntimeError as e:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
     try:
         pid = start_agent_process(payload.roomId)
         return {"pid": pid}
@@ -45,6 +69,16 @@ def start_agent(
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 
+@router.get("/agents", dependencies=[Depends(get_current_hr_user)])
+def agents_capacity():
+    workers = get_agent_capacity()
+    return {
+        "workers": workers,
+        "active": sum(w.get("active", 0) for w in workers if w.get("ok")),
+        "capacity": sum(w.get("capacity", 0) for w in workers if w.get("ok")),
+    }
+
+
 @router.post("/submit_results", response_model=SubmitResultsResponse, dependencies=[Depends(get_current_hr_user)])
 def submit_results(
     payload: SubmitResultsRequest,
@@ -59,10 +93,37 @@ def submit_results(
             weaknesses=payload.weaknesses,
             recommendations=payload.recommendations,
             verdict=payload.verdict,
+            history=payload.history,
         )
         return SubmitResultsResponse(interviewId=interview.id)
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 
+@router.post("/rooms/{room_id}/turns", response_model=TranscriptBatchResponse, dependencies=[Depends(require_agent_token)])
+def append_turns(
+    room_id: str,
+    payload: TranscriptBatchRequest,
+    db: Session = Depends(get_session),
+):
+    """Пачка реплик живого интервью от агента (append-only, повтор пачки идемпотентен)."""
+    try:
+        return append_interview_turns(db, room_id, [turn.model_dump() for turn in payload.turns])
+    except LookupError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
 
+@router.get("/transcript/{job_application_id}", response_model=TranscriptResponse, dependencies=[Depends(get_current_hr_user)])
+def get_transcript(
+    job_application_id: int,
+    after_seq: int = Query(-1, alias="afterSeq", ge=-1, description="Вернуть реплики с seq больше этого"),
+    limit: int = Query(500, ge=1, le=2000),
+    db: Session = Depends(get_session),
+):
+    """Расшифровка интервью по отклику, в том числе пока интервью идёт."""
+    try:
+        return get_interview_transcript(db, job_application_id, after_seq, limit)
+    except LookupError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
@@ -1,5 +1,6 @@
-from typing import List, Optional
-from pydantic import BaseModel, ConfigDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, ConfigDict, Field
 from enum import Enum
 
 
@@ -32,8 +33,43 @@ class SubmitResultsRequest(BaseModel):
     weaknesses: List[str]
     recommendations: str
     verdict: InterviewVerdictEnum
+    # расшифровка в формате save_history_json агента: {system_prompt, created_at, messages, extra}
+    history: Optional[Dict[str, Any]] = None
 
 
 class SubmitResultsResponse(BaseModel):
     interviewId: int
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+
+TRANSCRIPT_BATCH_MAX_TURNS = 100
+
+
+class TranscriptRoleEnum(str, Enum):
+    user = "user"
+    assistant = "assistant"
+    system = "system"
+
+
+class TranscriptTurn(BaseModel):
+    seq: int = Field(..., ge=0)
+    role: TranscriptRoleEnum
+    content: str
+    spokenAt: Optional[datetime] = None
+    model_config = ConfigDict(from_attributes=True)
+
+
+class TranscriptBatchRequest(BaseModel):
+    turns: List[TranscriptTurn] = Field(..., max_length=TRANSCRIPT_BATCH_MAX_TURNS)
+
+
+class TranscriptBatchResponse(BaseModel):
+    interviewId: int
+    accepted: int
+    lastSeq: Optional[int] = None
+
+
+class TranscriptResponse(BaseModel):
+    interviewId: int
+    lastSeq: Optional[int] = None
+    turns: List[TranscriptTurn]
@@ -1,77 +1,41 @@
+import json
 import os
+import socket
 import subprocess
-import time
 from typing import Tuple
 import logging
-import httpx
-import jwt
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import case, desc, func, select
 
-from ...models.models import Meeting, JobApplication, MeetingStatusEnum, Interview
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from ...core.database import SessionLocal
+from ...core.outbox import outbox_handler
+from ...models.models import Meeting, JobApplication, MeetingStatusEnum, Interview, InterviewTurn
+from .videosdk import VIDEOSDK_TOKEN, acquire_room_id, playground_link
 
 logger = logging.getLogger(__name__)
 
 
-VIDEOSDK_BASE_URL = os.getenv("VIDEOSDK_BASE_URL", "https://api.videosdk.live/v2")
-VIDEOSDK_TIMEOUT = float(os.getenv("VIDEOSDK_TIMEOUT", "30"))
-VIDEOSDK_INSECURE = os.getenv("VIDEOSDK_INSECURE", "false").lower() in ("1", "true", "yes")
-VIDEOSDK_TOKEN = os.getenv("VIDEOSDK_AUTH_TOKEN", "")
+# Пул прогретых воркеров агентов (ml/videosdk-examples/worker.py): "host:port,host:port"
+AGENT_WORKERS = [addr.strip() for addr in os.getenv("AGENT_WORKERS", "").split(",") if addr.strip()]
+AGENT_WORKER_TIMEOUT = float(os.getenv("AGENT_WORKER_TIMEOUT", "2"))
+# Общий секрет агента для загрузки расшифровки (X-Agent-Token); пусто — загрузка выключена
+AGENT_INGEST_TOKEN = os.getenv("AGENT_INGEST_TOKEN", "")
+# Секрет управляющего сокета воркеров агентов; по умолчанию тот же, что для расшифровки
+AGENT_WORKER_TOKEN = os.getenv("AGENT_WORKER_TOKEN") or AGENT_INGEST_TOKEN
 
-def _generate_join_token(api_key: str, api_secret: str, ttl: int = 60 * 60) -> str:
-    """
-    Генерация join-token (JWT) для VideoSDK.
-    """
-    now = int(time.time())
-    payload = {
-        "apikey": api_key,
-        "permissions": ["allow_join", "allow_mod"],
-        "iat": now,
-        "exp": now + ttl,
-        "version": 2,
-    }
-    return jwt.encode(payload, api_secret, algorithm="HS256")
-
-def _headers_raw_auth() -> dict:
-    if not VIDEOSDK_TOKEN:
-        raise ValueError("VIDEOSDK_AUTH_TOKEN is not set")
-    return {"Authorization": VIDEOSDK_TOKEN.strip(), "Content-Type": "application/json"}
 
 def create_videosdk_room() -> Tuple[str, str]:
-    """Create a VideoSDK room and return (room_id, join_link)."""
-    with httpx.Client(timeout=VIDEOSDK_TIMEOUT, verify=not VIDEOSDK_INSECURE) as client:
-        last_err = None
-        try:
-            resp = client.post(f"{VIDEOSDK_BASE_URL}/rooms", headers=_headers_raw_auth(), json={})
-            resp.raise_for_status()
-        except Exception as e:
-            last_err = e
-            resp = None  # type: ignore
-        if resp is None:
-            raise RuntimeError(f"VideoSDK room create failed: {last_err}")
-        data = resp.json()
-        room_id = data.get("roomId") or data.get("id") or data.get("room_id")
-        if not room_id:
-            raise RuntimeError("Failed to obtain roomId from VideoSDK response")
-        
-        api_key = os.getenv("VIDEOSDK_API_KEY")
-        api_secret = os.getenv("VIDEOSDK_API_SECRET")
-        if not api_key or not api_secret:
-            raise RuntimeError("VIDEOSDK_API_KEY и VIDEOSDK_API_SECRET должны быть заданы")
-
-        join_token = _generate_join_token(api_key, api_secret)
-        # Build a set of candidate join links documented/observed
-        playground = f"https://playground.videosdk.live/?token={join_token}&meetingId={room_id}"
-        logger.info(f"VideoSDK room created: id={room_id}, auth_scheme=raw_auth")
-        return room_id, playground
+    """Room for an application (from the pre-created pool when available): (room_id, join_link)."""
+    room_id = acquire_room_id()
+    logger.info(f"VideoSDK room assigned: id={room_id}")
+    return room_id, playground_link(room_id)
 
 
-def persist_meeting_for_application(db: Session, job_application_id: int, room_id: str, join_link: str) -> Meeting:
-    job_application = db.query(JobApplication).filter_by(id=job_application_id).first()
-    if not job_application:
-        raise ValueError("Job application not found")
-
-    meeting = Meeting(
+def new_meeting(job_application: JobApplication, room_id: str, join_link: str) -> Meeting:
+    """Митинг интервью для отклика (ещё не добавлен в сессию)."""
+    return Meeting(
         application_id=job_application.id,
         vacancy_id=job_application.vacancy_id,
         status="waitMeeting",
@@ -80,6 +44,41 @@ def persist_meeting_for_application(db: Session, job_application_id: int, room_i
         roomId=room_id,
         calendarLink="",
     )
+
+
+INTERVIEW_ROOM_MESSAGE = "interview_room"
+
+
+@outbox_handler(INTERVIEW_ROOM_MESSAGE)
+def create_interview_room(payload: dict) -> None:
+    """
+    Outbox: комната VideoSDK и митинг для отклика, прошедшего оценку CV.
+    Пачки outbox идут параллельно, и на один отклик может прийти несколько сообщений
+    (оценка CV, массовая смена статуса): строка отклика блокируется до коммита митинга,
+    и второе сообщение, дождавшись блокировки, уже видит митинг и не берёт вторую комнату.
+    """
+    job_application_id = payload["jobApplicationId"]
+    with SessionLocal() as db:
+        job_application = db.execute(
+            select(JobApplication).where(JobApplication.id == job_application_id).with_for_update()
+        ).scalar_one_or_none()
+        if job_application is None:
+            return
+        if db.query(Meeting.id).filter(Meeting.application_id == job_application_id).first():
+            return
+
+        room_id, join_link = create_videosdk_room()
+        db.add(new_meeting(job_application, room_id, join_link))
+        db.commit()
+    logger.info(f"Created room {room_id} for application {job_application_id}")
+
+
+def persist_meeting_for_application(db: Session, job_application_id: int, room_id: str, join_link: str) -> Meeting:
+    job_application = db.query(JobApplication).filter_by(id=job_application_id).first()
+    if not job_application:
+        raise ValueError("Job application not found")
+
+    meeting = new_meeting(job_application, room_id, join_link)
     db.add(meeting)
     db.commit()
     db.refresh(meeting)
@@ -108,6 +107,56 @@ def start_agent_process(room_id: str) -> int:
     return proc.pid
 
 
+def _agent_worker_call(addr: str, payload: dict) -> dict:
+    """Один запрос к воркеру агентов: JSON-строка туда, JSON-строка обратно."""
+    host, _, port = addr.rpartition(":")
+    if AGENT_WORKER_TOKEN:
+        payload = {**payload, "token": AGENT_WORKER_TOKEN}
+    with socket.create_connection((host, int(port)), timeout=AGENT_WORKER_TIMEOUT) as conn:
+        conn.sendall(json.dumps(payload).encode() + b"\n")
+        with conn.makefile("rb") as reader:
+            line = reader.readline()
+    if not line:
+        raise RuntimeError(f"Agent worker {addr} closed connection")
+    return json.loads(line)
+
+
+def get_agent_capacity() -> list[dict]:
+    """Состояние всех воркеров агентов; недоступные помечаются ok=False."""
+    workers = []
+    for addr in AGENT_WORKERS:
+        try:
+            workers.append({"worker": addr, **_agent_worker_call(addr, {"op": "status"})})
+        except (OSError, ValueError, RuntimeError) as e:
+            workers.append({"worker": addr, "ok": False, "error": str(e)})
+    return workers
+
+
+def dispatch_agent_to_room(room_id: str) -> dict:
+    """
+    Отправляет агента в комнату через наименее загруженный прогретый воркер.
+    Возвращает ответ воркера; RuntimeError, если свободных мест нет.
+    """
+    # capacity 0 — воркер выводится из работы (drain) или не настроен: не выбираем и не делим на ноль
+    candidates = [
+        w for w in get_agent_capacity()
+        if w.get("ok") and w.get("capacity", 0) > 0
+        and (room_id in w.get("rooms", []) or w["active"] < w["capacity"])
+    ]
+    # Комната уже обслуживается — повторный join идемпотентен
+    candidates.sort(key=lambda w: (room_id not in w.get("rooms", []), w["active"] / w["capacity"]))
+    for worker in candidates:
+        try:
+            result = _agent_worker_call(worker["worker"], {"op": "join", "room_id": room_id})
+        except (OSError, ValueError, RuntimeError) as e:
+            logger.warning(f"Agent worker {worker['worker']} join failed: {e}")
+            continue
+        if result.get("ok"):
+            logger.info(f"Agent dispatched: room={room_id}, worker={worker['worker']}")
+            return {"worker": worker["worker"], **result}
+    raise RuntimeError("No agent worker capacity available")
+
+
 def save_interview_results(
     db: Session,
     job_application_id: int,
@@ -116,20 +165,147 @@ def save_interview_results(
     weaknesses: list[str],
     recommendations: str,
     verdict: str,
+    history: dict | None = None,
 ) -> Interview:
     job_application = db.query(JobApplication).filter_by(id=job_application_id).first()
     if not job_application:
         raise ValueError("Job application not found")
 
-    interview = Interview(
-        job_application_id=job_application.id,
-        history_json="{}",
-        feedback_json=recommendations,
-        strengths=strengths,
-        weaknesses=weaknesses,
-        verdict=verdict,
+    # интервью с живой расшифровкой уже создано первой пачкой реплик — дописываем итог в него
+    interview = (
+        db.query(Interview)
+        .filter(
+            Interview.job_application_id == job_application.id,
+            Interview.room_id.isnot(None),
+            Interview.verdict.is_(None),
+        )
+        .order_by(desc(Interview.id))
+        .first()
     )
-    db.add(interview)
+    if interview is None:
+        interview = Interview(job_application_id=job_application.id)
+        db.add(interview)
+    if history or interview.history_json is None:
+        interview.history_json = history or {}
+    interview.feedback_json = {"summary": summary, "recommendations": recommendations}
+    interview.strengths = strengths
+    interview.weaknesses = weaknesses
+    interview.verdict = verdict
     db.commit()
     db.refresh(interview)
-    return interview
\ No newline at end of file
+    return interview
+
+
+def get_interview_summaries(db: Session, job_application_ids: list[int]) -> dict[int, dict]:
+    """
+    Последнее интервью по каждому отклику — только сводные поля. Расшифровка
+    (history_json) не читается: из JSONB берутся summary/recommendations и
+    число реплик, так что большие TOAST-значения не передаются клиенту.
+    """
+    if not job_application_ids:
+        return {}
+    rows = db.execute(
+        select(
+            Interview.job_application_id,
+            Interview.id,
+            Interview.verdict,
+            Interview.strengths,
+            Interview.weaknesses,
+            Interview.feedback_json["summary"].astext.label("summary"),
+            Interview.feedback_json["recommendations"].astext.label("recommendations"),
+            func.greatest(
+                select(func.count()).where(InterviewTurn.interview_id == Interview.id).scalar_subquery(),
+                case(
+                    (func.jsonb_typeof(Interview.history_json["messages"]) == "array",
+                     func.jsonb_array_length(Interview.history_json["messages"])),
+                    else_=0,
+                ),
+            ).label("turns"),
+            Interview.created_at,
+        )
+        .where(Interview.job_application_id.in_(job_application_ids))
+        .distinct(Interview.job_application_id)
+        .order_by(Interview.job_application_id, desc(Interview.created_at), desc(Interview.id))
+    ).mappings().all()
+    return {row["job_application_id"]: dict(row) for row in rows}
+
+
+def _interview_for_room(db: Session, room_id: str) -> Interview:
+    """Интервью, в которое пишется расшифровка комнаты; создаётся первой пачкой реплик."""
+    interview = db.query(Interview).filter_by(room_id=room_id).order_by(desc(Interview.id)).first()
+    if interview is not None:
+        return interview
+
+    meeting = db.query(Meeting).filter_by(roomId=room_id).order_by(desc(Meeting.created_at)).first()
+    if not meeting:
+        raise LookupError("Meeting for room not found")
+    # первые пачки могут прийти параллельно — сериализуем создание на строке отклика
+    db.query(JobApplication.id).filter_by(id=meeting.application_id).with_for_update().one()
+    interview = db.query(Interview).filter_by(room_id=room_id).order_by(desc(Interview.id)).first()
+    if interview is None:
+        interview = Interview(job_application_id=meeting.application_id, room_id=room_id, history_json={})
+        db.add(interview)
+        db.flush()
+    return interview
+
+
+def append_interview_turns(db: Session, room_id: str, turns: list[dict]) -> dict:
+    """
+    Дописывает пачку реплик (seq, role, content, spokenAt). Повтор пачки после
+    сбоя безопасен: уже сохранённые (interview_id, seq) пропускаются. Пустая пачка
+    только возвращает lastSeq — с него агент продолжает нумерацию после перезапуска.
+    """
+    interview = _interview_for_room(db, room_id)
+    accepted = 0
+    if turns:
+        stmt = (
+            pg_insert(InterviewTurn)
+            .values([
+                {
+                    "interview_id": interview.id,
+                    "seq": turn["seq"],
+                    "role": turn["role"],
+                    "content": turn["content"],
+                    "spoken_at": turn.get("spokenAt"),
+                }
+                for turn in turns
+            ])
+            .on_conflict_do_nothing(index_elements=["interview_id", "seq"])
+            .returning(InterviewTurn.seq)
+        )
+        accepted = len(db.execute(stmt).all())
+    last_seq = db.query(func.max(InterviewTurn.seq)).filter_by(interview_id=interview.id).scalar()
+    db.commit()
+    return {"interviewId": interview.id, "accepted": accepted, "lastSeq": last_seq}
+
+
+def get_interview_transcript(db: Session, job_application_id: int, after_seq: int = -1, limit: int = 500) -> dict:
+    """Расшифровка последнего интервью отклика (в том числе незавершённого) постранично по seq."""
+    interview = (
+        db.query(Interview)
+        .filter_by(job_application_id=job_application_id)
+        .order_by(desc(Interview.created_at), desc(Interview.id))
+        .first()
+    )
+    if interview is None:
+        raise LookupError("Interview not found")
+
+    rows = (
+        db.query(InterviewTurn)
+        .filter(InterviewTurn.interview_id == interview.id, InterviewTurn.seq > after_seq)
+        .order_by(InterviewTurn.seq)
+        .limit(limit)
+        .all()
+    )
+    turns = [
+        {"seq": row.seq, "role": row.role, "content": row.content, "spokenAt": row.spoken_at}
+        for row in rows
+    ]
+    if not turns and after_seq < 0:
+        # интервью, загруженные одним файлом через submit_results
+        messages = (interview.history_json or {}).get("messages") or []
+        turns = [
+            {"seq": seq, "role": message.get("role", "system"), "content": message.get("content", "")}
+            for seq, message in enumerate(messages[:limit])
+        ]
+    return {"interviewId": interview.id, "lastSeq": turns[-1]["seq"] if turns else None, "turns": turns}
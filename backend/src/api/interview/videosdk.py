@@ -0,0 +1,307 @@
+"""
+Клиент VideoSDK REST API и пул заранее созданных комнат.
+
+Комнаты создаются общим httpx.AsyncClient (keep-alive, без TLS-рукопожатия на
+каждый вызов) в фоне, на event loop приложения: пул держит ROOM_POOL_SIZE
+свободных комнат и пополняется после каждой выдачи. Выдача комнаты отклику —
+локальный pop из очереди; если пул пуст, комната создаётся тем же клиентом.
+
+Пул запускается в lifespan приложения (start_room_pool / stop_room_pool). Без
+запущенного пула (скрипты, ROOM_POOL_SIZE=0) используется общий синхронный клиент.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+import httpx
+import jwt
+
+from ...core.metrics import (
+    VIDEOSDK_JOIN_TOKENS,
+    VIDEOSDK_ROOM_CREATE_LATENCY,
+    VIDEOSDK_ROOM_POOL_SIZE,
+    VIDEOSDK_ROOMS_ASSIGNED,
+)
+
+logger = logging.getLogger(__name__)
+
+VIDEOSDK_BASE_URL = os.getenv("VIDEOSDK_BASE_URL", "https://api.videosdk.live/v2")
+VIDEOSDK_TIMEOUT = float(os.getenv("VIDEOSDK_TIMEOUT", "30"))
+VIDEOSDK_INSECURE = os.getenv("VIDEOSDK_INSECURE", "false").lower() in ("1", "true", "yes")
+VIDEOSDK_TOKEN = os.getenv("VIDEOSDK_AUTH_TOKEN", "")
+
+ROOM_POOL_SIZE = int(os.getenv("ROOM_POOL_SIZE", "4"))
+# Комнаты старше этого возраста не выдаются (VideoSDK может закрыть неиспользуемую комнату)
+ROOM_POOL_MAX_AGE = float(os.getenv("ROOM_POOL_MAX_AGE", str(6 * 60 * 60)))
+ROOM_POOL_RETRY_DELAY = float(os.getenv("ROOM_POOL_RETRY_DELAY", "5"))
+
+
+JOIN_TOKEN_TTL = int(os.getenv("VIDEOSDK_JOIN_TOKEN_TTL", str(60 * 60)))
+# Токен перевыпускается, когда до истечения остаётся меньше этого запаса,
+# чтобы клиент всегда получал токен, живущий не меньше JOIN_TOKEN_REFRESH_AHEAD
+JOIN_TOKEN_REFRESH_AHEAD = int(os.getenv("VIDEOSDK_JOIN_TOKEN_REFRESH_AHEAD", str(15 * 60)))
+JOIN_TOKEN_PERMISSIONS = ("allow_join", "allow_mod")
+
+
+def _generate_join_token(api_key: str, api_secret: str, ttl: int = 60 * 60, permissions=JOIN_TOKEN_PERMISSIONS) -> str:
+    """
+    Генерация join-token (JWT) для VideoSDK.
+    """
+    now = int(time.time())
+    payload = {
+        "apikey": api_key,
+        "permissions": list(permissions),
+        "iat": now,
+        "exp": now + ttl,
+        "version": 2,
+    }
+    return jwt.encode(payload, api_secret, algorithm="HS256")
+
+
+class JoinTokenProvider:
+    """
+    Кэш join-token по (api key, секрет, permissions): все токены с одинаковыми
+    правами взаимозаменяемы, поэтому подпись нужна раз в ttl - refresh_ahead.
+    """
+
+    def __init__(self, ttl: int = JOIN_TOKEN_TTL, refresh_ahead: int = JOIN_TOKEN_REFRESH_AHEAD):
+        if refresh_ahead >= ttl:
+            raise ValueError("refresh_ahead must be less than ttl")
+        self.ttl = ttl
+        self.refresh_ahead = refresh_ahead
+        self._tokens: dict[tuple, tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, api_key: str, api_secret: str, permissions=JOIN_TOKEN_PERMISSIONS) -> str:
+        key = (api_key, api_secret, tuple(sorted(permissions)))
+        now = time.time()
+        with self._lock:
+            cached = self._tokens.get(key)
+            if cached is not None and cached[1] - now > self.refresh_ahead:
+                VIDEOSDK_JOIN_TOKENS.labels("cached").inc()
+                return cached[0]
+            token = _generate_join_token(api_key, api_secret, ttl=self.ttl, permissions=permissions)
+            # exp внутри токена округлён вниз до секунды — считаем от того же now
+            self._tokens[key] = (token, int(now) + self.ttl)
+        VIDEOSDK_JOIN_TOKENS.labels("signed").inc()
+        return token
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tokens.clear()
+
+
+join_tokens = JoinTokenProvider()
+
+
+def get_join_token(permissions=JOIN_TOKEN_PERMISSIONS) -> str:
+    """Join-token для ключей из VIDEOSDK_API_KEY/VIDEOSDK_API_SECRET (из кэша, если ещё свежий)."""
+    api_key = os.getenv("VIDEOSDK_API_KEY")
+    api_secret = os.getenv("VIDEOSDK_API_SECRET")
+    if not api_key or not api_secret:
+        raise RuntimeError("VIDEOSDK_API_KEY и VIDEOSDK_API_SECRET должны быть заданы")
+    return join_tokens.get(api_key, api_secret, permissions)
+
+
+def _headers_raw_auth() -> dict:
+    if not VIDEOSDK_TOKEN:
+        raise ValueError("VIDEOSDK_AUTH_TOKEN is not set")
+    return {"Authorization": VIDEOSDK_TOKEN.strip(), "Content-Type": "application/json"}
+
+
+def _room_id_from(data: dict) -> str:
+    room_id = data.get("roomId") or data.get("id") or data.get("room_id")
+    if not room_id:
+        raise RuntimeError("Failed to obtain roomId from VideoSDK response")
+    return room_id
+
+
+def playground_link(room_id: str) -> str:
+    """Ссылка на playground с актуальным join-token (токен не хранится вместе с комнатой в пуле)."""
+    return f"https://playground.videosdk.live/?token={get_join_token()}&meetingId={room_id}"
+
+
+class VideoSDKClient:
+    """Асинхронный клиент VideoSDK с общим пулом соединений."""
+
+    def __init__(self, base_url: str = VIDEOSDK_BASE_URL, timeout: float = VIDEOSDK_TIMEOUT):
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            headers=_headers_raw_auth(),
+            timeout=timeout,
+            verify=not VIDEOSDK_INSECURE,
+        )
+
+    async def create_room(self) -> str:
+        started = time.perf_counter()
+        try:
+            resp = await self._client.post("/rooms", json={})
+            resp.raise_for_status()
+        except Exception as e:
+            raise RuntimeError(f"VideoSDK room create failed: {e}") from e
+        VIDEOSDK_ROOM_CREATE_LATENCY.observe(time.perf_counter() - started)
+        return _room_id_from(resp.json())
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+class RoomPool:
+    """
+    Очередь свободных комнат, пополняемая фоновой задачей.
+
+    acquire_nowait() и create_blocking() потокобезопасны: их вызывают синхронные
+    эндпоинты и BackgroundTasks из threadpool, а HTTP всегда идёт через event loop.
+    """
+
+    def __init__(self, client: VideoSDKClient, size: int = ROOM_POOL_SIZE, max_age: float = ROOM_POOL_MAX_AGE):
+        self.client = client
+        self.size = size
+        self.max_age = max_age
+        self._rooms: deque[tuple[str, float]] = deque()
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._rooms)
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._refill_forever(), name="videosdk-room-pool")
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._loop = None
+        await self.client.aclose()
+
+    def _drop_stale(self) -> None:
+        deadline = time.monotonic() - self.max_age
+        with self._lock:
+            while self._rooms and self._rooms[0][1] < deadline:
+                self._rooms.popleft()
+            VIDEOSDK_ROOM_POOL_SIZE.set(len(self._rooms))
+
+    async def _refill_forever(self) -> None:
+        while True:
+            self._drop_stale()
+            while (missing := self.size - len(self._rooms)) > 0:
+                results = await asyncio.gather(
+                    *(self.client.create_room() for _ in range(missing)), return_exceptions=True
+                )
+                created = [r for r in results if isinstance(r, str)]
+                with self._lock:
+                    self._rooms.extend((room_id, time.monotonic()) for room_id in created)
+                    VIDEOSDK_ROOM_POOL_SIZE.set(len(self._rooms))
+                if len(created) < missing:
+                    error = next(r for r in results if not isinstance(r, str))
+                    logger.warning(f"Room pool refill failed: {error}")
+                    await asyncio.sleep(ROOM_POOL_RETRY_DELAY)
+            self._wakeup.clear()
+            try:
+                # периодически просыпаемся, чтобы выбросить устаревшие комнаты
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.max_age / 2)
+            except asyncio.TimeoutError:
+                pass
+
+    def acquire_nowait(self) -> str | None:
+        """Свободная комната из пула или None; запускает пополнение."""
+        self._drop_stale()
+        with self._lock:
+            room_id = self._rooms.popleft()[0] if self._rooms else None
+            VIDEOSDK_ROOM_POOL_SIZE.set(len(self._rooms))
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        return room_id
+
+    def create_blocking(self) -> str:
+        """Создание комнаты из синхронного кода (не из потока event loop)."""
+        future = asyncio.run_coroutine_threadsafe(self.client.create_room(), self._loop)
+        return future.result(timeout=VIDEOSDK_TIMEOUT + 1)
+
+    async def acquire(self) -> str:
+        room_id = self.acquire_nowait()
+        if room_id is not None:
+            VIDEOSDK_ROOMS_ASSIGNED.labels("pool").inc()
+            return room_id
+        VIDEOSDK_ROOMS_ASSIGNED.labels("direct").inc()
+        return await self.client.create_room()
+
+
+_pool: RoomPool | None = None
+_sync_client: httpx.Client | None = None
+_sync_client_lock = threading.Lock()
+
+
+def get_room_pool() -> RoomPool | None:
+    return _pool
+
+
+async def start_room_pool() -> None:
+    """Запуск пула в lifespan; без VIDEOSDK_AUTH_TOKEN или при ROOM_POOL_SIZE=0 — no-op."""
+    global _pool
+    if _pool is not None or ROOM_POOL_SIZE <= 0 or not VIDEOSDK_TOKEN:
+        return
+    _pool = RoomPool(VideoSDKClient())
+    await _pool.start()
+    logger.info(f"VideoSDK room pool started, size={ROOM_POOL_SIZE}")
+
+
+async def stop_room_pool() -> None:
+    global _pool
+    if _pool is not None:
+        pool, _pool = _pool, None
+        await pool.stop()
+
+
+def _on_loop_thread(loop: asyncio.AbstractEventLoop) -> bool:
+    try:
+        return asyncio.get_running_loop() is loop
+    except RuntimeError:
+        return False
+
+
+def _create_room_sync() -> str:
+    global _sync_client
+    with _sync_client_lock:
+        if _sync_client is None:
+            _sync_client = httpx.Client(
+                base_url=VIDEOSDK_BASE_URL,
+                timeout=VIDEOSDK_TIMEOUT,
+                verify=not VIDEOSDK_INSECURE,
+            )
+    started = time.perf_counter()
+    try:
+        resp = _sync_client.post("/rooms", headers=_headers_raw_auth(), json={})
+        resp.raise_for_status()
+    except Exception as e:
+        raise RuntimeError(f"VideoSDK room create failed: {e}") from e
+    VIDEOSDK_ROOM_CREATE_LATENCY.observe(time.perf_counter() - started)
+    return _room_id_from(resp.json())
+
+
+def acquire_room_id() -> str:
+    """
+    Комната для отклика из синхронного кода: из пула, иначе создаётся на месте
+    (через event loop пула, а без пула — общим синхронным клиентом).
+    """
+    pool = _pool
+    if pool is not None and pool._loop is not None and not _on_loop_thread(pool._loop):
+        room_id = pool.acquire_nowait()
+        if room_id is not None:
+            VIDEOSDK_ROOMS_ASSIGNED.labels("pool").inc()
+            return room_id
+        VIDEOSDK_ROOMS_ASSIGNED.labels("direct").inc()
+        return pool.create_blocking()
+    VIDEOSDK_ROOMS_ASSIGNED.labels("direct").inc()
+    return _create_room_sync()
@@ -0,0 +1,295 @@
+"""
+Семантический поиск «похожие кандидаты» / «похожие вакансии» на локальных эмбеддингах.
+
+Векторы считает ml.embeddings (ONNX, CPU) и кэширует в таблице embeddings
+(миграция a4e1c9b27d53): один вектор на версию резюме и на ревизию текста
+вакансии (md5 полей, которые описывают вакансию). Версии резюме неизменяемы,
+поэтому резюме кодируется один раз; вакансия — заново только после правки текста.
+EmbeddingSyncer раз в EMBEDDINGS_SYNC_SECONDS догоняет новые резюме и вакансии
+пачками, а вектор объекта запроса при отсутствии считается на лету.
+
+Поиск — полный перебор косинусной близости:
+  * numpy — матрица векторов в памяти процесса, перечитывается из БД, только если
+    изменился отпечаток (count, max(updated_at)), не чаще раза в EMBEDDINGS_INDEX_TTL;
+  * pgvector — если расширение vector установлено (EMBEDDINGS_INDEX=auto/pgvector),
+    сортировка `<=>` в самом Postgres без копии векторов в каждом воркере.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+
+from fastapi import HTTPException, status
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from ...core.database import engine
+from ...core.metrics import EMBEDDINGS_COMPUTED, SEMANTIC_SEARCH_LATENCY
+from ...ml.embeddings import get_encoder
+from ..applicant.helpers import _extract_text_from_file
+
+logger = logging.getLogger(__name__)
+
+# auto — pgvector, если расширение установлено, иначе numpy
+EMBEDDINGS_INDEX = os.getenv("EMBEDDINGS_INDEX", "auto")
+# 0 — фоновое кодирование выключено, векторы считаются только по запросу
+EMBEDDINGS_SYNC_SECONDS = float(os.getenv("EMBEDDINGS_SYNC_SECONDS", "60"))
+EMBEDDINGS_SYNC_BATCH = int(os.getenv("EMBEDDINGS_SYNC_BATCH", "256"))
+EMBEDDINGS_INDEX_TTL = float(os.getenv("EMBEDDINGS_INDEX_TTL", "30"))
+
+RESUME = "resume"
+VACANCY = "vacancy"
+
+_VACANCY_TEXT = """concat_ws(E'\\n', v.name, v.department, v.description, v."computerSkills",
+                            v."specialSoftware", v."foreignLanguages")"""
+_RESUME_HASH = "coalesce(rv.text_hash, md5(rv.storage_path))"
+
+# Что (пере)кодировать: объекты без вектора этой модели или с устаревшей ревизией текста
+_STALE_SQL = {
+    VACANCY: f"""
+        SELECT v.id, {_VACANCY_TEXT} AS body, md5({_VACANCY_TEXT}) AS content_hash
+        FROM vacancies v
+        LEFT JOIN embeddings e ON e.kind = 'vacancy' AND e.model = :model AND e.ref_id = v.id
+        WHERE {{where}} AND e.content_hash IS DISTINCT FROM md5({_VACANCY_TEXT})
+        ORDER BY v.id
+        LIMIT :limit
+    """,
+    RESUME: f"""
+        SELECT rv.id, rv.storage_path AS body, {_RESUME_HASH} AS content_hash
+        FROM applicant_resume_versions rv
+        LEFT JOIN embeddings e ON e.kind = 'resume' AND e.model = :model AND e.ref_id = rv.id
+        WHERE {{where}} AND e.content_hash IS DISTINCT FROM {_RESUME_HASH}
+        ORDER BY rv.id
+        LIMIT :limit
+    """,
+}
+_STALE_WHERE = {
+    VACANCY: ("v.status = 'active'", "v.id = :ref_id"),
+    RESUME: ("rv.is_current", "rv.id = :ref_id"),
+}
+
+_UPSERT_SQL = text(
+    """
+    INSERT INTO embeddings (kind, ref_id, model, content_hash, vector, updated_at)
+    VALUES (:kind, :ref_id, :model, :content_hash, :vector, now())
+    ON CONFLICT (kind, model, ref_id) DO UPDATE SET
+        content_hash = excluded.content_hash,
+        vector = excluded.vector,
+        updated_at = now()
+    """
+)
+
+# Кандидаты поиска: текущие версии резюме (owner — соискатель) и активные вакансии.
+# Пустой вектор — текст не извлёкся; такие строки в поиск не попадают.
+_SEARCHABLE_SQL = {
+    RESUME: """
+        FROM embeddings e
+        JOIN applicant_resume_versions rv ON rv.id = e.ref_id AND rv.is_current
+        WHERE e.kind = 'resume' AND e.model = :model AND cardinality(e.vector) > 0
+    """,
+    VACANCY: """
+        FROM embeddings e
+        JOIN vacancies v ON v.id = e.ref_id AND v.status = 'active'
+        WHERE e.kind = 'vacancy' AND e.model = :model AND cardinality(e.vector) > 0
+    """,
+}
+_OWNER = {RESUME: "rv.applicant_id", VACANCY: "v.id"}
+
+
+def require_encoder():
+    encoder = get_encoder()
+    if encoder is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Семантический поиск не настроен (EMBEDDINGS_MODEL_DIR)",
+        )
+    return encoder
+
+
+def _embed_rows(kind: str, rows, encoder) -> list[dict]:
+    """Закодировать строки (id, body, content_hash) одной пачкой; для резюме body — путь к файлу."""
+    ids, texts, hashes, failed = [], [], [], []
+    for ref_id, body, content_hash in rows:
+        if kind == RESUME:
+            try:
+                body = _extract_text_from_file(body)
+            except Exception as e:
+                # помечаем пустым вектором, чтобы не разбирать битый файл на каждом проходе
+                logger.warning(f"Resume version {ref_id} text extraction failed: {getattr(e, 'detail', e)}")
+                failed.append({"kind": kind, "ref_id": ref_id, "model": encoder.name, "content_hash": content_hash, "vector": []})
+                continue
+        ids.append(ref_id)
+        texts.append(body or "")
+        hashes.append(content_hash)
+
+    vectors = encoder.encode(texts) if texts else []
+    EMBEDDINGS_COMPUTED.labels(kind).inc(len(texts))
+    return failed + [
+        {"kind": kind, "ref_id": ref_id, "model": encoder.name, "content_hash": content_hash, "vector": vector.tolist()}
+        for ref_id, content_hash, vector in zip(ids, hashes, vectors)
+    ]
+
+
+def _save(rows: list[dict]) -> None:
+    if rows:
+        with engine.begin() as conn:
+            conn.execute(_UPSERT_SQL, rows)
+
+
+def sync_embeddings(kind: str, limit: int = EMBEDDINGS_SYNC_BATCH, encoder=None) -> int:
+    """Докодировать до limit устаревших объектов вида kind. Возвращает, сколько обработано."""
+    encoder = encoder or require_encoder()
+    sql = text(_STALE_SQL[kind].format(where=_STALE_WHERE[kind][0]))
+    with engine.connect() as conn:
+        rows = conn.execute(sql, {"model": encoder.name, "limit": limit}).all()
+    _save(_embed_rows(kind, rows, encoder))
+    return len(rows)
+
+
+def query_vector(db: Session, kind: str, ref_id: int, encoder):
+    """Вектор объекта запроса: из кэша, а если его нет или текст изменился — посчитать и сохранить."""
+    sql = text(_STALE_SQL[kind].format(where=_STALE_WHERE[kind][1]))
+    stale = db.execute(sql, {"model": encoder.name, "limit": 1, "ref_id": ref_id}).all()
+    if stale:
+        rows = _embed_rows(kind, stale, encoder)
+        _save(rows)
+        vector = rows[0]["vector"]
+    else:
+        vector = db.execute(
+            text("SELECT vector FROM embeddings WHERE kind = :kind AND model = :model AND ref_id = :ref_id"),
+            {"kind": kind, "model": encoder.name, "ref_id": ref_id},
+        ).scalar()
+    if not vector:
+        return None
+    # numpy — только при поиске: старт воркера его не импортирует (benchmarks.bench_startup)
+    import numpy as np
+    return np.asarray(vector, dtype=np.float32)
+
+
+@dataclass
+class VectorIndex:
+    """Векторы одного вида в памяти процесса: ref_id, owner и нормализованная матрица."""
+    kind: str
+    ref_ids: object = None
+    owners: object = None
+    matrix: object = None
+    fingerprint: tuple | None = None
+    checked_at: float = 0.0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def refresh(self, db: Session, model: str) -> None:
+        if time.monotonic() - self.checked_at < EMBEDDINGS_INDEX_TTL and self.matrix is not None:
+            return
+        with self.lock:
+            if time.monotonic() - self.checked_at < EMBEDDINGS_INDEX_TTL and self.matrix is not None:
+                return
+            searchable = _SEARCHABLE_SQL[self.kind]
+            params = {"model": model}
+            fingerprint = tuple(db.execute(text(f"SELECT count(*), max(e.updated_at) {searchable}"), params).one())
+            if fingerprint != self.fingerprint:
+                import numpy as np
+                rows = db.execute(text(f"SELECT e.ref_id, {_OWNER[self.kind]}, e.vector {searchable}"), params).all()
+                self.ref_ids = np.array([r[0] for r in rows], dtype=np.int64)
+                self.owners = np.array([r[1] for r in rows], dtype=np.int64)
+                self.matrix = np.array([r[2] for r in rows], dtype=np.float32) if rows else None
+                self.fingerprint = fingerprint
+            self.checked_at = time.monotonic()
+
+    def search(self, vector, limit: int, exclude_owners=()) -> list[tuple[int, int, float]]:
+        if self.matrix is None:
+            return []
+        import numpy as np
+        scores = self.matrix @ vector
+        if exclude_owners:
+            scores[np.isin(self.owners, list(exclude_owners))] = -np.inf
+        k = min(limit, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            (int(self.ref_ids[i]), int(self.owners[i]), float(scores[i]))
+            for i in top if np.isfinite(scores[i])
+        ]
+
+
+_indexes = {kind: VectorIndex(kind) for kind in (RESUME, VACANCY)}
+_pgvector: bool | None = None
+
+
+def _use_pgvector(db: Session) -> bool:
+    global _pgvector
+    if EMBEDDINGS_INDEX in ("numpy", "pgvector"):
+        return EMBEDDINGS_INDEX == "pgvector"
+    if _pgvector is None:
+        _pgvector = db.execute(text("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'vector')")).scalar()
+    return _pgvector
+
+
+def _search_pgvector(db: Session, kind: str, model: str, vector, limit: int, exclude_owners) -> list[tuple[int, int, float]]:
+    owner = _OWNER[kind]
+    rows = db.execute(
+        text(
+            f"""
+            SELECT e.ref_id, {owner}, 1 - (e.vector::vector <=> CAST(:q AS vector)) AS score
+            {_SEARCHABLE_SQL[kind]} AND NOT ({owner} = ANY(:exclude))
+            ORDER BY e.vector::vector <=> CAST(:q AS vector)
+            LIMIT :limit
+            """
+        ),
+        {"model": model, "q": "[" + ",".join(map(str, vector.tolist())) + "]", "exclude": list(exclude_owners), "limit": limit},
+    ).all()
+    return [(ref_id, owner_id, float(score)) for ref_id, owner_id, score in rows]
+
+
+def search_similar(db: Session, kind: str, vector, limit: int, encoder, exclude_owners=()) -> list[tuple[int, int, float]]:
+    """Ближайшие объекты вида kind: [(ref_id, owner_id, similarity)] по убыванию близости."""
+    started = time.perf_counter()
+    if _use_pgvector(db):
+        backend = "pgvector"
+        hits = _search_pgvector(db, kind, encoder.name, vector, limit, exclude_owners)
+    else:
+        backend = "numpy"
+        index = _indexes[kind]
+        index.refresh(db, encoder.name)
+        hits = index.search(vector, limit, exclude_owners)
+    SEMANTIC_SEARCH_LATENCY.labels(kind, backend).observe(time.perf_counter() - started)
+    return hits
+
+
+class EmbeddingSyncer:
+    def __init__(self, interval: float = EMBEDDINGS_SYNC_SECONDS):
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._sync_forever(), name="embedding-syncer")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _sync_forever(self) -> None:
+        # модель грузится в потоке: старт приложения её не ждёт
+        encoder = await asyncio.to_thread(get_encoder)
+        if encoder is None:
+            return
+        while True:
+            processed = 0
+            for kind in (VACANCY, RESUME):
+                try:
+                    processed += await asyncio.to_thread(sync_embeddings, kind, EMBEDDINGS_SYNC_BATCH, encoder)
+                except Exception as e:
+                    logger.warning(f"{kind} embeddings sync failed: {e}")
+            # полная пачка — вероятно, есть ещё: следующий проход сразу
+            if processed < EMBEDDINGS_SYNC_BATCH:
+                await asyncio.sleep(self.interval)
+
+
+embedding_syncer = EmbeddingSyncer()
@@ -13,6 +13,12 @@ DB_PORT = os.getenv("DB_PORT")
 if not all([DB_USER, DB_PASS, DB_HOST, DB_PORT, DB_NAME]):
     raise ValueError("Не все переменные окружения для подключения к базе данных заданы.")
 
+# Необязательная реплика для чтения (те же имя БД, пользователь и пароль)
+DB_REPLICA_HOST = os.getenv("DB_REPLICA_HOST")
+DB_REPLICA_PORT = os.getenv("DB_REPLICA_PORT", DB_PORT)
+# Сколько секунд после записи чтения пользователя идут в primary (read-your-writes)
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+
 SECRET_KEY_AUTH=os.getenv("SECRET_KEY_AUTH")
 ALGORITHM=os.getenv("ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES=os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES")
\ No newline at end of file
@@ -1,19 +1,143 @@
 
-from sqlalchemy import create_engine
+import hashlib
+import hmac
+import math
+import time
+
+import jwt
+from fastapi import Request, Response
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 
-from .config import DB_USER, DB_PASS, DB_HOST, DB_NAME, DB_PORT
+from .config import (
+    ALGORITHM,
+    DB_USER,
+    DB_PASS,
+    DB_HOST,
+    DB_NAME,
+    DB_PORT,
+    DB_REPLICA_HOST,
+    DB_REPLICA_PORT,
+    READ_YOUR_WRITES_SECONDS,
+    SECRET_KEY_AUTH,
+)
+from .metrics import DB_READ_SESSIONS
 
 DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
 engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(bind=engine)
 
+#* Реплика для чтения: без DB_REPLICA_HOST все чтения идут в primary
+if DB_REPLICA_HOST:
+    REPLICA_DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASS}@{DB_REPLICA_HOST}:{DB_REPLICA_PORT}/{DB_NAME}"
+    replica_engine = create_engine(REPLICA_DATABASE_URL, pool_pre_ping=True)
+    ReplicaSessionLocal = sessionmaker(bind=replica_engine)
+else:
+    replica_engine = None
+    ReplicaSessionLocal = None
+
 Base = declarative_base()
 
-def get_session():
+
+# Окно read-your-writes хранит клиент: после записи ответ несёт подписанный токен со сроком
+# READ_YOUR_WRITES_SECONDS (cookie и заголовок), и следующее чтение с ним идёт в primary,
+# в какой бы воркер или под оно ни попало. Клиенты без cookie возвращают заголовок сами.
+# Токен подписывается отдельным ключом, производным от SECRET_KEY_AUTH: он отдаётся в заголовке
+# и не должен проходить как access-токен (а access-токен — как этот).
+READ_YOUR_WRITES_COOKIE = "rw_primary"
+READ_YOUR_WRITES_HEADER = "X-Read-Your-Writes"
+_READ_YOUR_WRITES_SCOPE = "read_your_writes"
+_READ_YOUR_WRITES_KEY = hmac.new((SECRET_KEY_AUTH or "").encode(), _READ_YOUR_WRITES_SCOPE.encode(), hashlib.sha256).hexdigest()
+_READ_YOUR_WRITES_ALGORITHM = "HS256"
+
+
+def mark_primary_sticky(response: Response, user_id: int) -> None:
+    expires = math.ceil(time.time() + READ_YOUR_WRITES_SECONDS)
+    token = jwt.encode(
+        {"id": user_id, "scope": _READ_YOUR_WRITES_SCOPE, "exp": expires},
+        _READ_YOUR_WRITES_KEY,
+        algorithm=_READ_YOUR_WRITES_ALGORITHM,
+    )
+    response.set_cookie(READ_YOUR_WRITES_COOKIE, token, max_age=math.ceil(READ_YOUR_WRITES_SECONDS), httponly=True, samesite="lax")
+    response.headers[READ_YOUR_WRITES_HEADER] = token
+
+
+def is_primary_sticky(request: Request, user_id: int | None) -> bool:
+    token = request.cookies.get(READ_YOUR_WRITES_COOKIE) or request.headers.get(READ_YOUR_WRITES_HEADER)
+    if user_id is None or not token:
+        return False
+    try:
+        payload = jwt.decode(token, _READ_YOUR_WRITES_KEY, algorithms=[_READ_YOUR_WRITES_ALGORITHM])
+    except jwt.PyJWTError:
+        return False
+    return payload.get("scope") == _READ_YOUR_WRITES_SCOPE and payload.get("id") == user_id
+
+
+def _request_user_id(request: Request) -> int | None:
+    """ID пользователя из Bearer-токена без похода в БД (подпись проверяется, срок — нет)."""
+    header = request.headers.get("authorization", "")
+    if not header.lower().startswith("bearer "):
+        return None
+    try:
+        payload = jwt.decode(header[7:], SECRET_KEY_AUTH, algorithms=[ALGORITHM], options={"verify_exp": False})
+    except jwt.PyJWTError:
+        return None
+    if "scope" in payload:
+        return None
+    return payload.get("id")
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _mark_flush_write(session, flush_context):
+    session.info["wrote"] = True
+
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _mark_statement_write(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["wrote"] = True
+
+
+@event.listens_for(SessionLocal, "before_commit")
+def _mark_raw_sql_write(session):
+    # запись через text() (INSERT ... ON CONFLICT и т. п.) ORM-событиями не видна:
+    # транзакция, получившая txid, что-то изменила. Проверяется только в HTTP-запросах
+    if session.info.get("wrote") or session.info.get("response") is None or session.info.get("user_id") is None:
+        return
+    if session.in_transaction() and session.execute(text("SELECT txid_current_if_assigned() IS NOT NULL")).scalar():
+        session.info["wrote"] = True
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _stick_writer_to_primary(session):
+    response = session.info.get("response")
+    if session.info.pop("wrote", False) and response is not None and session.info.get("user_id") is not None:
+        mark_primary_sticky(response, session.info["user_id"])
+
+
+def get_session(request: Request, response: Response):
     db = SessionLocal()
+    db.info["user_id"] = _request_user_id(request)
+    db.info["response"] = response
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_read_session(request: Request):
+    """
+    Сессия для read-only обработчиков: реплика, если она настроена и пользователь
+    не писал в последние READ_YOUR_WRITES_SECONDS секунд, иначе primary.
+    """
+    if ReplicaSessionLocal is None or is_primary_sticky(request, _request_user_id(request)):
+        DB_READ_SESSIONS.labels("primary").inc()
+        db: Session = SessionLocal()
+    else:
+        DB_READ_SESSIONS.labels("replica").inc()
+        db = ReplicaSessionLocal()
     try:
         yield db
     finally:
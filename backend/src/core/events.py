@@ -0,0 +1,105 @@
+"""
+Раздача событий откликов (JobApplicationEvent) подписчикам в реальном времени.
+
+Вставка в job_application_events вызывает триггер с pg_notify (миграция
+3f9c2b7d1e84), поэтому событие видят все воркеры бэкенда. В каждом процессе
+EventBroker держит одно отдельное соединение с LISTEN и раскладывает
+уведомления по очередям подписчиков — соискателя и HR, которым принадлежит отклик.
+"""
+import asyncio
+import json
+import logging
+import os
+from collections import defaultdict
+
+import psycopg2
+import psycopg2.extensions
+
+from .database import DATABASE_URL
+
+logger = logging.getLogger(__name__)
+
+EVENTS_CHANNEL = "job_application_events"
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "100"))
+EVENTS_RECONNECT_DELAY = float(os.getenv("EVENTS_RECONNECT_DELAY", "2"))
+
+
+class EventBroker:
+    def __init__(self, dsn: str = DATABASE_URL, channel: str = EVENTS_CHANNEL):
+        self.dsn = dsn
+        self.channel = channel
+        self._subscribers: dict[int, set[asyncio.Queue]] = defaultdict(set)
+        self._task: asyncio.Task | None = None
+
+    def subscribe(self, user_id: int) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=EVENTS_QUEUE_SIZE)
+        self._subscribers[user_id].add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(user_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[user_id]
+
+    def publish(self, event: dict) -> None:
+        for user_id in {event.get("applicantUserId"), event.get("hrUserId")}:
+            for queue in self._subscribers.get(user_id, ()):
+                if queue.full():
+                    # медленный клиент: выбрасываем самое старое, он дочитает пропуск по Last-Event-ID
+                    queue.get_nowait()
+                queue.put_nowait(event)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen_forever(), name="event-broker")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _listen_forever(self) -> None:
+        while True:
+            try:
+                await self._listen()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Event listener disconnected: {e}")
+            await asyncio.sleep(EVENTS_RECONNECT_DELAY)
+
+    async def _listen(self) -> None:
+        loop = asyncio.get_running_loop()
+        conn = await loop.run_in_executor(None, psycopg2.connect, self.dsn)
+        try:
+            conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+            with conn.cursor() as cursor:
+                cursor.execute(f"LISTEN {self.channel}")
+            logger.info(f"Listening for {self.channel}")
+
+            ready = asyncio.Event()
+            loop.add_reader(conn.fileno(), ready.set)
+            try:
+                while True:
+                    await ready.wait()
+                    ready.clear()
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        try:
+                            self.publish(json.loads(notify.payload))
+                        except ValueError:
+                            logger.warning(f"Bad event payload: {notify.payload!r}")
+            finally:
+                loop.remove_reader(conn.fileno())
+        finally:
+            conn.close()
+
+
+broker = EventBroker()
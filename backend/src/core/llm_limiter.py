@@ -0,0 +1,142 @@
+"""
+Глобальный лимитер вызовов LLM (Groq) для всех процессов бэкенда.
+
+Лимиты провайдера — запросы и токены в минуту — представлены token bucket'ами
+в таблице llm_rate_limits (миграция 9d4b2f61a8e3). Вызов не опрашивает бакет,
+а резервирует слот одним UPSERT: ёмкость пополняется по прошедшему времени,
+стоимость вычитается сразу, и остаток может уйти в минус. Минус — это очередь:
+-tokens / скорость пополнения = сколько секунд ждать до своего слота. Строка
+бакета блокируется только на время UPSERT, поэтому резервирование атомарно
+между воркерами без отдельного координатора.
+
+Та же величина служит admission control: если очередь длиннее LLM_ADMISSION_MAX_WAIT
+секунд, новые задачи не принимаются (admission_backlog()).
+"""
+import asyncio
+import logging
+import os
+from dataclasses import dataclass
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+from sqlalchemy.types import String
+from starlette.concurrency import run_in_threadpool
+
+from .database import engine
+from .metrics import LLM_QUEUED, LLM_THROTTLED, LLM_WAIT
+
+logger = logging.getLogger(__name__)
+
+# 0 — лимит отключён
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "30"))
+LLM_TOKENS_PER_MINUTE = float(os.getenv("LLM_TOKENS_PER_MINUTE", "6000"))
+LLM_ADMISSION_MAX_WAIT = float(os.getenv("LLM_ADMISSION_MAX_WAIT", "600"))
+
+
+@dataclass(frozen=True)
+class Bucket:
+    name: str
+    per_minute: float
+
+    @property
+    def capacity(self) -> float:
+        # всплеск не больше минутного лимита провайдера
+        return self.per_minute
+
+    @property
+    def rate(self) -> float:
+        return self.per_minute / 60.0
+
+    def wait_for(self, tokens: float) -> float:
+        return max(0.0, -tokens / self.rate)
+
+
+REQUESTS = Bucket("groq:requests", LLM_REQUESTS_PER_MINUTE)
+TOKENS = Bucket("groq:tokens", LLM_TOKENS_PER_MINUTE)
+
+_RESERVE_SQL = text(
+    """
+    INSERT INTO llm_rate_limits AS b (name, tokens, updated_at)
+    VALUES (:name, :capacity - :cost, clock_timestamp())
+    ON CONFLICT (name) DO UPDATE SET
+        tokens = least(
+            :capacity,
+            b.tokens + extract(epoch FROM clock_timestamp() - b.updated_at) * :rate
+        ) - :cost,
+        updated_at = clock_timestamp()
+    RETURNING tokens
+    """
+)
+
+_PEEK_SQL = text(
+    """
+    SELECT name, tokens, extract(epoch FROM clock_timestamp() - updated_at)::float8 AS age
+    FROM llm_rate_limits
+    WHERE name = ANY(:names)
+    """
+).bindparams(bindparam("names", type_=ARRAY(String)))
+
+
+def _active(buckets) -> list[Bucket]:
+    return [b for b in buckets if b.per_minute > 0]
+
+
+def reserve(costs: dict[Bucket, float]) -> float:
+    """
+    Зарезервировать стоимость вызова во всех бакетах; вернуть, сколько секунд
+    подождать до вызова (0 — можно сразу). Бакеты с лимитом 0 пропускаются.
+    """
+    active = sorted(_active(costs), key=lambda b: b.name)
+    if not active:
+        return 0.0
+    wait = 0.0
+    # одна транзакция, бакеты в порядке имени — без взаимных блокировок между воркерами
+    with engine.begin() as conn:
+        for bucket in active:
+            tokens = conn.execute(
+                _RESERVE_SQL,
+                {"name": bucket.name, "capacity": bucket.capacity, "rate": bucket.rate, "cost": costs[bucket]},
+            ).scalar_one()
+            wait = max(wait, bucket.wait_for(tokens))
+    return wait
+
+
+def admission_backlog(db: Session | None = None, buckets=(REQUESTS, TOKENS)) -> float:
+    """
+    Очередь к LLM в секундах ожидания по самому загруженному бакету (один SELECT).
+    С db запрос идёт в уже открытой сессии обработчика.
+    """
+    active = {b.name: b for b in _active(buckets)}
+    if not active:
+        return 0.0
+    params = {"names": list(active)}
+    if db is not None:
+        rows = db.execute(_PEEK_SQL, params).all()
+    else:
+        with engine.connect() as conn:
+            rows = conn.execute(_PEEK_SQL, params).all()
+    return max(
+        (active[name].wait_for(min(active[name].capacity, tokens + age * active[name].rate)) for name, tokens, age in rows),
+        default=0.0,
+    )
+
+
+async def wait_for_slot(operation: str, costs: dict[Bucket, float]) -> None:
+    """Зарезервировать слот и дождаться его, не занимая поток threadpool."""
+    try:
+        wait = await run_in_threadpool(reserve, costs)
+    except Exception as e:
+        # без БД лимитер не должен останавливать оценку: лимиты провайдера всё равно сработают
+        logger.warning(f"LLM limiter unavailable, calling without reservation: {e}")
+        wait = 0.0
+
+    LLM_WAIT.labels(operation).observe(wait)
+    if wait <= 0:
+        return
+    LLM_THROTTLED.labels(operation).inc()
+    LLM_QUEUED.labels(operation).inc()
+    try:
+        await asyncio.sleep(wait)
+    finally:
+        LLM_QUEUED.labels(operation).dec()
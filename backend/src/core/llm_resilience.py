@@ -0,0 +1,232 @@
+"""
+Устойчивость вызовов LLM: дедлайн на вызов, повторы с jitter, circuit breaker и цепочка провайдеров.
+
+call_with_fallback(providers, call, operation) пробует провайдеров по порядку
+(CV_EVAL_MODELS — основная модель и запасные, у каждой может быть свой base URL
+Groq-совместимого API). Каждый вызов ограничен LLM_CALL_TIMEOUT секунд, вся цепочка —
+LLM_CALL_DEADLINE. Повторяемые ошибки (таймаут, обрыв соединения, 408/409/429/5xx)
+повторяются до LLM_CALL_RETRIES раз с экспоненциальной задержкой и полным jitter
+(Retry-After провайдера учитывается); ошибка в самом запросе (400, 401, ...) сразу
+передаёт ход следующему провайдеру.
+
+У каждого провайдера свой CircuitBreaker: после LLM_BREAKER_FAILURES повторяемых ошибок
+подряд он открывается, и LLM_BREAKER_COOLDOWN секунд к провайдеру не идёт ни одного
+запроса; затем один пробный вызов (half-open) закрывает его или открывает снова.
+Если ни один провайдер не ответил из-за сбоя, а не из-за ошибки в запросе, поднимается
+ProvidersUnavailable с retry_after — вызывающий код откладывает задачу, а не пишет ошибку.
+Состояние breaker'ов живёт в памяти процесса: каждый воркер сам замечает отказ провайдера.
+"""
+import logging
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional, TypeVar
+
+from .metrics import LLM_BREAKER_STATE, LLM_CALLS
+
+logger = logging.getLogger(__name__)
+
+LLM_CALL_TIMEOUT = float(os.getenv("LLM_CALL_TIMEOUT", "60"))
+LLM_CALL_DEADLINE = float(os.getenv("LLM_CALL_DEADLINE", "180"))
+LLM_CALL_RETRIES = int(os.getenv("LLM_CALL_RETRIES", "2"))
+LLM_RETRY_BACKOFF = float(os.getenv("LLM_RETRY_BACKOFF", "1"))
+LLM_RETRY_BACKOFF_MAX = float(os.getenv("LLM_RETRY_BACKOFF_MAX", "20"))
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "60"))
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+# имена классов groq / httpx: повторяемые ошибки распознаются без импорта SDK
+_RETRYABLE_CLASSES = {"APIConnectionError", "APITimeoutError", "TransportError", "TimeoutException"}
+
+T = TypeVar("T")
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = LLM_BREAKER_FAILURES, cooldown: float = LLM_BREAKER_COOLDOWN):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        LLM_BREAKER_STATE.labels(name).set(_STATE_VALUES[CLOSED])
+
+    def _set_state(self, state: str) -> None:
+        if state != self._state:
+            logger.warning(f"LLM circuit breaker {self.name}: {self._state} -> {state}")
+        self._state = state
+        LLM_BREAKER_STATE.labels(self.name).set(_STATE_VALUES[state])
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+            self._set_state(HALF_OPEN)
+        return self._state
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def allow(self) -> bool:
+        """Можно ли вызвать провайдера; в half-open пропускается один пробный вызов."""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def retry_after(self) -> float:
+        """Через сколько секунд провайдер снова примет вызов (0 — уже сейчас)."""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return 0.0
+            if state == HALF_OPEN:
+                # пробный вызов уже идёт — его результат станет известен скоро
+                return 1.0 if self._probe_in_flight else 0.0
+            return max(0.0, self.cooldown - (time.monotonic() - self._opened_at))
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._probe_in_flight = False
+            self._set_state(CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._set_state(OPEN)
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+
+@dataclass(frozen=True)
+class Provider:
+    model: str
+    base_url: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        return f"{self.model}@{self.base_url}" if self.base_url else self.model
+
+
+def parse_providers(spec: str) -> list[Provider]:
+    """'qwen/qwen3-32b, llama-3.3-70b-versatile@http://llm-backup:8080' -> [Provider, ...]"""
+    providers = []
+    for item in spec.split(","):
+        model, _, base_url = item.strip().partition("@")
+        if model:
+            providers.append(Provider(model=model, base_url=base_url or None))
+    return providers
+
+
+class ProvidersUnavailable(Exception):
+    """Ни один провайдер не ответил из-за сбоя; повторить не раньше чем через retry_after секунд."""
+
+    def __init__(self, retry_after: float, last_error: Optional[BaseException] = None):
+        self.retry_after = retry_after
+        self.last_error = last_error
+        super().__init__(f"LLM providers unavailable, retry in {retry_after:.0f}s: {last_error}")
+
+
+def is_retryable(exc: BaseException) -> bool:
+    status = getattr(exc, "status_code", None)
+    if isinstance(status, int):
+        return status in (408, 409, 429) or status >= 500
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    return any(cls.__name__ in _RETRYABLE_CLASSES for cls in type(exc).__mro__)
+
+
+def _retry_after_header(exc: BaseException) -> float:
+    response = getattr(exc, "response", None)
+    try:
+        return float(response.headers.get("retry-after", 0))
+    except (AttributeError, TypeError, ValueError):
+        return 0.0
+
+
+def call_with_fallback(
+    providers: list[Provider],
+    call: Callable[[Provider, float], T],
+    operation: str,
+    timeout: float = LLM_CALL_TIMEOUT,
+    deadline: float = LLM_CALL_DEADLINE,
+    retries: int = LLM_CALL_RETRIES,
+    backoff: float = LLM_RETRY_BACKOFF,
+    backoff_max: float = LLM_RETRY_BACKOFF_MAX,
+) -> tuple[T, Provider]:
+    """
+    call(provider, timeout) по цепочке провайдеров; вернуть результат и ответившего провайдера.
+    Ошибки запроса у всех провайдеров — поднимается последняя; сбой хотя бы у одного — ProvidersUnavailable.
+    """
+    if not providers:
+        raise ValueError("Цепочка провайдеров LLM пуста")
+
+    started = time.monotonic()
+    unavailable: list[float] = []
+    last_error: Optional[BaseException] = None
+
+    for provider in providers:
+        breaker = get_breaker(provider.name)
+        for attempt in range(retries + 1):
+            remaining = deadline - (time.monotonic() - started)
+            if remaining <= 0:
+                unavailable.append(backoff_max)
+                break
+            if not breaker.allow():
+                LLM_CALLS.labels(operation, provider.name, "short_circuit").inc()
+                unavailable.append(breaker.retry_after())
+                break
+            try:
+                result = call(provider, min(timeout, remaining))
+            except Exception as e:
+                last_error = e
+                if not is_retryable(e):
+                    # провайдер ответил — он жив, ошибка в самом запросе: пробуем следующего
+                    breaker.record_success()
+                    LLM_CALLS.labels(operation, provider.name, "error").inc()
+                    logger.warning(f"LLM {provider.name} rejected {operation}: {e}")
+                    break
+                breaker.record_failure()
+                LLM_CALLS.labels(operation, provider.name, "retryable_error").inc()
+                logger.warning(f"LLM {provider.name} failed {operation}, attempt {attempt + 1}: {e}")
+                if attempt == retries:
+                    unavailable.append(breaker.retry_after() or backoff_max)
+                    break
+                # полный jitter: повторы разных воркеров не приходят к провайдеру одной волной
+                delay = random.uniform(0, min(backoff_max, backoff * 2 ** attempt))
+                delay = max(delay, min(_retry_after_header(e), backoff_max))
+                if time.monotonic() - started + delay >= deadline:
+                    unavailable.append(backoff_max)
+                    break
+                time.sleep(delay)
+                continue
+            breaker.record_success()
+            LLM_CALLS.labels(operation, provider.name, "ok").inc()
+            return result, provider
+
+    if unavailable:
+        raise ProvidersUnavailable(max(1.0, min(unavailable)), last_error) from last_error
+    raise last_error
@@ -0,0 +1,295 @@
+import os
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+UNMATCHED_ROUTE = "unmatched"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (128, 512, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "Количество HTTP-запросов",
+    ["method", "route", "status"],
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Время обработки HTTP-запроса",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP-запросы в обработке",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+HTTP_REQUEST_SIZE = Histogram(
+    "http_request_size_bytes",
+    "Размер тела запроса",
+    ["method", "route"],
+    buckets=SIZE_BUCKETS,
+)
+HTTP_RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes",
+    "Размер тела ответа",
+    ["method", "route"],
+    buckets=SIZE_BUCKETS,
+)
+HTTP_DB_TIME = Histogram(
+    "http_request_db_seconds",
+    "Суммарное время SQL-запросов за HTTP-запрос",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "Количество SQL-запросов за HTTP-запрос",
+    ["method", "route"],
+    buckets=(1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+DB_READ_SESSIONS = Counter(
+    "db_read_sessions_total",
+    "Сессии read-only обработчиков по базе: replica или primary (нет реплики / окно после записи)",
+    ["target"],
+)
+VIDEOSDK_ROOM_CREATE_LATENCY = Histogram(
+    "videosdk_room_create_seconds",
+    "Время создания комнаты в VideoSDK",
+    buckets=LATENCY_BUCKETS,
+)
+VIDEOSDK_ROOMS_ASSIGNED = Counter(
+    "videosdk_rooms_assigned_total",
+    "Комнаты, выданные откликам: из пула (pool) или созданные на месте (direct)",
+    ["source"],
+)
+VIDEOSDK_JOIN_TOKENS = Counter(
+    "videosdk_join_tokens_total",
+    "Выданные join-token VideoSDK: подписанные заново (signed) или из кэша (cached)",
+    ["result"],
+)
+HIRING_FUNNEL_REFRESH_LATENCY = Histogram(
+    "hiring_funnel_refresh_seconds",
+    "Время REFRESH MATERIALIZED VIEW hiring_funnel_stats",
+    buckets=LATENCY_BUCKETS,
+)
+LLM_WAIT = Histogram(
+    "llm_rate_limit_wait_seconds",
+    "Ожидание слота глобального лимитера LLM перед вызовом",
+    ["operation"],
+    buckets=(0.0, 1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0),
+)
+LLM_THROTTLED = Counter(
+    "llm_throttled_total",
+    "Вызовы LLM, отложенные лимитером (слот не сразу)",
+    ["operation"],
+)
+LLM_QUEUED = Gauge(
+    "llm_queued",
+    "Вызовы LLM, ждущие своего слота",
+    ["operation"],
+    multiprocess_mode="livesum",
+)
+LLM_ADMISSION_REJECTED = Counter(
+    "llm_admission_rejected_total",
+    "Задачи, не принятые из-за длинной очереди к LLM",
+    ["operation"],
+)
+OUTBOX_MESSAGES = Counter(
+    "outbox_messages_total",
+    "Обработанные сообщения outbox: done, retry (повтор позже) или dead (попытки исчерпаны)",
+    ["kind", "result"],
+)
+OUTBOX_LAG = Histogram(
+    "outbox_lag_seconds",
+    "Время от записи сообщения outbox до успешной обработки",
+    ["kind"],
+    buckets=LATENCY_BUCKETS + (30.0, 60.0, 300.0),
+)
+EVENT_PARTITIONS = Counter(
+    "job_application_event_partitions_total",
+    "Обслуживание партиций job_application_events: created (новые месяцы) и archived (отсоединены в archive)",
+    ["action"],
+)
+EMBEDDINGS_COMPUTED = Counter(
+    "embeddings_computed_total",
+    "Тексты, закодированные локальной моделью эмбеддингов (кэш-промахи)",
+    ["kind"],
+)
+SEMANTIC_SEARCH_LATENCY = Histogram(
+    "semantic_search_seconds",
+    "Время поиска похожих резюме / вакансий по векторам",
+    ["kind", "backend"],
+    buckets=LATENCY_BUCKETS,
+)
+CV_PRESCORE_DECISIONS = Counter(
+    "cv_prescore_decisions_total",
+    "Пре-скоринг резюме: rejected / interview — решено без LLM (вызов сэкономлен), llm — передано модели",
+    ["decision"],
+)
+CV_PRESCORE_CONFIDENCE = Histogram(
+    "cv_prescore_confidence",
+    "Уверенность пре-скорера (0..1); решение без LLM при CV_PRESCORE_CONFIDENCE и выше",
+    buckets=(0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 1.0),
+)
+LLM_CALLS = Counter(
+    "llm_calls_total",
+    "Вызовы LLM по провайдеру: ok, retryable_error (таймаут / 429 / 5xx), error (ошибка запроса), short_circuit (breaker открыт, вызова не было)",
+    ["operation", "provider", "outcome"],
+)
+LLM_BREAKER_STATE = Gauge(
+    "llm_circuit_breaker_state",
+    "Circuit breaker провайдера LLM: 0 — closed, 1 — half-open, 2 — open",
+    ["provider"],
+)
+CV_EVALUATIONS_REQUEUED = Counter(
+    "cv_evaluations_requeued_total",
+    "Оценки резюме, отложенные через outbox, потому что ни один провайдер LLM не ответил",
+)
+CV_EVAL_QUEUE_LATENCY = Histogram(
+    "cv_evaluation_queue_seconds",
+    "Ожидание оценки резюме в очереди от постановки до начала обработки, по приоритету",
+    ["priority"],
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600, 7200),
+)
+CV_EVAL_QUEUE_DEPTH = Gauge(
+    "cv_evaluation_queue_depth",
+    "Оценки резюме в очереди (включая отложенные и выполняемые), по приоритету",
+    ["priority"],
+    multiprocess_mode="livemax",
+)
+CV_EVAL_DEADLINE_MISSED = Counter(
+    "cv_evaluation_deadline_missed_total",
+    "Оценки резюме, взятые в работу уже после своего дедлайна",
+    ["priority"],
+)
+VIDEOSDK_ROOM_POOL_SIZE = Gauge(
+    "videosdk_room_pool_size",
+    "Заранее созданные комнаты VideoSDK в пуле",
+    multiprocess_mode="livesum",
+)
+
+
+@dataclass
+class RequestStats:
+    """Счётчики текущего запроса, которые наполняют хуки SQLAlchemy."""
+    db_time: float = 0.0
+    db_queries: int = 0
+
+
+_request_stats: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+def current_request_stats() -> RequestStats | None:
+    return _request_stats.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_start_time"].pop()
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.db_time += time.perf_counter() - started
+        stats.db_queries += 1
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Подключает учёт времени SQL к движку (идемпотентно)."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _route_template(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware: латентность, размеры запроса/ответа, запросы в работе и
+    время в БД по шаблону маршрута (/hr/vacancies/{vacancy_id}, а не по URL).
+
+    Запрос считается завершённым на последнем чанке ответа, поэтому
+    BackgroundTasks в латентность не попадают.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        started = time.perf_counter()
+        state = {"status": 500, "request_size": 0, "response_size": 0, "done": False}
+        # шаблон маршрута известен только после роутинга, поэтому in-flight — по методу
+        in_progress = HTTP_IN_PROGRESS.labels(method)
+        in_progress.inc()
+
+        def finish():
+            if state["done"]:
+                return
+            state["done"] = True
+            in_progress.dec()
+            route = _route_template(scope)
+            status = str(state["status"])
+            HTTP_REQUESTS.labels(method, route, status).inc()
+            HTTP_LATENCY.labels(method, route, status).observe(time.perf_counter() - started)
+            HTTP_REQUEST_SIZE.labels(method, route).observe(state["request_size"])
+            HTTP_RESPONSE_SIZE.labels(method, route).observe(state["response_size"])
+            HTTP_DB_TIME.labels(method, route).observe(stats.db_time)
+            HTTP_DB_QUERIES.labels(method, route).observe(stats.db_queries)
+
+        async def receive_wrapper():
+            message = await receive()
+            if message["type"] == "http.request":
+                state["request_size"] += len(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                state["response_size"] += len(message.get("body", b""))
+                if not message.get("more_body", False):
+                    await send(message)
+                    finish()
+                    return
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            finish()
+            _request_stats.reset(token)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Текст метрик в формате Prometheus (с учётом нескольких воркеров uvicorn)."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
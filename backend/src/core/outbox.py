@@ -0,0 +1,225 @@
+"""
+Transactional outbox для побочных эффектов смены статуса отклика.
+
+Код, меняющий статус, не ходит во внешние сервисы внутри транзакции, а пишет
+сообщение в таблицу outbox (enqueue) тем же commit'ом — либо сохраняется и
+статус, и намерение, либо ничего. OutboxDispatcher на event loop приложения
+забирает пачки сообщений и выполняет зарегистрированные обработчики вне транзакции:
+
+    @outbox_handler("interview_room")
+    def create_interview_room(payload: dict) -> None: ...
+
+Сообщение захватывается коротким UPDATE с арендой (available_at = now() + OUTBOX_LEASE_SECONDS,
+FOR UPDATE SKIP LOCKED), поэтому несколько воркеров бэкенда не берут одно и то же, а
+сообщение упавшего воркера вернётся в работу после аренды. Ошибка — повтор с
+экспоненциальной задержкой, после OUTBOX_MAX_ATTEMPTS попыток — статус dead.
+Доставка «как минимум один раз»: обработчики должны быть идемпотентными.
+"""
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+from sqlalchemy.types import BigInteger
+
+from .database import engine
+from .metrics import OUTBOX_LAG, OUTBOX_MESSAGES
+from ..models.models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "1"))
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "20"))
+OUTBOX_LEASE_SECONDS = float(os.getenv("OUTBOX_LEASE_SECONDS", "60"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_MAX_BACKOFF = float(os.getenv("OUTBOX_MAX_BACKOFF", "300"))
+OUTBOX_RETENTION_HOURS = float(os.getenv("OUTBOX_RETENTION_HOURS", "72"))
+
+_handlers: dict[str, Callable[[dict], None]] = {}
+
+
+def outbox_handler(kind: str):
+    """Регистрирует обработчик сообщений вида kind (синхронная функция от payload)."""
+    def register(fn: Callable[[dict], None]) -> Callable[[dict], None]:
+        _handlers[kind] = fn
+        return fn
+    return register
+
+
+def enqueue(db: Session, kind: str, payload: dict) -> None:
+    """Добавить сообщение в транзакцию db; запишется вместе с её commit."""
+    db.add(OutboxMessage(kind=kind, payload=payload))
+
+
+@dataclass
+class ClaimedMessage:
+    id: int
+    kind: str
+    payload: dict
+    attempts: int
+    created_at: datetime
+
+
+_CLAIM_SQL = text(
+    """
+    UPDATE outbox SET
+        attempts = attempts + 1,
+        available_at = now() + make_interval(secs => :lease)
+    WHERE id IN (
+        SELECT id FROM outbox
+        WHERE status = 'pending' AND available_at <= now()
+        ORDER BY available_at, id
+        LIMIT :batch
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, kind, payload, attempts, created_at
+    """
+)
+
+_DONE_SQL = text(
+    """
+    UPDATE outbox SET status = 'done', processed_at = now(), last_error = NULL
+    WHERE id = ANY(:ids)
+    RETURNING kind, extract(epoch FROM processed_at - created_at)::float8
+    """
+).bindparams(bindparam("ids", type_=ARRAY(BigInteger)))
+
+_RETRY_SQL = text(
+    """
+    UPDATE outbox SET
+        status = CASE WHEN attempts >= :max_attempts THEN 'dead' ELSE 'pending' END,
+        available_at = now() + make_interval(secs => :delay),
+        processed_at = CASE WHEN attempts >= :max_attempts THEN now() END,
+        last_error = :error
+    WHERE id = :id
+    """
+)
+
+_PURGE_SQL = text(
+    "DELETE FROM outbox WHERE status = 'done' AND processed_at < now() - make_interval(secs => :hours * 3600)"
+)
+
+
+def claim(batch_size: int = OUTBOX_BATCH_SIZE) -> list[ClaimedMessage]:
+    with engine.begin() as conn:
+        rows = conn.execute(_CLAIM_SQL, {"lease": OUTBOX_LEASE_SECONDS, "batch": batch_size}).all()
+    return [ClaimedMessage(*row) for row in rows]
+
+
+def run_handler(message: ClaimedMessage) -> str | None:
+    """Выполнить обработчик; None — успех, иначе текст ошибки."""
+    handler = _handlers.get(message.kind)
+    if handler is None:
+        return f"no handler for {message.kind!r}"
+    try:
+        handler(message.payload)
+        return None
+    except Exception as e:
+        logger.warning(f"Outbox message {message.id} ({message.kind}) failed, attempt {message.attempts}: {e}")
+        return str(e) or e.__class__.__name__
+
+
+def finish(messages: list[ClaimedMessage], errors: list[str | None]) -> None:
+    """Отметить результаты пачки: успешные одним UPDATE, неудачные — на повтор или в dead."""
+    done = [m.id for m, error in zip(messages, errors) if error is None]
+    failed = [
+        {
+            "id": m.id,
+            "error": error,
+            "delay": min(2.0 ** m.attempts, OUTBOX_MAX_BACKOFF),
+            "max_attempts": OUTBOX_MAX_ATTEMPTS,
+        }
+        for m, error in zip(messages, errors) if error is not None
+    ]
+    with engine.begin() as conn:
+        if done:
+            for kind, lag in conn.execute(_DONE_SQL, {"ids": done}):
+                OUTBOX_MESSAGES.labels(kind, "done").inc()
+                OUTBOX_LAG.labels(kind).observe(lag)
+        if failed:
+            conn.execute(_RETRY_SQL, failed)
+    for m, error in zip(messages, errors):
+        if error is not None:
+            OUTBOX_MESSAGES.labels(m.kind, "dead" if m.attempts >= OUTBOX_MAX_ATTEMPTS else "retry").inc()
+
+
+def dispatch_pending(batch_size: int = OUTBOX_BATCH_SIZE) -> int:
+    """Синхронно обработать одну пачку (скрипты, отладка). Возвращает размер пачки."""
+    messages = claim(batch_size)
+    if messages:
+        finish(messages, [run_handler(m) for m in messages])
+    return len(messages)
+
+
+def purge_processed(hours: float = OUTBOX_RETENTION_HOURS) -> int:
+    with engine.begin() as conn:
+        return conn.execute(_PURGE_SQL, {"hours": hours}).rowcount
+
+
+class OutboxDispatcher:
+    def __init__(self, poll_interval: float = OUTBOX_POLL_SECONDS, batch_size: int = OUTBOX_BATCH_SIZE):
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self._task: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wakeup: asyncio.Event | None = None
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._dispatch_forever(), name="outbox-dispatcher")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._loop = None
+
+    def wake(self) -> None:
+        """Разбудить диспетчер сразу после commit с новым сообщением (можно из любого потока)."""
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def dispatch_once(self) -> int:
+        messages = await asyncio.to_thread(claim, self.batch_size)
+        if not messages:
+            return 0
+        # обработчики пачки — параллельно в потоках, результаты фиксируются одной транзакцией
+        errors = await asyncio.gather(*(asyncio.to_thread(run_handler, m) for m in messages))
+        await asyncio.to_thread(finish, messages, list(errors))
+        return len(messages)
+
+    async def _dispatch_forever(self) -> None:
+        purged_at = 0.0
+        while True:
+            processed = 0
+            try:
+                processed = await self.dispatch_once()
+                if time.monotonic() - purged_at > 3600:
+                    await asyncio.to_thread(purge_processed)
+                    purged_at = time.monotonic()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Outbox dispatch failed: {e}")
+            # полная пачка — вероятно, есть ещё: сразу следующая
+            if processed < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+
+
+outbox_dispatcher = OutboxDispatcher()
@@ -0,0 +1,92 @@
+"""
+Обслуживание месячных партиций job_application_events.
+
+С миграции f3a8c61e0d45 журнал событий откликов партиционирован по created_at
+помесячно. Партиции создаёт и отсоединяет не бэкенд, а функции в БД
+(ensure_job_application_event_partitions / archive_job_application_event_partitions),
+чтобы то же обслуживание можно было запускать из cron или pg_cron; здесь только
+периодический вызов на старте и раз в EVENTS_PARTITION_MAINTENANCE_SECONDS.
+
+Партиции создаются на EVENTS_PARTITIONS_AHEAD месяцев вперёд; если обслуживание не
+запускалось, вставка всё равно пройдёт в DEFAULT-партицию, а следующий запуск создаст
+партиции этих месяцев и перенесёт в них строки из DEFAULT. Месяцы старше
+EVENTS_RETENTION_MONTHS отсоединяются (DETACH PARTITION) и переносятся в схему
+archive: данные не удаляются, но SSE-replay и воронка найма их больше не видят,
+а выгрузка/удаление архива — отдельная операционная задача.
+"""
+import asyncio
+import logging
+import os
+
+from sqlalchemy import func, select, text
+
+from .database import engine
+from .metrics import EVENT_PARTITIONS
+
+logger = logging.getLogger(__name__)
+
+# 0 — обслуживание из бэкенда выключено (например, если оно запускается по cron)
+EVENTS_PARTITION_MAINTENANCE_SECONDS = float(os.getenv("EVENTS_PARTITION_MAINTENANCE_SECONDS", "86400"))
+EVENTS_PARTITIONS_AHEAD = int(os.getenv("EVENTS_PARTITIONS_AHEAD", "3"))
+# 0 — старые партиции не архивируются
+EVENTS_RETENTION_MONTHS = int(os.getenv("EVENTS_RETENTION_MONTHS", "24"))
+EVENTS_PARTITION_LOCK_KEY = 0x70617274  # "part"
+
+
+def maintain_event_partitions(
+    months_ahead: int = EVENTS_PARTITIONS_AHEAD,
+    retention_months: int = EVENTS_RETENTION_MONTHS,
+) -> tuple[int, list[str]] | None:
+    """
+    Создать недостающие будущие партиции и архивировать устаревшие одной транзакцией.
+    Возвращает (число созданных, имена архивированных); None — обслуживание уже идёт в другом процессе.
+    """
+    with engine.connect() as conn:
+        if not conn.execute(select(func.pg_try_advisory_xact_lock(EVENTS_PARTITION_LOCK_KEY))).scalar():
+            conn.rollback()
+            return None
+        created = conn.execute(
+            text("SELECT ensure_job_application_event_partitions(:ahead)"), {"ahead": months_ahead}
+        ).scalar_one()
+        archived = []
+        if retention_months > 0:
+            archived = list(conn.execute(
+                text("SELECT archive_job_application_event_partitions(:keep)"), {"keep": retention_months}
+            ).scalars())
+        conn.commit()
+
+    EVENT_PARTITIONS.labels("created").inc(created)
+    EVENT_PARTITIONS.labels("archived").inc(len(archived))
+    if created or archived:
+        logger.info(f"job_application_events partitions: created {created}, archived {archived}")
+    return created, archived
+
+
+class PartitionMaintainer:
+    def __init__(self, interval: float = EVENTS_PARTITION_MAINTENANCE_SECONDS):
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._maintain_forever(), name="event-partitions")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _maintain_forever(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(maintain_event_partitions)
+            except Exception as e:
+                logger.warning(f"job_application_events partition maintenance failed: {e}")
+            await asyncio.sleep(self.interval)
+
+
+partition_maintainer = PartitionMaintainer()
@@ -0,0 +1,162 @@
+"""
+Опциональный профайлер SQL на запрос (SQL_PROFILE=true).
+
+Считает запросы и время в БД, группирует их по «форме» (текст без значений
+параметров) и помечает формы, повторившиеся не меньше SQL_PROFILE_REPEAT_THRESHOLD
+раз — типичный признак N+1. Итог уходит в заголовки ответа X-SQL-* и в
+структурированный лог `sql_profile`.
+
+В тестах тот же механизм доступен через query_budget():
+
+    with query_budget(5):
+        client.get("/applicant/job_applications/1")
+"""
+import json
+import logging
+import os
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger("sql_profile")
+
+SQL_PROFILE_ENABLED = os.getenv("SQL_PROFILE", "false").lower() in ("1", "true", "yes")
+SQL_PROFILE_REPEAT_THRESHOLD = int(os.getenv("SQL_PROFILE_REPEAT_THRESHOLD", "3"))
+
+_PARAM_RE = re.compile(r"%\(\w+\)s|%s|\?|\$\d+")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WS_RE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Нормализует SQL: параметры -> ?, списки IN (?, ?, ...) -> (?...), пробелы схлопнуты."""
+    shape = _PARAM_RE.sub("?", statement)
+    shape = _IN_LIST_RE.sub("(?...)", shape)
+    return _WS_RE.sub(" ", shape).strip()
+
+
+@dataclass
+class SQLProfile:
+    queries: int = 0
+    db_time: float = 0.0
+    shapes: Counter = field(default_factory=Counter)
+
+    def repeated(self, threshold: int = SQL_PROFILE_REPEAT_THRESHOLD) -> list[tuple[str, int]]:
+        """Формы запросов, выполненные не меньше threshold раз (кандидаты в N+1)."""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+    def as_dict(self) -> dict:
+        return {
+            "queries": self.queries,
+            "db_time_ms": round(self.db_time * 1000, 3),
+            "distinct": len(self.shapes),
+            "repeated": [{"statement": s, "count": n} for s, n in self.repeated()],
+        }
+
+
+_profile: ContextVar[SQLProfile | None] = ContextVar("sql_profile", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _profile.get() is not None:
+        conn.info.setdefault("profile_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _profile.get()
+    if profile is None:
+        return
+    started = conn.info["profile_start_time"].pop()
+    profile.db_time += time.perf_counter() - started
+    profile.queries += 1
+    profile.shapes[statement_shape(statement)] += 1
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Подключает профайлер к движку (идемпотентно). Без активного профиля хуки ничего не делают."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _instrument_app_engines() -> None:
+    # без хуков на движках профиль остался бы пустым и query_budget проходил бы молча
+    from .database import engine, replica_engine
+
+    for app_engine in (engine, replica_engine):
+        if app_engine is not None:
+            instrument_engine(app_engine)
+
+
+@contextmanager
+def profile_queries():
+    """Собирает SQLProfile для всех запросов внутри блока (движки приложения подключаются сами)."""
+    _instrument_app_engines()
+    profile = SQLProfile()
+    token = _profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _profile.reset(token)
+
+
+@contextmanager
+def query_budget(max_queries: int, allow_repeated: bool = False):
+    """
+    Проверка бюджета запросов для тестов: AssertionError, если внутри блока
+    выполнено больше max_queries запросов или (по умолчанию) найден N+1.
+    """
+    with profile_queries() as profile:
+        yield profile
+    if profile.queries > max_queries:
+        raise AssertionError(
+            f"SQL query budget exceeded: {profile.queries} > {max_queries}\n"
+            + json.dumps(profile.as_dict(), ensure_ascii=False, indent=2)
+        )
+    if not allow_repeated and profile.repeated():
+        raise AssertionError(
+            "Repeated SQL statements (possible N+1):\n"
+            + json.dumps(profile.as_dict()["repeated"], ensure_ascii=False, indent=2)
+        )
+
+
+class SQLProfilerMiddleware:
+    """ASGI-middleware: профиль SQL на каждый HTTP-запрос -> заголовки X-SQL-* и лог."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with profile_queries() as profile:
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    repeated = profile.repeated()
+                    headers = list(message.get("headers", []))
+                    headers += [
+                        (b"x-sql-queries", str(profile.queries).encode()),
+                        (b"x-sql-time-ms", f"{profile.db_time * 1000:.1f}".encode()),
+                        (b"x-sql-repeated", str(len(repeated)).encode()),
+                    ]
+                    message = {**message, "headers": headers}
+                    self._log(scope, message["status"], profile)
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
+
+    @staticmethod
+    def _log(scope, status_code: int, profile: SQLProfile) -> None:
+        route = getattr(scope.get("route"), "path", None) or scope.get("path")
+        record = {"method": scope["method"], "route": route, "status": status_code, **profile.as_dict()}
+        level = logging.WARNING if record["repeated"] else logging.INFO
+        logger.log(level, json.dumps(record, ensure_ascii=False))
@@ -29,11 +29,14 @@ def create_access_token(data: dict):
 def decode_access_token(token: str):
     try:
         payload = jwt.decode(token, SECRET_KEY_AUTH, algorithms=[ALGORITHM])
-        return payload
     except jwt.ExpiredSignatureError:
         raise ValueError("Token has expired")
     except jwt.PyJWTError:
         raise ValueError("Invalid token")
+    # Служебные токены (scope, например read-your-writes) не являются access-токенами
+    if "scope" in payload:
+        raise ValueError("Invalid token")
+    return payload
 
 async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_session)):
     try:
@@ -1,5 +1,6 @@
 
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .api.ping.router import router as ping_router
@@ -8,17 +9,58 @@ from .api.applicant.router import router as applicant_router
 from .api.hr.router import router as hr_router
 from .api.user.router import router as user_router
 from .api.interview.router import router as interview_router
-from .core.database import Base, engine
+from .api.metrics.router import router as metrics_router
+from .api.events.router import router as events_router
+from .api.interview.videosdk import start_room_pool, stop_room_pool
+from .api.hr.analytics import funnel_refresher
+from .api.matching.service import embedding_syncer
+from .api.applicant.scheduler import evaluation_scheduler
+from .core.database import READ_YOUR_WRITES_HEADER, engine, replica_engine
+from .core.events import broker
+from .core.outbox import outbox_dispatcher
+from .core.partitions import partition_maintainer
+from .core.metrics import MetricsMiddleware, instrument_engine
+from .core import profiling
 from dotenv import load_dotenv
 
 load_dotenv()
 
-#* Инициализация базы данных
-Base.metadata.create_all(bind=engine)
+#* Схема БД управляется только миграциями (alembic upgrade head), импорт приложения в БД не ходит
+instrument_engine(engine)
+if replica_engine is not None:
+    instrument_engine(replica_engine)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    #* Пул заранее созданных комнат VideoSDK пополняется в фоне на event loop приложения
+    await start_room_pool()
+    #* LISTEN на job_application_events: раздача событий откликов по SSE (/events)
+    await broker.start()
+    #* Периодический REFRESH воронки найма (hiring_funnel_stats) для /hr/analytics/funnel
+    await funnel_refresher.start()
+    #* Побочные эффекты смены статусов (комнаты интервью) из outbox — вне транзакций оценки
+    await outbox_dispatcher.start()
+    #* Очередь оценок резюме: приоритеты, дедлайны и справедливое распределение по вакансиям
+    await evaluation_scheduler.start()
+    #* Месячные партиции job_application_events: создание наперёд и архивирование старых
+    await partition_maintainer.start()
+    #* Эмбеддинги новых резюме и вакансий для поиска похожих (если настроена локальная модель)
+    await embedding_syncer.start()
+    yield
+    await embedding_syncer.stop()
+    await partition_maintainer.stop()
+    await evaluation_scheduler.stop()
+    await outbox_dispatcher.stop()
+    await funnel_refresher.stop()
+    await broker.stop()
+    await stop_room_pool()
+
 
 app = FastAPI(
     title="API",
-    root_path="/api"
+    root_path="/api",
+    lifespan=lifespan,
 )
 
 origins = os.getenv("ORIGINS").split(",")
@@ -29,12 +71,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[READ_YOUR_WRITES_HEADER],
 )
+app.add_middleware(MetricsMiddleware)
+
+if profiling.SQL_PROFILE_ENABLED:
+    profiling.instrument_engine(engine)
+    if replica_engine is not None:
+        profiling.instrument_engine(replica_engine)
+    app.add_middleware(profiling.SQLProfilerMiddleware)
 
 #* ROUTERS
 app.include_router(ping_router)
+app.include_router(metrics_router)
 app.include_router(auth_router, prefix='/auth')
 app.include_router(applicant_router, prefix='/applicant')
 app.include_router(hr_router, prefix='/hr')
 app.include_router(user_router, prefix='/user')
-app.include_router(interview_router, prefix='/interview')
\ No newline at end of file
+app.include_router(interview_router, prefix='/interview')
+app.include_router(events_router)
\ No newline at end of file
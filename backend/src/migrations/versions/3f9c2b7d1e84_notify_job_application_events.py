@@ -0,0 +1,65 @@
+"""notify on job_application_events insert
+
+Revision ID: 3f9c2b7d1e84
+Revises: ea52454e6a30
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9c2b7d1e84'
+down_revision: Union[str, None] = 'ea52454e6a30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Получатели (user_id соискателя и HR) вычисляются в триггере, поэтому
+    # уведомление уходит при любой вставке события, из какого бы кода она ни шла
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION notify_job_application_event() RETURNS trigger AS $$
+        DECLARE
+            payload json;
+        BEGIN
+            SELECT json_build_object(
+                'id', NEW.id,
+                'applicationId', NEW.application_id,
+                'vacancyId', ja.vacancy_id,
+                'status', NEW.status,
+                'reqType', NEW."reqType",
+                'createdAt', NEW.created_at,
+                'applicantUserId', ap.user_id,
+                'hrUserId', hp.user_id
+            )
+            INTO payload
+            FROM job_applications ja
+            LEFT JOIN applicant_profiles ap ON ap.id = ja.applicant_id
+            LEFT JOIN vacancies v ON v.id = ja.vacancy_id
+            LEFT JOIN hr_profiles hp ON hp.id = v.hr_id
+            WHERE ja.id = NEW.application_id;
+
+            IF payload IS NOT NULL THEN
+                PERFORM pg_notify('job_application_events', payload::text);
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER job_application_events_notify
+        AFTER INSERT ON job_application_events
+        FOR EACH ROW EXECUTE FUNCTION notify_job_application_event();
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS job_application_events_notify ON job_application_events")
+    op.execute("DROP FUNCTION IF EXISTS notify_job_application_event()")
@@ -0,0 +1,93 @@
+"""hiring_funnel_stats materialized view
+
+Revision ID: 5a1e9d3c7b20
+Revises: c2d7e5a91f36
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a1e9d3c7b20'
+down_revision: Union[str, None] = 'c2d7e5a91f36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Воронка найма по вакансиям: одна строка на (вакансия, статус отклика).
+    # applications — отклики в статусе сейчас, reached — отклики, хоть раз в нём побывавшие,
+    # avg_seconds_in_status — среднее время до перехода в следующий статус (по событиям),
+    # avg_score — средний балл CV откликов, находящихся в статусе.
+    # Обновляется REFRESH ... CONCURRENTLY (api/hr/analytics.py), чтение не блокируется.
+    op.execute(
+        """
+        CREATE MATERIALIZED VIEW hiring_funnel_stats AS
+        WITH scores AS (
+            SELECT job_application_id, avg(score)::float AS score
+            FROM job_application_cv_evaluations
+            WHERE name <> 'error'
+            GROUP BY job_application_id
+        ),
+        changes AS (
+            SELECT application_id, status, created_at,
+                   lag(status) OVER (PARTITION BY application_id ORDER BY created_at, id) AS prev_status
+            FROM job_application_events
+            WHERE status IS NOT NULL
+        ),
+        visits AS (
+            SELECT application_id, status, created_at AS entered_at,
+                   lead(created_at) OVER (PARTITION BY application_id ORDER BY created_at) AS left_at
+            FROM changes
+            WHERE prev_status IS DISTINCT FROM status
+        ),
+        current_stats AS (
+            SELECT ja.vacancy_id, ja.status, count(*) AS applications, avg(s.score) AS avg_score
+            FROM job_applications ja
+            LEFT JOIN scores s ON s.job_application_id = ja.id
+            WHERE ja.vacancy_id IS NOT NULL AND ja.status IS NOT NULL
+            GROUP BY ja.vacancy_id, ja.status
+        ),
+        reached_stats AS (
+            SELECT ja.vacancy_id, r.status, count(*) AS reached
+            FROM (
+                SELECT application_id, status FROM visits
+                UNION
+                SELECT id, status FROM job_applications WHERE status IS NOT NULL
+            ) r
+            JOIN job_applications ja ON ja.id = r.application_id
+            WHERE ja.vacancy_id IS NOT NULL
+            GROUP BY ja.vacancy_id, r.status
+        ),
+        duration_stats AS (
+            SELECT ja.vacancy_id, v.status,
+                   avg(extract(epoch FROM v.left_at - v.entered_at))::float AS avg_seconds_in_status
+            FROM visits v
+            JOIN job_applications ja ON ja.id = v.application_id
+            WHERE v.left_at IS NOT NULL AND ja.vacancy_id IS NOT NULL
+            GROUP BY ja.vacancy_id, v.status
+        )
+        SELECT vac.id AS vacancy_id,
+               vac.name AS vacancy_name,
+               st.status,
+               coalesce(c.applications, 0) AS applications,
+               coalesce(r.reached, 0) AS reached,
+               c.avg_score,
+               d.avg_seconds_in_status,
+               now() AS refreshed_at
+        FROM vacancies vac
+        CROSS JOIN unnest(enum_range(NULL::job_application_status_enum)) AS st(status)
+        LEFT JOIN current_stats c ON c.vacancy_id = vac.id AND c.status = st.status
+        LEFT JOIN reached_stats r ON r.vacancy_id = vac.id AND r.status = st.status
+        LEFT JOIN duration_stats d ON d.vacancy_id = vac.id AND d.status = st.status
+        """
+    )
+    # Уникальный индекс обязателен для REFRESH MATERIALIZED VIEW CONCURRENTLY
+    op.execute("CREATE UNIQUE INDEX ux_hiring_funnel_stats_vacancy_status ON hiring_funnel_stats (vacancy_id, status)")
+
+
+def downgrade() -> None:
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS hiring_funnel_stats")
@@ -0,0 +1,104 @@
+"""move default-partition events out when creating event partitions
+
+Revision ID: 5c9e2a7f4b18
+Revises: e2c7b94f1a36
+Create Date: 2026-10-21 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c9e2a7f4b18'
+down_revision: Union[str, None] = 'e2c7b94f1a36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Те же определения, что в f3a8c61e0d45: базам, где партиционирование уже применено,
+# нужна новая версия функций. Прежняя ensure_job_application_event_partitions падала на
+# месяце, строки которого успели попасть в DEFAULT, и обслуживание останавливалось насовсем.
+PARTITION_FUNCTIONS = """
+-- Партиция месяца. Если строки этого месяца уже попали в DEFAULT (обслуживание не
+-- запускалось), CREATE ... PARTITION OF упал бы на проверке DEFAULT: тогда DEFAULT
+-- отсоединяется, строки переносятся в новую таблицу, и обе присоединяются обратно.
+-- Таблица наполняется до ATTACH, поэтому триггер NOTIFY на перенесённых строках не срабатывает.
+CREATE OR REPLACE FUNCTION create_job_application_event_partition(month_start date)
+RETURNS boolean AS $$
+DECLARE
+    month_end date := (month_start + interval '1 month')::date;
+    part_name text := format('job_application_events_y%sm%s',
+                             to_char(month_start, 'YYYY'), to_char(month_start, 'MM'));
+    in_default boolean := false;
+BEGIN
+    IF to_regclass('public.' || part_name) IS NOT NULL THEN
+        RETURN false;
+    END IF;
+    IF to_regclass('public.job_application_events_default') IS NOT NULL THEN
+        EXECUTE 'SELECT EXISTS (SELECT 1 FROM public.job_application_events_default WHERE created_at >= $1 AND created_at < $2)'
+            INTO in_default USING month_start, month_end;
+    END IF;
+
+    IF NOT in_default THEN
+        EXECUTE format(
+            'CREATE TABLE public.%I PARTITION OF public.job_application_events FOR VALUES FROM (%L) TO (%L)',
+            part_name, month_start, month_end
+        );
+        RETURN true;
+    END IF;
+
+    EXECUTE format('CREATE TABLE public.%I (LIKE public.job_application_events INCLUDING DEFAULTS)', part_name);
+    ALTER TABLE public.job_application_events DETACH PARTITION public.job_application_events_default;
+    EXECUTE format(
+        'INSERT INTO public.%I (id, application_id, "reqType", status, created_at) '
+        'SELECT id, application_id, "reqType", status, created_at FROM public.job_application_events_default '
+        'WHERE created_at >= %L AND created_at < %L',
+        part_name, month_start, month_end
+    );
+    DELETE FROM public.job_application_events_default WHERE created_at >= month_start AND created_at < month_end;
+    EXECUTE format(
+        'ALTER TABLE public.job_application_events ATTACH PARTITION public.%I FOR VALUES FROM (%L) TO (%L)',
+        part_name, month_start, month_end
+    );
+    ALTER TABLE public.job_application_events ATTACH PARTITION public.job_application_events_default DEFAULT;
+    RETURN true;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Текущий месяц и months_ahead вперёд, а также все месяцы, строки которых лежат в DEFAULT
+CREATE OR REPLACE FUNCTION ensure_job_application_event_partitions(months_ahead integer DEFAULT 3)
+RETURNS integer AS $$
+DECLARE
+    months text := format(
+        'SELECT generate_series(date_trunc(''month'', now()), date_trunc(''month'', now()) + make_interval(months => %s), interval ''1 month'')::date',
+        months_ahead
+    );
+    month_start date;
+    created integer := 0;
+BEGIN
+    IF to_regclass('public.job_application_events_default') IS NOT NULL THEN
+        months := months || ' UNION SELECT DISTINCT date_trunc(''month'', created_at)::date FROM public.job_application_events_default';
+    END IF;
+    FOR month_start IN EXECUTE months || ' ORDER BY 1' LOOP
+        IF create_job_application_event_partition(month_start) THEN
+            created := created + 1;
+        END IF;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def upgrade() -> None:
+    op.execute(PARTITION_FUNCTIONS)
+    # строки, уже застрявшие в DEFAULT, переезжают в партиции своих месяцев
+    op.execute("SELECT ensure_job_application_event_partitions(3)")
+
+
+def downgrade() -> None:
+    # Новая ensure_job_application_event_partitions совместима с прежней; старая версия
+    # не восстанавливается, чтобы не вернуть ошибку обслуживания
+    pass
@@ -0,0 +1,88 @@
+"""interview history/feedback to jsonb
+
+Revision ID: 8b41d6e0c2a9
+Revises: 3f9c2b7d1e84
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b41d6e0c2a9'
+down_revision: Union[str, None] = '3f9c2b7d1e84'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _lz4_available(bind) -> bool:
+    # lz4 для TOAST есть, только если Postgres собран с --with-lz4; иначе остаётся pglz
+    return bool(bind.execute(sa.text(
+        "SELECT 'lz4' = ANY(enumvals) FROM pg_settings WHERE name = 'default_toast_compression'"
+    )).scalar())
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    # Старые строки — произвольный текст: валидный JSON переносится как есть,
+    # остальное — как JSON-строка. feedback_json хранил строку рекомендаций,
+    # поэтому всё, что не JSON-объект, становится {"recommendations": ...}
+    op.execute(
+        """
+        CREATE FUNCTION pg_temp.text_to_jsonb(value text) RETURNS jsonb AS $$
+        BEGIN
+            RETURN value::jsonb;
+        EXCEPTION WHEN others THEN
+            RETURN to_jsonb(value);
+        END;
+        $$ LANGUAGE plpgsql IMMUTABLE;
+
+        CREATE FUNCTION pg_temp.feedback_to_jsonb(value text) RETURNS jsonb AS $$
+        DECLARE
+            parsed jsonb := pg_temp.text_to_jsonb(value);
+        BEGIN
+            IF value IS NULL OR jsonb_typeof(parsed) = 'object' THEN
+                RETURN parsed;
+            END IF;
+            RETURN jsonb_build_object('recommendations', value);
+        END;
+        $$ LANGUAGE plpgsql IMMUTABLE;
+        """
+    )
+    compression = ""
+    if _lz4_available(bind):
+        compression = (
+            ", ALTER COLUMN history_json SET COMPRESSION lz4"
+            ", ALTER COLUMN feedback_json SET COMPRESSION lz4"
+        )
+    op.execute(
+        f"""
+        ALTER TABLE interviews
+            ALTER COLUMN history_json TYPE jsonb USING pg_temp.text_to_jsonb(history_json),
+            ALTER COLUMN history_json SET DEFAULT '{{}}'::jsonb,
+            ALTER COLUMN feedback_json TYPE jsonb USING pg_temp.feedback_to_jsonb(feedback_json)
+            {compression}
+        """
+    )
+    # Сводка для списков не должна тянуть расшифровку: выносим большие значения в TOAST раньше
+    op.execute("ALTER TABLE interviews SET (toast_tuple_target = 256)")
+    op.create_index('ix_interviews_job_application_id_created_at', 'interviews', ['job_application_id', 'created_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_interviews_job_application_id_created_at', table_name='interviews')
+    op.execute("ALTER TABLE interviews RESET (toast_tuple_target)")
+    op.execute(
+        """
+        ALTER TABLE interviews
+            ALTER COLUMN history_json DROP DEFAULT,
+            ALTER COLUMN history_json TYPE text USING history_json::text,
+            ALTER COLUMN feedback_json TYPE text USING CASE
+                WHEN jsonb_typeof(feedback_json) = 'string' THEN feedback_json #>> '{}'
+                ELSE feedback_json::text
+            END
+        """
+    )
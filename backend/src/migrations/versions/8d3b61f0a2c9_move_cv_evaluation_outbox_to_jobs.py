@@ -0,0 +1,60 @@
+"""move pending cv_evaluation outbox messages to cv_evaluation_jobs
+
+Revision ID: 8d3b61f0a2c9
+Revises: 5c9e2a7f4b18
+Create Date: 2026-10-21 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d3b61f0a2c9'
+down_revision: Union[str, None] = '5c9e2a7f4b18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Отложенные оценки резюме раньше ждали в outbox (kind = 'cv_evaluation'); теперь их
+# выполняет очередь cv_evaluation_jobs, а обработчика в outbox нет. Неоценённые отклики
+# из таких сообщений (ожидающих или уже ушедших в dead из-за отсутствия обработчика)
+# переносятся в очередь с приоритетом normal и местом в её начале.
+MOVE_MESSAGES = """
+WITH moved AS (
+    DELETE FROM outbox
+    WHERE kind = 'cv_evaluation'
+      AND (status = 'pending' OR (status = 'dead' AND last_error LIKE 'no handler%'))
+    RETURNING payload, available_at
+),
+v AS (
+    SELECT coalesce(
+        (SELECT min(virtual_finish) FROM cv_evaluation_jobs),
+        (SELECT max(last_finish) FROM cv_evaluation_flows),
+        0
+    ) AS now_v
+)
+INSERT INTO cv_evaluation_jobs
+    (job_application_id, vacancy_id, resume_version_id, priority, flow_key, virtual_finish, requeues, available_at)
+SELECT DISTINCT ON (ja.id)
+       ja.id, ja.vacancy_id, coalesce((m.payload->>'resumeId')::integer, ja.resume_version_id), 1,
+       'normal:vacancy:' || ja.vacancy_id, v.now_v, coalesce((m.payload->>'requeues')::integer, 0),
+       m.available_at
+FROM moved m
+JOIN job_applications ja ON ja.id = (m.payload->>'jobApplicationId')::integer
+CROSS JOIN v
+WHERE ja.vacancy_id IS NOT NULL
+  AND NOT EXISTS (SELECT 1 FROM job_application_cv_evaluations e WHERE e.job_application_id = ja.id)
+ORDER BY ja.id, m.available_at
+ON CONFLICT (job_application_id) DO NOTHING
+"""
+
+
+def upgrade() -> None:
+    op.execute(MOVE_MESSAGES)
+
+
+def downgrade() -> None:
+    # Задачи остаются в cv_evaluation_jobs: обработчика для сообщений в outbox всё равно нет
+    pass
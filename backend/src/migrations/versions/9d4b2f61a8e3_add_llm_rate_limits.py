@@ -0,0 +1,36 @@
+"""add llm_rate_limits
+
+Revision ID: 9d4b2f61a8e3
+Revises: 5a1e9d3c7b20
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4b2f61a8e3'
+down_revision: Union[str, None] = '5a1e9d3c7b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Общие для всех процессов token bucket'ы лимитера LLM (core/llm_limiter.py).
+    # UNLOGGED: состояние пишется на каждый вызов модели, а после сбоя БД
+    # его потеря безопасна — бакеты просто начнут заново с полной ёмкостью.
+    op.execute(
+        """
+        CREATE UNLOGGED TABLE llm_rate_limits (
+            name varchar(64) PRIMARY KEY,
+            tokens double precision NOT NULL,
+            updated_at timestamptz NOT NULL DEFAULT clock_timestamp()
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS llm_rate_limits")
@@ -0,0 +1,40 @@
+"""add embeddings cache
+
+Revision ID: a4e1c9b27d53
+Revises: f3a8c61e0d45
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4e1c9b27d53'
+down_revision: Union[str, None] = 'f3a8c61e0d45'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Векторы семантического поиска (api/matching/service.py): один на версию резюме / вакансию и модель.
+    # content_hash — ревизия текста: вектор пересчитывается, только если текст поменялся.
+    # Хранится как real[], чтобы таблица не зависела от pgvector; при установленном
+    # расширении поиск приводит столбец к vector на лету.
+    op.create_table(
+        'embeddings',
+        sa.Column('kind', sa.String(length=16), nullable=False),
+        sa.Column('ref_id', sa.Integer(), nullable=False),
+        sa.Column('model', sa.String(length=128), nullable=False),
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('vector', postgresql.ARRAY(sa.REAL()), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('kind', 'model', 'ref_id'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('embeddings')
@@ -0,0 +1,46 @@
+"""add outbox
+
+Revision ID: b6f08e4d2c17
+Revises: e7c3a05b9d12
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6f08e4d2c17'
+down_revision: Union[str, None] = 'e7c3a05b9d12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Побочные эффекты (комната VideoSDK и т.п.) пишутся сюда в той же транзакции,
+    # что и смена статуса, а выполняет их core/outbox.OutboxDispatcher
+    op.create_table(
+        'outbox',
+        sa.Column('id', sa.BigInteger(), primary_key=True),
+        sa.Column('kind', sa.String(length=64), nullable=False),
+        sa.Column('payload', postgresql.JSONB(), nullable=False, server_default=sa.text("'{}'::jsonb")),
+        sa.Column('status', sa.String(length=16), nullable=False, server_default='pending'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('available_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('processed_at', sa.DateTime(), nullable=True),
+    )
+    # Диспетчер выбирает только ожидающие сообщения — частичный индекс остаётся маленьким
+    op.create_index(
+        'ix_outbox_pending_available_at', 'outbox', ['available_at'],
+        postgresql_where=sa.text("status = 'pending'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_outbox_pending_available_at', table_name='outbox')
+    op.drop_table('outbox')
@@ -0,0 +1,38 @@
+"""add interview_turns
+
+Revision ID: c2d7e5a91f36
+Revises: 8b41d6e0c2a9
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2d7e5a91f36'
+down_revision: Union[str, None] = '8b41d6e0c2a9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('interviews', sa.Column('room_id', sa.String(), nullable=True))
+    op.create_index('ix_interviews_room_id', 'interviews', ['room_id'])
+    op.create_table(
+        'interview_turns',
+        sa.Column('interview_id', sa.Integer, sa.ForeignKey('interviews.id', ondelete="CASCADE"), primary_key=True),
+        sa.Column('seq', sa.Integer, primary_key=True),
+        sa.Column('role', sa.String(16), nullable=False),
+        sa.Column('content', sa.Text, nullable=False),
+        sa.Column('spoken_at', sa.DateTime, nullable=True),
+        sa.Column('created_at', sa.DateTime, server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('interview_turns')
+    op.drop_index('ix_interviews_room_id', table_name='interviews')
+    op.drop_column('interviews', 'room_id')
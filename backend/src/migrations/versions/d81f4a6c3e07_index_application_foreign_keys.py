@@ -0,0 +1,47 @@
+"""index foreign keys of job applications, cv evaluations and resume versions
+
+Revision ID: d81f4a6c3e07
+Revises: a4e1c9b27d53
+Create Date: 2026-10-20 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd81f4a6c3e07'
+down_revision: Union[str, None] = 'a4e1c9b27d53'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Выгрузка откликов (api/hr/export.py) идёт server-side курсором по вакансии в порядке id:
+    # с (vacancy_id, id) первая пачка приходит сразу, без сортировки всех откликов
+    op.create_index('ix_job_applications_vacancy_id_id', 'job_applications', ['vacancy_id', 'id'])
+    # Оценки CV читаются по отклику (выгрузка, карточка вакансии, каскадное удаление) —
+    # без индекса каждый отклик означал полный скан таблицы оценок
+    op.create_index(
+        'ix_job_application_cv_evaluations_job_application_id',
+        'job_application_cv_evaluations',
+        ['job_application_id'],
+    )
+    # Проверки FK при удалении соискателя / версии резюме (RESTRICT из откликов) и выбор
+    # текущего резюме шли полным сканом: на больших таблицах удаление пачки — квадратичное
+    op.create_index('ix_applicant_resume_versions_applicant_id', 'applicant_resume_versions', ['applicant_id'])
+    op.create_index('ix_job_applications_resume_version_id', 'job_applications', ['resume_version_id'])
+    op.create_index(
+        'ix_job_application_cv_evaluations_resume_version_id',
+        'job_application_cv_evaluations',
+        ['resume_version_id'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_job_application_cv_evaluations_resume_version_id', table_name='job_application_cv_evaluations')
+    op.drop_index('ix_job_applications_resume_version_id', table_name='job_applications')
+    op.drop_index('ix_applicant_resume_versions_applicant_id', table_name='applicant_resume_versions')
+    op.drop_index('ix_job_application_cv_evaluations_job_application_id', table_name='job_application_cv_evaluations')
+    op.drop_index('ix_job_applications_vacancy_id_id', table_name='job_applications')
@@ -0,0 +1,62 @@
+"""add cv evaluation jobs queue
+
+Revision ID: e2c7b94f1a36
+Revises: d81f4a6c3e07
+Create Date: 2026-10-20 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2c7b94f1a36'
+down_revision: Union[str, None] = 'd81f4a6c3e07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Очередь оценок резюме (api/applicant/scheduler.py): строка живёт, пока оценка не завершена.
+    # Один отклик — одна задача: повторная постановка повышает приоритет и сдвигает дедлайн
+    op.create_table(
+        'cv_evaluation_jobs',
+        sa.Column('id', sa.BigInteger(), primary_key=True),
+        sa.Column(
+            'job_application_id', sa.Integer(),
+            sa.ForeignKey('job_applications.id', ondelete='CASCADE'), nullable=False, unique=True,
+        ),
+        sa.Column('vacancy_id', sa.Integer(), nullable=False),
+        sa.Column('resume_version_id', sa.Integer(), nullable=False),
+        sa.Column('priority', sa.SmallInteger(), nullable=False),
+        sa.Column('deadline', sa.DateTime(), nullable=True),
+        sa.Column('flow_key', sa.String(length=64), nullable=False),
+        sa.Column('virtual_finish', sa.Float(), nullable=False),
+        sa.Column('replace_evaluations', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('requeues', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('revision', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('available_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('enqueued_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    )
+    # Выбор по виртуальному времени окончания (WFQ) и срочных — по дедлайну
+    op.create_index('ix_cv_evaluation_jobs_virtual_finish', 'cv_evaluation_jobs', ['virtual_finish', 'id'])
+    op.create_index(
+        'ix_cv_evaluation_jobs_deadline', 'cv_evaluation_jobs', ['deadline'],
+        postgresql_where=sa.text('deadline IS NOT NULL'),
+    )
+    # Последнее виртуальное время окончания по потоку (приоритет + вакансия или HR)
+    op.create_table(
+        'cv_evaluation_flows',
+        sa.Column('flow_key', sa.String(length=64), primary_key=True),
+        sa.Column('last_finish', sa.Float(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('cv_evaluation_flows')
+    op.drop_index('ix_cv_evaluation_jobs_deadline', table_name='cv_evaluation_jobs')
+    op.drop_index('ix_cv_evaluation_jobs_virtual_finish', table_name='cv_evaluation_jobs')
+    op.drop_table('cv_evaluation_jobs')
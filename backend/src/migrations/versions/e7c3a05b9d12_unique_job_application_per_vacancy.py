@@ -0,0 +1,44 @@
+"""unique job application per applicant and vacancy
+
+Revision ID: e7c3a05b9d12
+Revises: 9d4b2f61a8e3
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7c3a05b9d12'
+down_revision: Union[str, None] = '9d4b2f61a8e3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Дубли — следствие двойного клика до появления ограничения: оставляем самый
+    # ранний отклик, у поздних удаляем зависимые строки без ON DELETE CASCADE
+    op.execute(
+        """
+        CREATE TEMP TABLE duplicate_job_applications ON COMMIT DROP AS
+        SELECT id FROM (
+            SELECT id, row_number() OVER (PARTITION BY applicant_id, vacancy_id ORDER BY id) AS rn
+            FROM job_applications
+            WHERE applicant_id IS NOT NULL AND vacancy_id IS NOT NULL
+        ) ranked
+        WHERE rn > 1
+        """
+    )
+    op.execute("DELETE FROM job_application_events WHERE application_id IN (SELECT id FROM duplicate_job_applications)")
+    op.execute("DELETE FROM meetings WHERE application_id IN (SELECT id FROM duplicate_job_applications)")
+    op.execute("DELETE FROM job_applications WHERE id IN (SELECT id FROM duplicate_job_applications)")
+
+    op.create_unique_constraint(
+        'uq_job_applications_applicant_vacancy', 'job_applications', ['applicant_id', 'vacancy_id']
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_job_applications_applicant_vacancy', 'job_applications', type_='unique')
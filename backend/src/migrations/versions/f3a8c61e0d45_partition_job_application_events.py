@@ -0,0 +1,235 @@
+"""partition job_application_events by month
+
+Revision ID: f3a8c61e0d45
+Revises: b6f08e4d2c17
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a8c61e0d45'
+down_revision: Union[str, None] = 'b6f08e4d2c17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Создание будущих партиций и перенос старых в схему archive — функциями в БД,
+# чтобы их мог вызывать как бэкенд (core/partitions.py), так и cron / pg_cron.
+PARTITION_FUNCTIONS = """
+CREATE SCHEMA IF NOT EXISTS archive;
+
+-- Партиция месяца. Если строки этого месяца уже попали в DEFAULT (обслуживание не
+-- запускалось), CREATE ... PARTITION OF упал бы на проверке DEFAULT: тогда DEFAULT
+-- отсоединяется, строки переносятся в новую таблицу, и обе присоединяются обратно.
+-- Таблица наполняется до ATTACH, поэтому триггер NOTIFY на перенесённых строках не срабатывает.
+CREATE OR REPLACE FUNCTION create_job_application_event_partition(month_start date)
+RETURNS boolean AS $$
+DECLARE
+    month_end date := (month_start + interval '1 month')::date;
+    part_name text := format('job_application_events_y%sm%s',
+                             to_char(month_start, 'YYYY'), to_char(month_start, 'MM'));
+    in_default boolean := false;
+BEGIN
+    IF to_regclass('public.' || part_name) IS NOT NULL THEN
+        RETURN false;
+    END IF;
+    IF to_regclass('public.job_application_events_default') IS NOT NULL THEN
+        EXECUTE 'SELECT EXISTS (SELECT 1 FROM public.job_application_events_default WHERE created_at >= $1 AND created_at < $2)'
+            INTO in_default USING month_start, month_end;
+    END IF;
+
+    IF NOT in_default THEN
+        EXECUTE format(
+            'CREATE TABLE public.%I PARTITION OF public.job_application_events FOR VALUES FROM (%L) TO (%L)',
+            part_name, month_start, month_end
+        );
+        RETURN true;
+    END IF;
+
+    EXECUTE format('CREATE TABLE public.%I (LIKE public.job_application_events INCLUDING DEFAULTS)', part_name);
+    ALTER TABLE public.job_application_events DETACH PARTITION public.job_application_events_default;
+    EXECUTE format(
+        'INSERT INTO public.%I (id, application_id, "reqType", status, created_at) '
+        'SELECT id, application_id, "reqType", status, created_at FROM public.job_application_events_default '
+        'WHERE created_at >= %L AND created_at < %L',
+        part_name, month_start, month_end
+    );
+    DELETE FROM public.job_application_events_default WHERE created_at >= month_start AND created_at < month_end;
+    EXECUTE format(
+        'ALTER TABLE public.job_application_events ATTACH PARTITION public.%I FOR VALUES FROM (%L) TO (%L)',
+        part_name, month_start, month_end
+    );
+    ALTER TABLE public.job_application_events ATTACH PARTITION public.job_application_events_default DEFAULT;
+    RETURN true;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Текущий месяц и months_ahead вперёд, а также все месяцы, строки которых лежат в DEFAULT
+CREATE OR REPLACE FUNCTION ensure_job_application_event_partitions(months_ahead integer DEFAULT 3)
+RETURNS integer AS $$
+DECLARE
+    months text := format(
+        'SELECT generate_series(date_trunc(''month'', now()), date_trunc(''month'', now()) + make_interval(months => %s), interval ''1 month'')::date',
+        months_ahead
+    );
+    month_start date;
+    created integer := 0;
+BEGIN
+    IF to_regclass('public.job_application_events_default') IS NOT NULL THEN
+        months := months || ' UNION SELECT DISTINCT date_trunc(''month'', created_at)::date FROM public.job_application_events_default';
+    END IF;
+    FOR month_start IN EXECUTE months || ' ORDER BY 1' LOOP
+        IF create_job_application_event_partition(month_start) THEN
+            created := created + 1;
+        END IF;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION archive_job_application_event_partitions(keep_months integer)
+RETURNS SETOF text AS $$
+DECLARE
+    cutoff timestamp := date_trunc('month', now()) - make_interval(months => keep_months);
+    part record;
+BEGIN
+    FOR part IN
+        SELECT c.relname,
+               (regexp_match(pg_get_expr(c.relpartbound, c.oid), 'TO \\(''([^'']+)''\\)'))[1]::timestamp AS upper_bound
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'public.job_application_events'::regclass
+          AND pg_get_expr(c.relpartbound, c.oid) <> 'DEFAULT'
+        ORDER BY c.relname
+    LOOP
+        IF part.upper_bound <= cutoff THEN
+            EXECUTE format('ALTER TABLE public.job_application_events DETACH PARTITION public.%I', part.relname);
+            EXECUTE format('ALTER TABLE public.%I SET SCHEMA archive', part.relname);
+            RETURN NEXT part.relname;
+        END IF;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+NOTIFY_TRIGGER = """
+CREATE TRIGGER job_application_events_notify
+AFTER INSERT ON job_application_events
+FOR EACH ROW EXECUTE FUNCTION notify_job_application_event();
+"""
+
+
+def _drop_funnel_view() -> str | None:
+    """hiring_funnel_stats читает события: снимаем его на время замены таблицы, вернув определение."""
+    conn = op.get_bind()
+    if conn.execute(sa.text("SELECT to_regclass('public.hiring_funnel_stats')")).scalar() is None:
+        return None
+    definition = conn.execute(sa.text("SELECT pg_get_viewdef('hiring_funnel_stats'::regclass)")).scalar()
+    op.execute("DROP MATERIALIZED VIEW hiring_funnel_stats")
+    return definition
+
+
+def _create_funnel_view(definition: str | None) -> None:
+    if definition is None:
+        return
+    op.execute(f"CREATE MATERIALIZED VIEW hiring_funnel_stats AS {definition}")
+    op.execute("CREATE UNIQUE INDEX ux_hiring_funnel_stats_vacancy_status ON hiring_funnel_stats (vacancy_id, status)")
+
+
+def upgrade() -> None:
+    funnel_view = _drop_funnel_view()
+
+    op.execute("ALTER TABLE job_application_events RENAME TO job_application_events_legacy")
+    op.execute("DROP TRIGGER job_application_events_notify ON job_application_events_legacy")
+
+    # Ключ партиционирования обязан входить в PK, поэтому PK — (id, created_at),
+    # а created_at становится NOT NULL; id продолжает старую последовательность
+    op.execute(
+        """
+        CREATE TABLE job_application_events (
+            id integer NOT NULL DEFAULT nextval('application_events_id_seq'),
+            application_id integer REFERENCES job_applications(id),
+            "reqType" req_type_enum,
+            status job_application_status_enum,
+            created_at timestamp NOT NULL DEFAULT now(),
+            CONSTRAINT job_application_events_pkey PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+        """
+    )
+    op.execute(
+        "CREATE INDEX ix_job_application_events_application_id_created_at "
+        "ON job_application_events (application_id, created_at)"
+    )
+    # DEFAULT-партиция страхует вставку, если обслуживание партиций не запускалось
+    op.execute("CREATE TABLE job_application_events_default PARTITION OF job_application_events DEFAULT")
+    op.execute(PARTITION_FUNCTIONS)
+
+    # Партиции под все месяцы переносимых событий (с той же подстановкой created_at, что и
+    # при переносе, включая даты в будущем), плюс три месяца вперёд
+    op.execute(
+        """
+        CREATE TEMP TABLE job_application_events_backfill AS
+        SELECT e.id, e.application_id, e."reqType", e.status, coalesce(e.created_at, ja.created_at, now()) AS created_at
+        FROM job_application_events_legacy e
+        LEFT JOIN job_applications ja ON ja.id = e.application_id
+        """
+    )
+    op.execute(
+        """
+        SELECT create_job_application_event_partition(month_start)
+        FROM (SELECT DISTINCT date_trunc('month', created_at)::date AS month_start FROM job_application_events_backfill) months
+        ORDER BY month_start
+        """
+    )
+    op.execute("SELECT ensure_job_application_event_partitions(3)")
+
+    op.execute(
+        """
+        INSERT INTO job_application_events (id, application_id, "reqType", status, created_at)
+        SELECT id, application_id, "reqType", status, created_at FROM job_application_events_backfill
+        """
+    )
+    op.execute("DROP TABLE job_application_events_backfill")
+    op.execute("ALTER SEQUENCE application_events_id_seq OWNED BY job_application_events.id")
+    op.execute("DROP TABLE job_application_events_legacy")
+
+    op.execute(NOTIFY_TRIGGER)
+    _create_funnel_view(funnel_view)
+
+
+def downgrade() -> None:
+    funnel_view = _drop_funnel_view()
+
+    op.execute("ALTER TABLE job_application_events RENAME TO job_application_events_partitioned")
+    op.execute(
+        """
+        CREATE TABLE job_application_events (
+            id integer NOT NULL DEFAULT nextval('application_events_id_seq'),
+            application_id integer REFERENCES job_applications(id),
+            "reqType" req_type_enum,
+            status job_application_status_enum,
+            created_at timestamp DEFAULT now(),
+            CONSTRAINT application_events_pkey PRIMARY KEY (id)
+        )
+        """
+    )
+    # Отсоединённые в archive партиции обратно не подтягиваются
+    op.execute(
+        """
+        INSERT INTO job_application_events (id, application_id, "reqType", status, created_at)
+        SELECT id, application_id, "reqType", status, created_at FROM job_application_events_partitioned
+        """
+    )
+    op.execute("ALTER SEQUENCE application_events_id_seq OWNED BY job_application_events.id")
+    op.execute("DROP TABLE job_application_events_partitioned")
+    op.execute("DROP FUNCTION IF EXISTS archive_job_application_event_partitions(integer)")
+    op.execute("DROP FUNCTION IF EXISTS ensure_job_application_event_partitions(integer)")
+    op.execute("DROP FUNCTION IF EXISTS create_job_application_event_partition(date)")
+
+    op.execute(NOTIFY_TRIGGER)
+    _create_funnel_view(funnel_view)
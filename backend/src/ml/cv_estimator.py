@@ -85,6 +85,9 @@ def evaluate_cv(
 	model: str = DEFAULT_MODEL,
 	temperature: float = 0.2,
 	max_tokens: Optional[int] = None,
+	timeout: Optional[float] = None,
+	max_retries: Optional[int] = None,
+	base_url: Optional[str] = None,
 ) -> Dict[str, Any]:
 	"""Оценить резюме относительно вакансии по заданным критериям.
 
@@ -104,6 +107,12 @@ def evaluate_cv(
 		Температура выборки.
 	max_tokens : Optional[int]
 		Ограничение на выходные токены.
+	timeout : Optional[float]
+		Таймаут HTTP-запроса к Groq в секундах (None — по умолчанию клиента).
+	max_retries : Optional[int]
+		Повторы внутри клиента Groq; 0, если повторами управляет вызывающий код.
+	base_url : Optional[str]
+		Адрес Groq-совместимого API (запасной провайдер, локальная заглушка).
 	"""
 	if not criteria:
 		raise ValueError("Список критериев пуст — нечего оценивать.")
@@ -115,6 +124,12 @@ def evaluate_cv(
 	llm_kwargs: Dict[str, Any] = {"model": model, "temperature": temperature}
 	if max_tokens is not None:
 		llm_kwargs["max_tokens"] = max_tokens
+	if timeout is not None:
+		llm_kwargs["timeout"] = timeout
+	if max_retries is not None:
+		llm_kwargs["max_retries"] = max_retries
+	if base_url is not None:
+		llm_kwargs["base_url"] = base_url
 
 	llm = ChatGroq(api_key=key, **llm_kwargs)
 
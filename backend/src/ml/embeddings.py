@@ -0,0 +1,114 @@
+"""Локальные эмбеддинги предложений (ONNX Runtime, только CPU).
+
+Небольшая мультиязычная модель sentence-transformers, экспортированная в ONNX
+(например, paraphrase-multilingual-MiniLM-L12-v2 через `optimum-cli export onnx`).
+В каталоге EMBEDDINGS_MODEL_DIR должны лежать model.onnx и tokenizer.json.
+Внешних API нет: тексты кодируются пачками в процессе бэкенда, векторы
+нормализованы (L2), поэтому косинусная близость — обычное скалярное произведение.
+
+Зависимости опциональные (pip install onnxruntime tokenizers numpy): без них или
+без EMBEDDINGS_MODEL_DIR get_encoder() возвращает None, и семантический поиск выключен.
+
+Пример:
+	from ml.embeddings import get_encoder
+	encoder = get_encoder()
+	vectors = encoder.encode(["Python backend, FastAPI", "Разработчик на Python"])
+	print(float(vectors[0] @ vectors[1]))
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+EMBEDDINGS_MODEL_DIR = os.getenv("EMBEDDINGS_MODEL_DIR", "")
+EMBEDDINGS_MODEL_NAME = os.getenv("EMBEDDINGS_MODEL_NAME", "") or Path(EMBEDDINGS_MODEL_DIR).name
+EMBEDDINGS_BATCH_SIZE = int(os.getenv("EMBEDDINGS_BATCH_SIZE", "16"))
+EMBEDDINGS_MAX_TOKENS = int(os.getenv("EMBEDDINGS_MAX_TOKENS", "256"))
+EMBEDDINGS_THREADS = int(os.getenv("EMBEDDINGS_THREADS", "2"))
+
+
+class SentenceEncoder:
+	"""ONNX-модель + быстрый токенизатор HuggingFace; mean pooling по attention mask."""
+
+	def __init__(self, model_dir: str, name: str, batch_size: int = EMBEDDINGS_BATCH_SIZE, max_tokens: int = EMBEDDINGS_MAX_TOKENS):
+		import numpy as np
+		import onnxruntime as ort
+		from tokenizers import Tokenizer
+
+		self._np = np
+		self.name = name
+		self.batch_size = batch_size
+
+		options = ort.SessionOptions()
+		options.intra_op_num_threads = EMBEDDINGS_THREADS
+		self._session = ort.InferenceSession(
+			str(Path(model_dir) / "model.onnx"), sess_options=options, providers=["CPUExecutionProvider"]
+		)
+		self._inputs = {i.name for i in self._session.get_inputs()}
+
+		self._tokenizer = Tokenizer.from_file(str(Path(model_dir) / "tokenizer.json"))
+		self._tokenizer.enable_truncation(max_length=max_tokens)
+		self._tokenizer.enable_padding()
+
+	def _encode_batch(self, texts: List[str]):
+		np = self._np
+		encodings = self._tokenizer.encode_batch(texts)
+		feed = {
+			"input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+			"attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+		}
+		if "token_type_ids" in self._inputs:
+			feed["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+		output = self._session.run(None, feed)[0]
+		if output.ndim == 3:
+			# last_hidden_state [batch, tokens, dim] -> среднее по реальным токенам
+			mask = feed["attention_mask"][..., None].astype(np.float32)
+			output = (output * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+		norms = np.linalg.norm(output, axis=1, keepdims=True)
+		return (output / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+	def encode(self, texts: List[str]):
+		"""Матрица [len(texts), dim] нормализованных векторов."""
+		np = self._np
+		if not texts:
+			return np.zeros((0, 0), dtype=np.float32)
+		# сортировка по длине — меньше паддинга внутри пачки
+		order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+		result = None
+		for start in range(0, len(order), self.batch_size):
+			chunk = order[start : start + self.batch_size]
+			vectors = self._encode_batch([texts[i] or " " for i in chunk])
+			if result is None:
+				result = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+			result[chunk] = vectors
+		return result
+
+
+_encoder: Optional[SentenceEncoder] = None
+_encoder_error: Optional[str] = None
+_encoder_lock = threading.Lock()
+
+
+def get_encoder() -> Optional[SentenceEncoder]:
+	"""Модель загружается один раз на процесс; None — эмбеддинги не настроены или недоступны."""
+	global _encoder, _encoder_error
+	if _encoder is not None or _encoder_error is not None:
+		return _encoder
+	with _encoder_lock:
+		if _encoder is None and _encoder_error is None:
+			if not EMBEDDINGS_MODEL_DIR:
+				_encoder_error = "EMBEDDINGS_MODEL_DIR is not set"
+			else:
+				try:
+					_encoder = SentenceEncoder(EMBEDDINGS_MODEL_DIR, EMBEDDINGS_MODEL_NAME)
+				except Exception as e:
+					_encoder_error = str(e)
+					logger.warning(f"Sentence embeddings disabled: {e}")
+	return _encoder
@@ -0,0 +1,205 @@
+"""Детерминированный пре-скоринг резюме по структурированным требованиям вакансии.
+
+Отсекает очевидные случаи до вызова LLM (evaluate_cv):
+ - в резюме нет ни одного требуемого навыка и нет нужного опыта — отказ;
+ - почти все навыки, опыт, образование и языки совпадают — сразу интервью.
+Всё остальное — «неоднозначно», решение за моделью.
+
+Требования берутся из полей Vacancy (computerSkills, specialSoftware, foreignLanguages,
+exp, degree). Текст резюме один раз разбирается в множество токенов и n-грамм, после
+чего совпадения по всем навыкам — пересечение множеств, без прохода по тексту на навык.
+
+score 0..100 — взвешенное соответствие (навыки 60%, опыт 20%, образование 10%, языки 10%),
+веса пересчитываются на требования, которые в вакансии действительно указаны: неуказанное
+требование не засчитывается как выполненное;
+confidence 0..1 — насколько score далёк от середины шкалы, с поправкой на то,
+сколько навыков указано в вакансии (по двум навыкам уверенно судить нельзя).
+
+Пример:
+	from ml.prescorer import prescore
+	res = prescore("Python, FastAPI, PostgreSQL, 5 лет опыта", computer_skills="Python, PostgreSQL, Kafka", exp=3)
+	print(res.score, res.confidence, res.decision(threshold=0.8))
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional, Set
+
+MODEL_NAME = "prescore-v1"
+
+WEIGHTS = {"skills": 0.6, "experience": 0.2, "degree": 0.1, "languages": 0.1}
+
+_TOKEN_RE = re.compile(r"[a-zа-я0-9][a-zа-я0-9+#.\-]*")
+_SKILL_SPLIT_RE = re.compile(r"[,;/\n•]|\s+и\s+|\s+or\s+|\s+или\s+")
+# Число не должно быть хвостом другого числа («с 2024 года» — не 24 года), а «год(а)»
+# после предлога («с 15 года», «в 19 года») — календарный год, а не стаж
+_YEARS_RE = re.compile(
+	r"(?:\b(с|в|since)\s+)?(?<![\d.,])(\d{1,2}(?:[.,]\d)?)\s*\+?\s*(год|года|лет|year|years|yrs)\b"
+)
+_CALENDAR_YEAR_UNITS = {"год", "года"}
+_DEGREE_RE = re.compile(r"высше|бакалавр|магистр|специалитет|университет|институт|академи|bachelor|master|university|msc|bsc")
+
+_STOPWORDS = {
+	"опыт", "работы", "работа", "знание", "знания", "владение", "умение", "навыки", "уверенное",
+	"с", "в", "на", "по", "для", "от", "до", "не", "ниже", "уровень", "базовое", "базовые", "хорошее",
+	"experience", "with", "of", "and", "knowledge", "skills",
+}
+
+# язык вакансии (начало русского названия) -> английское название в резюме
+_LANGUAGES = {
+	"англ": "english",
+	"немец": "german",
+	"франц": "french",
+	"испан": "spanish",
+	"итальян": "italian",
+	"китай": "chinese",
+}
+
+
+def _normalize(text: str) -> List[str]:
+	tokens = _TOKEN_RE.findall((text or "").lower().replace("ё", "е"))
+	return [t.rstrip(".-") for t in tokens if t.rstrip(".-")]
+
+
+def _is_technical(token: str) -> bool:
+	return any("a" <= ch <= "z" or ch.isdigit() for ch in token)
+
+
+@dataclass(frozen=True)
+class _Skill:
+	label: str
+	phrase: str
+	# латиница/цифры (Python, 1С, PostgreSQL) — достаточно одного такого токена
+	technical: frozenset
+	# русские слова без служебных — по основам длиной 5
+	stems: frozenset
+
+
+def parse_skills(*fields: Optional[str]) -> List[_Skill]:
+	skills, seen = [], set()
+	for value in fields:
+		for part in _SKILL_SPLIT_RE.split((value or "").lower()):
+			tokens = [t for t in _normalize(part) if t not in _STOPWORDS]
+			phrase = " ".join(tokens)
+			if not tokens or phrase in seen:
+				continue
+			seen.add(phrase)
+			skills.append(_Skill(
+				label=part.strip(),
+				phrase=phrase,
+				technical=frozenset(t for t in tokens if _is_technical(t)),
+				stems=frozenset(t[:5] for t in tokens if not _is_technical(t) and len(t) > 2),
+			))
+	return skills
+
+
+@dataclass
+class ResumeIndex:
+	"""Текст резюме в нижнем регистре, его токены, основы и n-граммы (до трёх слов).
+	Стаж ищется в самом тексте: токенизация разрывает «2,5 года» на «2 5»."""
+	text: str
+	tokens: Set[str]
+	stems: Set[str]
+	ngrams: Set[str]
+
+	@classmethod
+	def build(cls, resume_text: str) -> "ResumeIndex":
+		text = (resume_text or "").lower().replace("ё", "е")
+		tokens = _normalize(text)
+		ngrams = set(tokens)
+		for n in (2, 3):
+			ngrams.update(" ".join(tokens[i : i + n]) for i in range(len(tokens) - n + 1))
+		return cls(
+			text=text,
+			tokens=set(tokens),
+			stems={t[:5] for t in tokens if len(t) > 2},
+			ngrams=ngrams,
+		)
+
+	def has_skill(self, skill: _Skill) -> bool:
+		if skill.phrase in self.ngrams:
+			return True
+		if skill.technical:
+			return bool(skill.technical & self.tokens)
+		return bool(skill.stems) and skill.stems <= self.stems
+
+	def years_of_experience(self) -> float:
+		years = [
+			float(number.replace(",", "."))
+			for preposition, number, unit in _YEARS_RE.findall(self.text)
+			if not (preposition and unit in _CALENDAR_YEAR_UNITS)
+		]
+		return max((y for y in years if y <= 45), default=0.0)
+
+	def has_degree(self) -> bool:
+		return bool(_DEGREE_RE.search(self.text))
+
+	def has_language(self, language: str) -> bool:
+		language = language.lower().replace("ё", "е")
+		for prefix, english in _LANGUAGES.items():
+			if language.startswith(prefix) or language == english:
+				return english in self.tokens or any(t.startswith(prefix) for t in self.tokens)
+		stem = language[:5]
+		return bool(stem) and stem in self.stems
+
+
+@dataclass
+class PreScore:
+	score: float
+	confidence: float
+	strengths: List[str] = field(default_factory=list)
+	weaknesses: List[str] = field(default_factory=list)
+
+	def decision(self, threshold: float) -> Optional[str]:
+		"""'interview' / 'rejected', если уверенность не ниже threshold; иначе None — нужна модель."""
+		if threshold <= 0 or self.confidence < threshold:
+			return None
+		return "interview" if self.score >= 50 else "rejected"
+
+
+def prescore(
+	resume_text: str,
+	computer_skills: Optional[str] = None,
+	special_software: Optional[str] = None,
+	foreign_languages: Optional[str] = None,
+	exp: Optional[int] = None,
+	degree: Optional[bool] = None,
+	min_skills: int = 3,
+) -> PreScore:
+	resume = ResumeIndex.build(resume_text)
+	strengths: List[str] = []
+	weaknesses: List[str] = []
+	parts = {}
+
+	skills = parse_skills(computer_skills, special_software)
+	matched = [s for s in skills if resume.has_skill(s)]
+	if skills:
+		parts["skills"] = len(matched) / len(skills)
+	strengths += [s.label for s in matched]
+	weaknesses += [f"нет навыка: {s.label}" for s in skills if s not in matched]
+
+	years = resume.years_of_experience()
+	if exp:
+		parts["experience"] = min(years / exp, 1.0)
+		(strengths if years >= exp else weaknesses).append(f"опыт {years:g} из {exp} лет")
+
+	if degree:
+		parts["degree"] = 1.0 if resume.has_degree() else 0.0
+		(strengths if parts["degree"] else weaknesses).append("высшее образование" if parts["degree"] else "нет высшего образования")
+
+	languages = [l.strip() for l in _SKILL_SPLIT_RE.split(foreign_languages or "") if l.strip()]
+	if languages:
+		known = [l for l in languages if resume.has_language(l)]
+		parts["languages"] = len(known) / len(languages)
+		strengths += [f"язык: {l}" for l in known]
+		weaknesses += [f"нет языка: {l}" for l in languages if l not in known]
+
+	# без требований — середина шкалы: уверенность 0, решение за моделью
+	total = sum(WEIGHTS[k] for k in parts)
+	score = 100.0 * sum(WEIGHTS[k] * v for k, v in parts.items()) / total if total else 50.0
+	# без списка навыков вакансии структурных данных мало: уверенность пропорционально ниже
+	evidence = min(1.0, len(skills) / min_skills) if min_skills > 0 else 1.0
+	confidence = evidence * abs(score - 50.0) / 50.0
+	return PreScore(score=round(score, 1), confidence=round(confidence, 3), strengths=strengths, weaknesses=weaknesses)
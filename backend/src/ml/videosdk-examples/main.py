@@ -5,6 +5,7 @@ from videosdk.plugins.turn_detector import TurnDetector, pre_download_model
 from videosdk.plugins.openai import OpenAITTS
 from videosdk.plugins.cartesia import CartesiaSTT
 from groq_llm import GroqLLM
+from transcript_stream import with_transcript
 from typing import AsyncIterator
 import logging
 
@@ -21,7 +22,17 @@ class MyVoiceAgent(Agent):
     async def on_enter(self): await self.session.say("Hi? How can I help you?")
     async def on_exit(self): await self.session.say("Bye!")
 
-async def start_session(context: JobContext):
+async def preload() -> None:
+    """Загрузить модели VAD и turn-detector один раз на процесс (worker.py, до первой комнаты).
+    Плагины держат ONNX-сессии и токенизатор в кэше модуля, и новые экземпляры берут их оттуда;
+    сами экземпляры у каждой сессии свои — в них состояние потока (фаза речи, память LSTM)."""
+    for warmup in (SileroVAD(), TurnDetector()):
+        await warmup.aclose()
+
+def create_session(room_id: str | None = None) -> AgentSession:
+    """Новая сессия агента: свой агент, flow и pipeline на каждую комнату.
+    Модели VAD и turn-detector общие для процесса (см. preload), лёгкие обёртки — свои.
+    С room_id реплики интервью выгружаются в бэкенд (transcript_stream)."""
     # Create agent and conversation flow
     agent = MyVoiceAgent()
     conversation_flow = ConversationFlow(agent)
@@ -29,18 +40,21 @@ async def start_session(context: JobContext):
     # Create pipeline
     pipeline = CascadingPipeline(
         stt=CartesiaSTT(model="ink-whisper", language="ru"),
-        llm=GroqLLM(model="qwen/qwen3-32b"),
+        llm=with_transcript(GroqLLM(model="qwen/qwen3-32b"), room_id),
         tts=OpenAITTS(model="tts-1"),
         vad=SileroVAD(),
         turn_detector=TurnDetector()
     )
 
-    session = AgentSession(
+    return AgentSession(
         agent=agent,
         pipeline=pipeline,
         conversation_flow=conversation_flow
     )
 
+async def start_session(context: JobContext):
+    session = create_session(context.room_options.room_id)
+
     # Создаем событие для корректного завершения работы
     shutdown_event = asyncio.Event()
     
@@ -121,9 +135,9 @@ async def start_session(context: JobContext):
         
         logger.info("Завершение работы завершено")
 
-def make_context() -> JobContext:
+def make_context(room_id: str | None = None) -> JobContext:
     room_options = RoomOptions(
-     #  room_id="YOUR_MEETING_ID",  # Set to join a pre-created room; omit to auto-create
+        room_id=room_id or os.getenv("ROOM_ID"),  # None -> комната создаётся автоматически
         name="VideoSDK Cascaded Agent",
         playground=True
     )
@@ -8,6 +8,7 @@ from videosdk.plugins.openai import OpenAITTS
 # External imports still needed for VideoSDK pipeline compatibility
 from videosdk.plugins.cartesia import CartesiaSTT
 from groq_llm import GroqLLM
+from transcript_stream import with_transcript
 from typing import AsyncIterator, Generator, Iterable, List, Optional, Tuple, Dict, Any
 import logging
 import numpy as np
@@ -1187,7 +1188,16 @@ class MyVoiceAgent(Agent):
     async def on_exit(self):
         await self.session.say(self.config.agent_farewell)
 
-async def start_session(context: JobContext):
+async def preload() -> None:
+    """Загрузить STT/TTS модели в классовые кэши, чтобы новые сессии стартовали без загрузки."""
+    config = AgentConfig()
+    config.update_from_env()
+    await StreamingTranscriber()._ensure_pipeline_loaded()
+    await ESpeechTTS(device=config.tts_device).load()
+
+def create_session(room_id: Optional[str] = None) -> AgentSession:
+    """Новая сессия агента; тяжёлые модели берутся из классовых кэшей процесса.
+    С room_id реплики интервью выгружаются в бэкенд (transcript_stream)."""
     # Initialize configuration
     config = AgentConfig()
     config.update_from_env()
@@ -1211,12 +1221,12 @@ async def start_session(context: JobContext):
                     silence_threshold=config.stt_silence_threshold,
                     silence_duration=config.stt_silence_duration,
                 ),
-                llm=VideoSDKLangChainLLM(
+                llm=with_transcript(VideoSDKLangChainLLM(
                     system_prompt=config.llm_system_prompt,
                     model=config.llm_model,
                     temperature=config.llm_temperature,
                     max_tokens=config.llm_max_tokens,
-                ),
+                ), room_id),
                 tts=VideoSDKESpeechTTS(
                     device=config.tts_device,
                     sample_rate=config.tts_sample_rate,
@@ -1247,10 +1257,10 @@ async def start_session(context: JobContext):
                     silence_threshold=config.stt_silence_threshold,
                     silence_duration=config.stt_silence_duration,
                 ),
-                llm=GroqLLM(
+                llm=with_transcript(GroqLLM(
                     model="qwen/qwen3-32b",
                     temperature=config.llm_temperature,
-                ),
+                ), room_id),
                 tts=GroqTTSFixed(model="playai-tts"),
                 vad=SileroVAD(
                     threshold=config.vad_threshold,
@@ -1269,12 +1279,15 @@ async def start_session(context: JobContext):
     if pipeline is None:
         raise RuntimeError("No pipeline could be initialized")
 
-    session = AgentSession(
+    return AgentSession(
         agent=agent,
         pipeline=pipeline,
         conversation_flow=conversation_flow
     )
 
+async def start_session(context: JobContext):
+    session = create_session(context.room_options.room_id)
+
     # Создаем событие для корректного завершения работы
     shutdown_event = asyncio.Event()
     
@@ -1355,9 +1368,9 @@ async def start_session(context: JobContext):
 
         logger.info("Завершение работы завершено")
 
-def make_context() -> JobContext:
+def make_context(room_id: Optional[str] = None) -> JobContext:
     room_options = RoomOptions(
-     #  room_id="YOUR_MEETING_ID",  # Set to join a pre-created room; omit to auto-create
+        room_id=room_id or os.getenv("ROOM_ID"),  # None -> комната создаётся автоматически
         name="VideoSDK Cascaded Agent",
         playground=True
     )
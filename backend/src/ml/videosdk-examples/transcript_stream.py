@@ -0,0 +1,186 @@
+"""
+Потоковая выгрузка расшифровки интервью в бэкенд.
+
+Реплики копятся в памяти и уходят пачками в POST {TRANSCRIPT_INGEST_URL}/rooms/{room_id}/turns
+(api/interview/router.py) каждые TRANSCRIPT_BATCH_SIZE реплик или TRANSCRIPT_FLUSH_SECONDS
+секунд. Пачка удаляется из буфера только после ответа бэкенда, а повтор безопасен
+(ключ — interview + seq), так что при падении агента теряется не больше одной пачки.
+Нумерация продолжает уже сохранённую: перед первой пачкой агент запрашивает lastSeq
+интервью (пустой пачкой), иначе после перезапуска реплики с seq от нуля отбрасывались бы как повторы.
+
+Включается, если заданы TRANSCRIPT_INGEST_URL и AGENT_INGEST_TOKEN:
+    TRANSCRIPT_INGEST_URL=http://backend:8000/interview AGENT_INGEST_TOKEN=... python main.py
+"""
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Optional
+
+import httpx
+from videosdk.agents import LLM, ChatContext, ChatMessage, ChatRole, LLMResponse
+
+logger = logging.getLogger("transcript_stream")
+
+TRANSCRIPT_INGEST_URL = os.getenv("TRANSCRIPT_INGEST_URL", "")
+AGENT_INGEST_TOKEN = os.getenv("AGENT_INGEST_TOKEN", "")
+TRANSCRIPT_BATCH_SIZE = int(os.getenv("TRANSCRIPT_BATCH_SIZE", "4"))
+TRANSCRIPT_FLUSH_SECONDS = float(os.getenv("TRANSCRIPT_FLUSH_SECONDS", "5"))
+TRANSCRIPT_TIMEOUT = float(os.getenv("TRANSCRIPT_TIMEOUT", "10"))
+
+
+class TranscriptStream:
+    def __init__(
+        self,
+        room_id: str,
+        base_url: str = TRANSCRIPT_INGEST_URL,
+        token: str = AGENT_INGEST_TOKEN,
+        batch_size: int = TRANSCRIPT_BATCH_SIZE,
+        flush_seconds: float = TRANSCRIPT_FLUSH_SECONDS,
+    ):
+        self.room_id = room_id
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._client = httpx.AsyncClient(
+            base_url=base_url.rstrip("/"),
+            headers={"X-Agent-Token": token},
+            timeout=TRANSCRIPT_TIMEOUT,
+        )
+        self._pending: list[dict] = []
+        # seq в буфере — локальные, от нуля; при отправке к ним прибавляется _seq_base
+        self._next_seq = 0
+        self._seq_base: Optional[int] = None
+        self._wakeup = asyncio.Event()
+        self._closed = False
+        self._task: Optional[asyncio.Task] = None
+
+    def add(self, role: str, content: str) -> None:
+        """Добавить реплику (вызывается из event loop агента, не блокирует)."""
+        if self._closed or not content:
+            return
+        self._pending.append({
+            "seq": self._next_seq,
+            "role": role,
+            "content": content,
+            "spokenAt": datetime.now(timezone.utc).replace(tzinfo=None).isoformat(),
+        })
+        self._next_seq += 1
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run(), name=f"transcript-{self.room_id}")
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    async def _post(self, batch: list[dict]) -> Optional[dict]:
+        try:
+            resp = await self._client.post(f"/rooms/{self.room_id}/turns", json={"turns": batch})
+            resp.raise_for_status()
+            return resp.json()
+        except (httpx.HTTPError, ValueError) as e:
+            logger.warning(f"Комната {self.room_id}: не удалось отправить {len(batch)} реплик: {e}")
+            return None
+
+    async def _seed(self) -> bool:
+        """Продолжить нумерацию после уже сохранённых реплик интервью (агент мог перезапуститься)."""
+        result = await self._post([])
+        if result is None:
+            return False
+        last_seq = result.get("lastSeq")
+        self._seq_base = 0 if last_seq is None else last_seq + 1
+        return True
+
+    async def _send(self, batch: list[dict]) -> bool:
+        batch = [{**turn, "seq": turn["seq"] + self._seq_base} for turn in batch]
+        return await self._post(batch) is not None
+
+    async def flush(self) -> bool:
+        if self._pending and self._seq_base is None and not await self._seed():
+            return False
+        while self._pending:
+            batch = self._pending[:self.batch_size]
+            if not await self._send(batch):
+                return False
+            # буфер мог пополниться, пока шёл запрос, — убираем только отправленное
+            del self._pending[:len(batch)]
+        return True
+
+    async def _run(self) -> None:
+        retry_delay = 1.0
+        while not self._closed:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if await self.flush():
+                retry_delay = 1.0
+            else:
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, 30.0)
+
+    async def aclose(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        for _ in range(3):
+            if await self.flush():
+                break
+            await asyncio.sleep(1.0)
+        await self._client.aclose()
+
+
+def _message_text(message: ChatMessage) -> str:
+    content = message.content
+    if isinstance(content, str):
+        return content
+    return " ".join(part for part in content if isinstance(part, str))
+
+
+class TranscribingLLM(LLM):
+    """Обёртка над LLM пайплайна: после каждого ответа пишет пару реплик в TranscriptStream."""
+
+    def __init__(self, llm: LLM, stream: TranscriptStream):
+        super().__init__()
+        self._llm = llm
+        self._stream = stream
+        if hasattr(llm, "on"):
+            llm.on("error", lambda error: self.emit("error", error))
+
+    async def chat(self, messages: ChatContext, tools: list = None, **kwargs: Any) -> AsyncIterator[LLMResponse]:
+        question = next(
+            (
+                _message_text(msg) for msg in reversed(messages.items)
+                if isinstance(msg, ChatMessage) and msg.role == ChatRole.USER
+            ),
+            "",
+        )
+        answer: list[str] = []
+        try:
+            async for response in self._llm.chat(messages, tools=tools, **kwargs):
+                if response.content:
+                    answer.append(response.content)
+                yield response
+        finally:
+            # при перебивании сохраняем то, что агент успел сказать
+            self._stream.add("user", question)
+            self._stream.add("assistant", "".join(answer))
+
+    async def cancel_current_generation(self) -> None:
+        await self._llm.cancel_current_generation()
+
+    async def aclose(self) -> None:
+        await self._llm.aclose()
+        await self._stream.aclose()
+
+
+def with_transcript(llm: LLM, room_id: Optional[str]) -> LLM:
+    """LLM с выгрузкой расшифровки, если она настроена и комната известна; иначе как есть."""
+    if not (room_id and TRANSCRIPT_INGEST_URL and AGENT_INGEST_TOKEN):
+        return llm
+    return TranscribingLLM(llm, TranscriptStream(room_id))
@@ -0,0 +1,187 @@
+"""
+Долгоживущий воркер интервью-агентов.
+
+Модели и стек VideoSDK загружаются один раз при старте процесса, после чего
+воркер принимает задания «подключиться к комнате» по локальному TCP-сокету и
+держит до AGENT_MAX_SESSIONS сессий одновременно. Бэкенд (api/interview/service)
+опрашивает воркеры через `status` и отправляет `join` в наименее загруженный.
+
+Протокол — одна JSON-строка запроса и одна JSON-строка ответа на соединение:
+    {"op": "join", "room_id": "...", "token": "..."}   -> {"ok": true, "room_id": "...", "active": 1, "capacity": 4}
+    {"op": "leave", "room_id": "...", "token": "..."}  -> {"ok": true, "active": 0, "capacity": 4}
+    {"op": "status", "token": "..."}                   -> {"ok": true, "active": 1, "capacity": 4, "rooms": ["..."]}
+Если мест нет: {"ok": false, "error": "capacity", "active": 4, "capacity": 4}.
+token — общий секрет с бэкендом (AGENT_WORKER_TOKEN, по умолчанию AGENT_INGEST_TOKEN); без него
+или с неверным: {"ok": false, "error": "unauthorized"}. Без заданного секрета воркер слушает
+только loopback.
+
+Запуск:
+    AGENT_ENTRY=main AGENT_MAX_SESSIONS=4 AGENT_WORKER_PORT=8765 AGENT_WORKER_TOKEN=... python worker.py
+AGENT_ENTRY=main_local — локальный стек (T-one, F5 TTS, RUAccent), модели грузятся через preload().
+"""
+import asyncio
+import hmac
+import importlib
+import ipaddress
+import json
+import logging
+import os
+import signal
+import time
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("agent_worker")
+
+AGENT_ENTRY = os.getenv("AGENT_ENTRY", "main")
+AGENT_WORKER_HOST = os.getenv("AGENT_WORKER_HOST", "127.0.0.1")
+AGENT_WORKER_PORT = int(os.getenv("AGENT_WORKER_PORT", "8765"))
+AGENT_WORKER_TOKEN = os.getenv("AGENT_WORKER_TOKEN") or os.getenv("AGENT_INGEST_TOKEN", "")
+AGENT_MAX_SESSIONS = int(os.getenv("AGENT_MAX_SESSIONS", "4"))
+AGENT_SESSION_MAX_SECONDS = float(os.getenv("AGENT_SESSION_MAX_SECONDS", str(60 * 60)))
+CLOSE_TIMEOUT = 5.0
+
+
+class AgentWorker:
+    def __init__(self, entry, capacity: int):
+        self.entry = entry
+        self.capacity = capacity
+        self.sessions: dict[str, tuple[asyncio.Task, asyncio.Event]] = {}
+        self.started_at = time.time()
+
+    def status(self) -> dict:
+        return {
+            "ok": True,
+            "active": len(self.sessions),
+            "capacity": self.capacity,
+            "rooms": sorted(self.sessions),
+            "entry": AGENT_ENTRY,
+            "pid": os.getpid(),
+            "uptime": round(time.time() - self.started_at, 1),
+        }
+
+    def join(self, room_id: str) -> dict:
+        if room_id in self.sessions:
+            return {**self.status(), "room_id": room_id}
+        if len(self.sessions) >= self.capacity:
+            return {**self.status(), "ok": False, "error": "capacity"}
+
+        stop = asyncio.Event()
+        task = asyncio.create_task(self._run_session(room_id, stop), name=f"agent-{room_id}")
+        self.sessions[room_id] = (task, stop)
+        task.add_done_callback(lambda _: self.sessions.pop(room_id, None))
+        logger.info(f"Комната {room_id}: сессия запущена ({len(self.sessions)}/{self.capacity})")
+        return {**self.status(), "room_id": room_id}
+
+    def leave(self, room_id: str) -> dict:
+        entry = self.sessions.get(room_id)
+        if entry is None:
+            return {**self.status(), "ok": False, "error": "not_found"}
+        entry[1].set()
+        return self.status()
+
+    async def _run_session(self, room_id: str, stop: asyncio.Event) -> None:
+        context = self.entry.make_context(room_id)
+        session = self.entry.create_session(room_id)
+
+        async def on_shutdown():
+            stop.set()
+
+        context.add_shutdown_callback(on_shutdown)
+        try:
+            await context.connect()
+            await session.start()
+            await asyncio.wait_for(stop.wait(), timeout=AGENT_SESSION_MAX_SECONDS)
+        except asyncio.TimeoutError:
+            logger.warning(f"Комната {room_id}: превышена длительность сессии")
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"Комната {room_id}: ошибка сессии: {e}")
+        finally:
+            # Закрываем только свою сессию — остальные комнаты процесса продолжают работать
+            for name, closer in (("session", session.close), ("context", context.shutdown)):
+                try:
+                    await asyncio.wait_for(closer(), timeout=CLOSE_TIMEOUT)
+                except Exception as e:
+                    logger.warning(f"Комната {room_id}: ошибка при закрытии {name}: {e}")
+            logger.info(f"Комната {room_id}: сессия завершена")
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request = json.loads(await reader.readline() or b"{}")
+            op = request.get("op")
+            if not authorized(request.get("token")):
+                response = {"ok": False, "error": "unauthorized"}
+            elif op == "join" and request.get("room_id"):
+                response = self.join(str(request["room_id"]))
+            elif op == "leave" and request.get("room_id"):
+                response = self.leave(str(request["room_id"]))
+            elif op == "status":
+                response = self.status()
+            else:
+                response = {"ok": False, "error": "bad_request"}
+        except (ValueError, UnicodeDecodeError, AttributeError):
+            response = {"ok": False, "error": "bad_request"}
+        writer.write(json.dumps(response).encode() + b"\n")
+        await writer.drain()
+        writer.close()
+
+    async def shutdown(self) -> None:
+        for _, stop in list(self.sessions.values()):
+            stop.set()
+        tasks = [task for task, _ in self.sessions.values()]
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def authorized(token) -> bool:
+    """Секрет сравнивается за постоянное время. Без секрета проверка выключена — воркер тогда
+    слушает только loopback (см. serve)."""
+    if not AGENT_WORKER_TOKEN:
+        return True
+    return isinstance(token, str) and hmac.compare_digest(token.encode(), AGENT_WORKER_TOKEN.encode())
+
+
+def is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+async def preload(entry) -> None:
+    started = time.perf_counter()
+    if hasattr(entry, "preload"):
+        await entry.preload()
+    logger.info(f"Модели {AGENT_ENTRY} загружены за {time.perf_counter() - started:.1f}s")
+
+
+async def serve() -> None:
+    if not AGENT_WORKER_TOKEN and not is_loopback(AGENT_WORKER_HOST):
+        raise SystemExit(
+            f"AGENT_WORKER_HOST={AGENT_WORKER_HOST} без AGENT_WORKER_TOKEN: управляющий сокет был бы открыт всем"
+        )
+    # Импорт модуля агента подтягивает стек VideoSDK и скачивает turn-detector один раз
+    entry = importlib.import_module(AGENT_ENTRY)
+    await preload(entry)
+
+    worker = AgentWorker(entry, AGENT_MAX_SESSIONS)
+    server = await asyncio.start_server(worker.handle, AGENT_WORKER_HOST, AGENT_WORKER_PORT)
+    logger.info(f"Воркер агентов слушает {AGENT_WORKER_HOST}:{AGENT_WORKER_PORT}, мест: {AGENT_MAX_SESSIONS}")
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+
+    async with server:
+        await stopping.wait()
+        logger.info("Останавливаем воркер...")
+        server.close()
+        await worker.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(serve())
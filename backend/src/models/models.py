@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Enum, Integer, String, Numeric, DateTime, ForeignKey, Text, Boolean, text
-from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy import BigInteger, Column, Enum, Float, Integer, SmallInteger, String, Numeric, DateTime, ForeignKey, Text, Boolean, UniqueConstraint, text
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 from sqlalchemy.orm import relationship, declarative_base
 from sqlalchemy.sql import func
 
@@ -97,6 +97,8 @@ class ApplicantProfile(Base):
 
 class JobApplication(Base):
     __tablename__ = 'job_applications'
+    # один отклик соискателя на вакансию; apply_for_job вставляет через ON CONFLICT DO NOTHING
+    __table_args__ = (UniqueConstraint('applicant_id', 'vacancy_id', name='uq_job_applications_applicant_vacancy'),)
 
     id = Column(Integer, primary_key=True)
     vacancy_id = Column(Integer, ForeignKey('vacancies.id'), nullable=True)
@@ -150,7 +152,7 @@ class JobApplicationEvent(Base):
     application_id = Column(Integer, ForeignKey('job_applications.id'))
     reqType = Column(ReqTypeEnum)
     status = Column(JobApplicationStatusEnum)
-    created_at = Column(DateTime, server_default=func.now())
+    created_at = Column(DateTime, nullable=False, server_default=func.now())  # ключ партиционирования (миграция f3a8c61e0d45)
 
     job_application = relationship("JobApplication", back_populates="job_application_events")
 
@@ -190,12 +192,64 @@ class Interview(Base):
 
     id = Column(Integer, primary_key=True)
     job_application_id = Column(Integer, ForeignKey('job_applications.id'), nullable=False)
-    history_json = Column(Text, nullable=False)
-    feedback_json = Column(Text)
+    history_json = Column(JSONB, nullable=False, server_default=text("'{}'::jsonb"))
+    feedback_json = Column(JSONB)
     strengths = Column(ARRAY(String), nullable=False, server_default=text("'{}'::text[]"))
     weaknesses = Column(ARRAY(String), nullable=False, server_default=text("'{}'::text[]"))
     verdict = Column(InterviewVerdictEnum, nullable=True)
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    # комната VideoSDK, из которой агент присылает реплики (null — интервью без живой расшифровки)
+    room_id = Column(String, nullable=True, index=True)
+
+    job_application = relationship("JobApplication", back_populates="interviews")
+    turns = relationship("InterviewTurn", back_populates="interview", cascade="all, delete-orphan", order_by="InterviewTurn.seq")
+
+class InterviewTurn(Base):
+    __tablename__ = 'interview_turns'
+
+    interview_id = Column(Integer, ForeignKey('interviews.id', ondelete="CASCADE"), primary_key=True)
+    seq = Column(Integer, primary_key=True)
+    role = Column(String(16), nullable=False)
+    content = Column(Text, nullable=False)
+    spoken_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, server_default=func.now())
 
-    job_application = relationship("JobApplication", back_populates="interviews")
\ No newline at end of file
+    interview = relationship("Interview", back_populates="turns")
+
+class OutboxMessage(Base):
+    __tablename__ = 'outbox'
+
+    id = Column(BigInteger, primary_key=True)
+    kind = Column(String(64), nullable=False)
+    payload = Column(JSONB, nullable=False, server_default=text("'{}'::jsonb"))
+    status = Column(String(16), nullable=False, server_default='pending')  # pending / done / dead
+    attempts = Column(Integer, nullable=False, server_default='0')
+    available_at = Column(DateTime, nullable=False, server_default=func.now())
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+    processed_at = Column(DateTime, nullable=True)
+
+class CVEvaluationJob(Base):
+    __tablename__ = 'cv_evaluation_jobs'
+
+    id = Column(BigInteger, primary_key=True)
+    job_application_id = Column(Integer, ForeignKey('job_applications.id', ondelete='CASCADE'), nullable=False, unique=True)
+    vacancy_id = Column(Integer, nullable=False)
+    resume_version_id = Column(Integer, nullable=False)
+    priority = Column(SmallInteger, nullable=False)  # 0 — low (bulk), 1 — normal (новый отклик), 2 — high (вручную HR)
+    deadline = Column(DateTime, nullable=True)
+    flow_key = Column(String(64), nullable=False)
+    virtual_finish = Column(Float, nullable=False)
+    replace_evaluations = Column(Boolean, nullable=False, server_default=text('false'))
+    requeues = Column(Integer, nullable=False, server_default='0')
+    attempts = Column(Integer, nullable=False, server_default='0')
+    revision = Column(Integer, nullable=False, server_default='0')
+    available_at = Column(DateTime, nullable=False, server_default=func.now())
+    enqueued_at = Column(DateTime, nullable=False, server_default=func.now())
+
+class CVEvaluationFlow(Base):
+    __tablename__ = 'cv_evaluation_flows'
+
+    flow_key = Column(String(64), primary_key=True)
+    last_finish = Column(Float, nullable=False)